@@ -0,0 +1,176 @@
+from bisect import bisect_left, insort
+from collections import Counter
+
+# Most choices Discord accepts in an autocomplete response
+MAX_CHOICES = 25
+
+
+def _word_keys(label):
+    """Returns the lowercased label from the start of each of its words"""
+    lowered = label.lower()
+    return [lowered[i:] for i in range(len(lowered))
+            if lowered[i].isalnum() and (i == 0 or not lowered[i - 1].isalnum())]
+
+
+class CompletionIndex:
+    """Labels findable by the prefix of any of their words, for autocomplete.
+
+    Each label is stored once per word as (key, label, value), where key is
+    the lowercased label from that word on, in a sorted list. A lookup is a
+    bisect to the typed prefix and a scan of the matches, so it costs the
+    same at ten labels as at thousands. Labels are set per value, so a
+    value's labels can be replaced without rebuilding the index.
+    """
+
+    def __init__(self):
+        self._entries = []
+        # Whole labels in order, listed when nothing has been typed yet
+        self._names = []
+        self._labels = {}
+
+    def __len__(self):
+        return len(self._labels)
+
+    def rebuild(self, labels_by_value):
+        """Replaces the index with {value: labels}"""
+        self._labels = {value: tuple(labels) for value, labels in labels_by_value.items() if labels}
+        self._entries = sorted((key, label, value) for value, labels in self._labels.items()
+                               for label in labels for key in _word_keys(label))
+        self._names = sorted((label.lower(), label, value) for value, labels in self._labels.items() for label in labels)
+
+    def set(self, value, labels):
+        """Sets the labels a value is found by"""
+        labels = tuple(labels)
+        if self._labels.get(value, ()) == labels:
+            return
+        self.discard(value)
+        if not labels:
+            return
+        self._labels[value] = labels
+        for label in labels:
+            insort(self._names, (label.lower(), label, value))
+            for key in _word_keys(label):
+                insort(self._entries, (key, label, value))
+
+    def discard(self, value):
+        for label in self._labels.pop(value, ()):
+            for entries, keys in ((self._names, [label.lower()]), (self._entries, _word_keys(label))):
+                for key in keys:
+                    index = bisect_left(entries, (key, label, value))
+                    if index < len(entries) and entries[index] == (key, label, value):
+                        del entries[index]
+
+    def search(self, text, limit=MAX_CHOICES):
+        """Returns up to `limit` (label, value) pairs with a word starting with text"""
+        prefix = text.strip().lower()
+        if not prefix:
+            return [(label, value) for _, label, value in self._names[:limit]]
+        results = []
+        seen = set()
+        index = bisect_left(self._entries, (prefix,))
+        while index < len(self._entries) and len(results) < limit:
+            key, label, value = self._entries[index]
+            if not key.startswith(prefix):
+                break
+            index += 1
+            if (label, value) in seen:
+                continue
+            seen.add((label, value))
+            results.append((label, value))
+        return results
+
+
+def _trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a, b, limit):
+    """Returns the edit distance of a and b, or limit + 1 if it is larger.
+
+    Swapping two adjacent characters counts as one edit, like inserting,
+    deleting or replacing one. Only cells within `limit` of the diagonal
+    are computed, since any path leaving that band costs more than limit.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    over = limit + 1
+    before = None
+    previous = [j if j <= limit else over for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        current = [i if i <= limit else over] + [over] * len(b)
+        for j in range(max(1, i - limit), min(len(b), i + limit) + 1):
+            distance = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (a[i - 1] != b[j - 1]))
+            if before is not None and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                distance = min(distance, before[j - 2] + 1)
+            current[j] = min(distance, over)
+        if min(current) > limit and (before is None or min(previous) > limit):
+            return over
+        before, previous = previous, current
+    return previous[-1]
+
+
+class FuzzyIndex:
+    """Names findable despite typos, for "did you mean" suggestions.
+
+    Names are indexed by their character trigrams. A lookup ranks the names
+    sharing the most trigrams with the typed text and computes the edit
+    distance of only the best of them, so its cost grows with the number of
+    close names rather than with the size of the index. Matching ignores case.
+    """
+
+    # Names whose edit distance is computed per lookup
+    CANDIDATES = 8
+
+    def __init__(self):
+        self._postings = {}  # trigram -> set of values
+        self._names = {}  # value -> lowercased name
+
+    def __len__(self):
+        return len(self._names)
+
+    def rebuild(self, values):
+        """Replaces the index with the given values, each its own name"""
+        self._postings = {}
+        self._names = {}
+        for value in values:
+            self.add(value)
+
+    def add(self, value):
+        if value in self._names:
+            return
+        name = value.lower()
+        self._names[value] = name
+        for trigram in _trigrams(name):
+            self._postings.setdefault(trigram, set()).add(value)
+
+    def discard(self, value):
+        name = self._names.pop(value, None)
+        if name is None:
+            return
+        for trigram in _trigrams(name):
+            postings = self._postings[trigram]
+            postings.discard(value)
+            if not postings:
+                del self._postings[trigram]
+
+    def search(self, text, limit=3):
+        """Returns up to `limit` values close to text, closest first"""
+        query = text.strip().lower()
+        if not query:
+            return []
+        shared = Counter()
+        for trigram in _trigrams(query):
+            shared.update(self._postings.get(trigram, ()))
+        # Allow about one typo per three characters typed
+        max_distance = max(1, len(query) // 3)
+        scored = []
+        for value, _ in shared.most_common(self.CANDIDATES):
+            name = self._names[value]
+            distance = edit_distance(query, name, max_distance)
+            # A name that starts with what was typed counts as a close match
+            if distance > max_distance and len(query) >= 3 and name.startswith(query):
+                distance = max_distance
+            if distance <= max_distance:
+                scored.append((distance, -shared[value], name, value))
+        return [value for *_, value in sorted(scored)[:limit]]
@@ -1,23 +1,47 @@
 import os
-from dotenv import load_dotenv
-import firebase_admin
-from firebase_admin import credentials, firestore
+import json
+import time
+import threading
 
-load_dotenv()
+_db = None
+_lock = threading.Lock()
+# Seconds spent initializing Firebase, set on first use
+init_time = None
 
-# Try to get the service account JSON from the environment variable
-service_account_json = os.getenv('FIREBASE_SERVICE_ACCOUNT')
-service_account_path = os.getenv('FIREBASE_CREDENTIALS', 'serviceAccountKey.json')
+def get_db():
+    """Returns the Firestore client, initializing Firebase on first use"""
+    global _db, init_time
+    if _db is not None:
+        return _db
+    with _lock:
+        if _db is None:
+            started = time.perf_counter()
+            # Imported here so importing this module stays cheap
+            from dotenv import load_dotenv
+            import firebase_admin
+            from firebase_admin import credentials, firestore
 
-if service_account_json:
-    # Write the JSON to a temp file
-    temp_path = 'serviceAccountKey.temp.json'
-    with open(temp_path, 'w') as f:
-        f.write(service_account_json)
-    service_account_path = temp_path
+            load_dotenv()
 
-cred = credentials.Certificate(service_account_path)
-if not firebase_admin._apps:
-    firebase_admin.initialize_app(cred)
+            # Try to get the service account JSON from the environment variable
+            service_account_json = os.getenv('FIREBASE_SERVICE_ACCOUNT')
+            if service_account_json:
+                # Build the credentials in memory instead of writing the key to disk
+                cred = credentials.Certificate(json.loads(service_account_json))
+            else:
+                cred = credentials.Certificate(os.getenv('FIREBASE_CREDENTIALS', 'serviceAccountKey.json'))
 
-db = firestore.client() 
\ No newline at end of file
+            if not firebase_admin._apps:
+                firebase_admin.initialize_app(cred)
+
+            # The gRPC channel itself is only opened by the first request
+            _db = firestore.client()
+            init_time = time.perf_counter() - started
+            print(f"Firebase client initialized in {init_time * 1000:.0f}ms")
+    return _db
+
+def __getattr__(name):
+    # Keeps `from firebase_client import db` working while initializing lazily
+    if name == 'db':
+        return get_db()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,216 @@
+import asyncio
+import heapq
+import time
+from collections import deque
+
+
+class Step:
+    """A state of a flow.
+
+    prompt(session, user) is sent when the state is entered. handle(session,
+    user, text) gets the user's reply and returns the next state, the same
+    state to wait for another reply, or None to end the flow.
+    """
+    __slots__ = ('handle', 'timeout', 'prompt')
+
+    def __init__(self, handle, timeout, prompt=None):
+        self.handle = handle
+        self.timeout = timeout
+        self.prompt = prompt
+
+
+class Flow:
+    """A conversation declared as named steps, starting at `first`"""
+    __slots__ = ('name', 'steps', 'first', 'timeout_message', 'error_message')
+
+    def __init__(self, name, steps, first, timeout_message, error_message):
+        self.name = name
+        self.steps = steps
+        self.first = first
+        self.timeout_message = timeout_message
+        self.error_message = error_message
+
+
+class Session:
+    """Where a user is in a flow; `data` holds only storable values"""
+    __slots__ = ('user_id', 'guild_id', 'flow', 'state', 'data', 'deadline')
+
+    def __init__(self, user_id, guild_id, flow, state, data=None, deadline=None):
+        self.user_id = user_id
+        self.guild_id = guild_id
+        self.flow = flow
+        self.state = state
+        self.data = data if data is not None else {}
+        # Wall-clock time, so deadlines still hold after a restart
+        self.deadline = deadline
+
+    @classmethod
+    def from_document(cls, user_id, document):
+        return cls(int(user_id), document.get('guild_id'), document.get('flow'), document.get('state'),
+                   document.get('data') or {}, document.get('deadline'))
+
+    def to_document(self):
+        return {
+            'guild_id': self.guild_id,
+            'flow': self.flow,
+            'state': self.state,
+            'data': self.data,
+            'deadline': self.deadline
+        }
+
+
+class FlowEngine:
+    """Runs DM conversations as state machines persisted between replies.
+
+    A session is a small stored document rather than a suspended coroutine,
+    so waiting sessions cost a dict entry each and survive restarts. Replies
+    of a user are handled one at a time, in order, and every timeout is kept
+    in a single heap served by one timer task. A user has at most one
+    session; starting a flow replaces the one in progress.
+    """
+
+    def __init__(self, storage, run_io, resolve_user, send, collection='sessions'):
+        self.storage = storage
+        self.run_io = run_io
+        self.resolve_user = resolve_user
+        self.send = send
+        self.collection = collection
+        self.flows = {}
+        self._sessions = {}  # user id -> Session
+        self._inboxes = {}  # user id -> replies waiting while one is handled
+        self._timers = []  # (deadline, user id); stale entries are skipped
+        self._wakeup = None
+        self._timer_task = None
+
+    def register(self, flow):
+        self.flows[flow.name] = flow
+
+    def active(self, user_id):
+        return user_id in self._sessions
+
+    async def start(self, user, guild_id, flow_name, data=None):
+        """Starts a flow for a user and sends its first prompt"""
+        session = Session(user.id, guild_id, flow_name, None, data)
+        self._sessions[user.id] = session
+        await self._enter(session, user, self.flows[flow_name].first)
+
+    def dispatch(self, user_id, text):
+        """Queues a reply for the user's session; False if they have none"""
+        if user_id not in self._sessions:
+            return False
+        inbox = self._inboxes.get(user_id)
+        if inbox is not None:
+            inbox.append(text)
+            return True
+        self._inboxes[user_id] = deque([text])
+        asyncio.create_task(self._drain(user_id))
+        return True
+
+    async def recover(self):
+        """Loads the stored sessions and arms their timeouts"""
+        documents = await self.run_io(self.storage.stream_collection, self.collection)
+        for user_id, document in documents.items():
+            session = Session.from_document(user_id, document)
+            flow = self.flows.get(session.flow)
+            if flow is None or session.state not in flow.steps or session.deadline is None:
+                await self._persist(session, delete=True)
+                continue
+            self._sessions[session.user_id] = session
+            self._push_timer(session)
+
+    async def _drain(self, user_id):
+        inbox = self._inboxes[user_id]
+        try:
+            while inbox:
+                text = inbox.popleft()
+                session = self._sessions.get(user_id)
+                if session is None:
+                    break
+                # A failed reply (e.g. storage down) doesn't drop the ones queued behind it
+                try:
+                    await self._handle(session, text)
+                except Exception as e:
+                    print(f"Error handling reply of user {user_id}: {str(e)}")
+                    # Its timer may have fired while the reply was handled,
+                    # so it is re-armed for the session to still expire
+                    if self._sessions.get(user_id) is session:
+                        self._arm(session, self.flows[session.flow].steps[session.state].timeout)
+        finally:
+            del self._inboxes[user_id]
+
+    async def _handle(self, session, text):
+        flow = self.flows[session.flow]
+        step = flow.steps[session.state]
+        user = await self.resolve_user(session.user_id)
+        try:
+            next_state = await step.handle(session, user, text)
+        except Exception as e:
+            next_state = None
+            await self.send(user, f"{flow.error_message}: {str(e)}")
+        if self._sessions.get(session.user_id) is not session:
+            # Replaced by a newer flow while the reply was handled
+            return
+        if next_state is None:
+            del self._sessions[session.user_id]
+            await self._persist(session, delete=True)
+        elif next_state == session.state:
+            self._arm(session, step.timeout)
+            await self._persist(session)
+        else:
+            await self._enter(session, user, next_state)
+
+    async def _enter(self, session, user, state):
+        step = self.flows[session.flow].steps[state]
+        session.state = state
+        self._arm(session, step.timeout)
+        # Stored before prompting so a reply to the prompt is never lost to a restart
+        await self._persist(session)
+        if step.prompt is not None:
+            await step.prompt(session, user)
+
+    def _arm(self, session, timeout):
+        session.deadline = time.time() + timeout
+        self._push_timer(session)
+
+    def _push_timer(self, session):
+        heapq.heappush(self._timers, (session.deadline, session.user_id))
+        if self._timer_task is None:
+            self._wakeup = asyncio.Event()
+            self._timer_task = asyncio.create_task(self._run_timers())
+        elif self._timers[0] == (session.deadline, session.user_id):
+            # The new deadline is the earliest; the timer task is sleeping past it
+            self._wakeup.set()
+
+    async def _run_timers(self):
+        while True:
+            self._wakeup.clear()
+            if not self._timers:
+                await self._wakeup.wait()
+                continue
+            deadline, user_id = self._timers[0]
+            delay = deadline - time.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            heapq.heappop(self._timers)
+            session = self._sessions.get(user_id)
+            # A reply being handled re-arms or ends the session itself
+            if session is None or session.deadline != deadline or user_id in self._inboxes:
+                continue
+            del self._sessions[user_id]
+            asyncio.create_task(self._expire(session))
+
+    async def _expire(self, session):
+        try:
+            await self._persist(session, delete=True)
+            user = await self.resolve_user(session.user_id)
+            await self.send(user, self.flows[session.flow].timeout_message)
+        except Exception as e:
+            print(f"Error expiring session of user {session.user_id}: {str(e)}")
+
+    async def _persist(self, session, delete=False):
+        data = None if delete else session.to_document()
+        await self.run_io(self.storage.commit, [(self.collection, str(session.user_id), data, False)])
@@ -0,0 +1,64 @@
+from bisect import bisect_left, insort
+
+# Ranks shown per leaderboard page; the first page is the cached top K
+PAGE_SIZE = 10
+
+
+class Leaderboard:
+    """Users with points, ranked highest first; ties are ordered by user id.
+
+    Entries are kept as (-points, user_id) in a sorted list, so updates and
+    rank lookups are a bisect plus a list shift, with no per-request sort.
+    top_version changes only when an update touches the first PAGE_SIZE
+    ranks, which lets callers cache the top of the board.
+    """
+
+    def __init__(self):
+        self._entries = []
+        self._points = {}
+        self.top_version = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def rebuild(self, user_points):
+        """Replaces the ranking with the given {user_id: points}"""
+        self._points = {user_id: points for user_id, points in user_points.items() if points > 0}
+        self._entries = sorted((-points, user_id) for user_id, points in self._points.items())
+        self.top_version += 1
+
+    def update(self, user_id, points):
+        """Sets a user's points; users with no points are not ranked"""
+        old_points = self._points.get(user_id)
+        if old_points == points or (old_points is None and points <= 0):
+            return
+        touches_top = False
+        if old_points is not None:
+            index = bisect_left(self._entries, (-old_points, user_id))
+            del self._entries[index]
+            del self._points[user_id]
+            touches_top = index < PAGE_SIZE
+        if points > 0:
+            entry = (-points, user_id)
+            insort(self._entries, entry)
+            self._points[user_id] = points
+            touches_top = touches_top or bisect_left(self._entries, entry) < PAGE_SIZE
+        if touches_top:
+            self.top_version += 1
+
+    def rank(self, user_id):
+        """Returns a user's 1-based rank, or None if they have no points"""
+        points = self._points.get(user_id)
+        if points is None:
+            return None
+        return bisect_left(self._entries, (-points, user_id)) + 1
+
+    def page(self, page):
+        """Returns [(rank, user_id, points)] for a 1-based page"""
+        start = (page - 1) * PAGE_SIZE
+        return [(start + offset + 1, user_id, -negative_points)
+                for offset, (negative_points, user_id) in enumerate(self._entries[start:start + PAGE_SIZE])]
+
+    @property
+    def page_count(self):
+        return max(1, (len(self._entries) + PAGE_SIZE - 1) // PAGE_SIZE)
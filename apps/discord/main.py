@@ -1,4 +1,5 @@
 import discord
+from discord import app_commands
 from discord.ext import commands
 import logging
 from dotenv import load_dotenv
@@ -6,7 +7,19 @@ import os
 import json
 from datetime import datetime
 import asyncio
-from firebase_client import db
+import contextlib
+import copy
+import functools
+import time
+import zlib
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from storage import create_storage, PartitionStorage
+from models import Project, Task, merge_project_documents
+from leaderboard import Leaderboard
+from outbound import Dispatcher, Priority
+from flows import Flow, FlowEngine, Step
+from completion import CompletionIndex, FuzzyIndex, MAX_CHOICES
 
 # Load environment variables
 load_dotenv()
@@ -20,14 +33,123 @@ intents.members = True
 
 bot = commands.Bot(command_prefix='!', intents=intents, help_command=None)
 
+# Storage location of each top-level config document, keyed by ProjectManager attribute
+CONFIG_DOCUMENTS = {
+    'forum_channel': ('config', 'forum_channel'),
+    'permissions': ('config', 'permissions'),
+    'shop_items': ('shop', 'items'),
+}
+# Per-user maps are split across shard documents in a collection of their own
+USER_MAPS = {
+    'user_roles': 'user_roles',
+    'user_points': 'user_points',
+    'user_tasks': 'user_tasks',
+}
+# Single document each per-user map lived in before sharding, migrated on load
+LEGACY_USER_DOCUMENTS = {
+    'user_roles': 'roles',
+    'user_points': 'points',
+    'user_tasks': 'tasks',
+}
+# Changing the shard count requires re-sharding the existing documents
+USER_SHARD_COUNT = int(os.getenv('CREWMATE_USER_SHARDS', '16'))
+# Fields read for every project at startup; task lists are fetched on first use
+PROJECT_SUMMARY_FIELDS = ['status', 'progress', 'task_count']
+# Maximum number of projects kept in memory with their full task lists
+HYDRATED_PROJECT_LIMIT = int(os.getenv('CREWMATE_HYDRATED_PROJECTS', '256'))
+# Maximum number of storage operations running at once
+# (FIRESTORE_MAX_IN_FLIGHT is its name from before pluggable storage, still honoured)
+STORAGE_MAX_IN_FLIGHT = int(os.getenv('CREWMATE_STORAGE_MAX_IN_FLIGHT') or os.getenv('FIRESTORE_MAX_IN_FLIGHT') or '4')
+# Write-behind mode acknowledges saves once they hit the local journal
+WRITE_BEHIND = os.getenv('CREWMATE_WRITE_BEHIND', '').lower() in ('1', 'true', 'yes')
+WRITE_BEHIND_INTERVAL_MS = int(os.getenv('CREWMATE_WRITE_BEHIND_INTERVAL_MS', '500'))
+JOURNAL_PATH = os.getenv('CREWMATE_JOURNAL_PATH', 'crewmate.journal')
+# Live sync keeps the cache coherent with changes made by the dashboard or other replicas
+LIVE_SYNC = os.getenv('CREWMATE_LIVE_SYNC', '').lower() in ('1', 'true', 'yes')
+# Slash commands are synced to Discord at startup only when asked, since
+# global syncs are rate limited; the owner can also run !synccommands
+SYNC_COMMANDS = os.getenv('CREWMATE_SYNC_COMMANDS', '').lower() in ('1', 'true', 'yes')
+# Forum posts are updated at most once per window per project
+FORUM_UPDATE_DELAY_MS = int(os.getenv('CREWMATE_FORUM_UPDATE_DELAY_MS', '2000'))
+FORUM_UPDATE_CONCURRENCY = int(os.getenv('CREWMATE_FORUM_UPDATE_CONCURRENCY', '2'))
+# Outbound REST calls in flight at once, overall and per channel, thread or DM
+OUTBOUND_CONCURRENCY = int(os.getenv('CREWMATE_OUTBOUND_CONCURRENCY', '8'))
+OUTBOUND_BUCKET_CONCURRENCY = int(os.getenv('CREWMATE_OUTBOUND_BUCKET_CONCURRENCY', '1'))
+# Queue waits longer than this are logged
+OUTBOUND_SLOW_WAIT_MS = int(os.getenv('CREWMATE_OUTBOUND_SLOW_WAIT_MS', '1000'))
+# Queue and project lock metrics are logged this often; 0 turns the log off
+STATS_LOG_INTERVAL_S = int(os.getenv('CREWMATE_STATS_LOG_INTERVAL_S', '600'))
+# Waits for a project's lock longer than this are logged
+PROJECT_LOCK_SLOW_WAIT_MS = int(os.getenv('CREWMATE_PROJECT_LOCK_SLOW_WAIT_MS', '500'))
+# Times a project write is rebased onto a concurrent change before giving up
+PROJECT_WRITE_RETRIES = int(os.getenv('CREWMATE_PROJECT_WRITE_RETRIES', '3'))
+# Guild that keeps the root-level collections written before data was partitioned by guild
+LEGACY_GUILD_ID = int(os.getenv('CREWMATE_LEGACY_GUILD_ID')) if os.getenv('CREWMATE_LEGACY_GUILD_ID') else None
+
+def user_shard(user_id):
+    """Returns the id of the shard document holding a user's entry"""
+    try:
+        index = int(user_id) % USER_SHARD_COUNT
+    except ValueError:
+        index = zlib.crc32(str(user_id).encode('utf-8')) % USER_SHARD_COUNT
+    return f"shard_{index:02d}"
+
+def coalesce_write(pending, location, data, merge):
+    """Folds a write into the pending writes keyed by document location"""
+    previous = pending.get(location)
+    if merge and previous is not None and previous[0] is not None:
+        combined = dict(previous[0])
+        combined.update(data)
+        if not previous[1]:
+            # A full document write has no use for deleted-field markers
+            combined = {field: value for field, value in combined.items() if value is not None}
+        pending[location] = (combined, previous[1])
+    else:
+        pending[location] = (data, merge)
+
+
+def is_versioned_write(collection, data, merge):
+    """Whether a write stores a whole project that must not overwrite a newer version"""
+    return collection == 'projects' and data is not None and not merge and 'version' in data
+
+def decode_user_value(key, value):
+    """Converts a stored per-user value to its in-memory form"""
+    if key == 'user_tasks':
+        # Task index entries stored per member, as a list of maps, before
+        # each assignment got a field of its own
+        return {(entry['project'], entry['task']) for entry in value or () if isinstance(entry, dict)}
+    return value
+
+def assignment_field(user_id, project_name, task_id):
+    """Returns the shard field of one entry of the member -> tasks index"""
+    # One field per assignment, so processes assigning the same member at
+    # once merge their entries instead of overwriting each other's
+    return f"{user_id}:{task_id}:{project_name}"
+
+def parse_assignment_field(field):
+    """Returns (user id, project name, task id) of an assignment field, or None"""
+    parts = field.split(':', 2)
+    if len(parts) != 3 or not parts[1].isdigit():
+        return None
+    return parts[0], parts[2], int(parts[1])
+
 # Data storage (in a real application, you'd use a database)
 class ProjectManager:
-    def __init__(self):
+    def __init__(self, storage=None, guild_id=None, journal_path=JOURNAL_PATH, io_executor=None, journal_executor=None):
+        self.storage = storage or create_storage()
+        self.guild_id = guild_id
         self.projects = {}
         self.user_roles = {}
         self.user_points = {}
-        self.user_tasks = {}
+        self.leaderboard = Leaderboard()  # ranking of user_points, kept in step with it
+        self.user_tasks = {}  # user id -> {(project name, task id)} of open assigned tasks
+        # Autocomplete over project names and the task descriptions of loaded projects
+        self.project_search = CompletionIndex()
+        self.task_search = CompletionIndex()
+        # Typo-tolerant project name lookup for "did you mean" suggestions
+        self.project_fuzzy = FuzzyIndex()
         self.forum_channel_name = "📋・projects"  # Default forum channel
+        self.forum_channel_id = None  # Resolved from the name on first use
         self.permissions = {
             'project_management': ['owner', 'admin', 'Team Leader'],  # new, edit, delete project
             'forum_config': ['owner', 'admin'],  # project forums
@@ -42,63 +164,1220 @@ class ProjectManager:
             "Write documentation": 40,
             "Code review": 35
         }
-        self.load_data()
-    
-    def load_data(self):
-        # Load all data from Firestore
+        # One lock per project with changes in progress: [lock, holders and waiters]
+        self._project_locks = {}
+        self.lock_stats = {'acquired': 0, 'contended': 0, 'wait_ms_total': 0.0, 'wait_ms_max': 0.0}
+        # Change tracking so save only rewrites what was touched
+        self._dirty_projects = set()
+        self._deleted_projects = set()
+        self._dirty_documents = set()
+        self._dirty_users = set()
+        self._dirty_assignments = set()  # (user id, project name, task id)
+        # project name -> {(user id, task id)}, the member -> tasks index by project
+        self._project_assignments = {}
+        # Projects whose full task lists are in memory, least recently used first
+        self._hydrated = OrderedDict()
+        # project name -> ids of tasks whose local changes lost to a write made elsewhere
+        self._rejected_tasks = {}
+        # Storage I/O runs off the event loop; saves are serialized so a
+        # later snapshot never lands before an earlier one
+        self._io_executor = io_executor or ThreadPoolExecutor(max_workers=STORAGE_MAX_IN_FLIGHT, thread_name_prefix='storage')
+        self._save_lock = asyncio.Lock()
+        # Write-behind mode: saves are journaled locally and flushed in batches
+        self.write_behind = WRITE_BEHIND
+        self._pending_writes = {}
+        self._pending_increments = {}
+        self._flush_lock = asyncio.Lock()
+        self._flusher_task = None
+        self.journal_path = journal_path
+        self._journal_executor = journal_executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix='journal')
+        # Storage snapshot listeners, active when live sync is enabled
+        self._watches = []
+    
+    def _fetch_projects(self):
+        # Stream project summaries only (blocking, runs on the I/O executor)
+        projects = self.storage.stream_projects(PROJECT_SUMMARY_FIELDS)
+        missing = [project_name for project_name, summary in projects.items() if 'task_count' not in summary]
+        if missing:
+            self._backfill_task_counts(projects, missing)
+        return projects
+    
+    def _backfill_task_counts(self, projects, project_names):
+        """Stores task_count on projects saved before summaries existed"""
+        documents = self.storage.get_documents([('projects', project_name) for project_name in project_names])
+        writes = []
+        for (collection, project_name), project in documents.items():
+            if project is None:
+                continue
+            task_count = len(project.get('tasks', []))
+            projects[project_name]['task_count'] = task_count
+            writes.append((collection, project_name, {'task_count': task_count}, True))
+        self.storage.commit(writes)
+        print(f"Backfilled task counts for {len(project_names)} project(s)")
+    
+    def _fetch_project(self, project_name):
+        return self.storage.get_document('projects', project_name)
+    
+    async def get_project(self, project_name):
+        """Returns a project with its full task list, fetching it on first use"""
+        project = self.projects.get(project_name)
+        if project is None:
+            return None
+        if project_name in self._hydrated:
+            self._hydrated.move_to_end(project_name)
+            return project
+        # A write-behind write that has not been flushed yet is newer than storage
+        pending = self._pending_writes.get(('projects', project_name))
+        if pending is not None and pending[0] is not None:
+            document = pending[0]
+        else:
+            document = await self._run_io(self._fetch_project, project_name)
+        # The project may have been hydrated or deleted while we waited
+        if project_name in self._hydrated or project_name not in self.projects:
+            return self.projects.get(project_name)
+        if document is None:
+            return project
+        full_project = Project.from_document(document)
+        if pending is not None and pending[0] is not None:
+            full_project.version = max(document.get('version', 1) - 1, 0)
+        else:
+            full_project.base = document
+        self.projects[project_name] = full_project
+        self._hydrated[project_name] = None
+        self._project_changed(project_name)
+        self._evict_projects()
+        return full_project
+    
+    def _evict_projects(self):
+        # Drop the task lists of the least recently used projects, keeping
+        # any with changes that still have to be saved
+        for project_name in list(self._hydrated):
+            if len(self._hydrated) <= HYDRATED_PROJECT_LIMIT:
+                break
+            if project_name in self._dirty_projects:
+                continue
+            del self._hydrated[project_name]
+            project = self.projects.get(project_name)
+            if project is not None:
+                self.projects[project_name] = project.summary()
+    
+    def _fetch_documents(self):
+        """Reads every config document and user shard in one batched round trip"""
+        locations = list(CONFIG_DOCUMENTS.values())
+        for key, collection in USER_MAPS.items():
+            locations.append((collection, LEGACY_USER_DOCUMENTS[key]))
+            for index in range(USER_SHARD_COUNT):
+                locations.append((collection, f"shard_{index:02d}"))
+        return self.storage.get_documents(locations)
+    
+    def _build_data(self, projects, documents):
+        # Turn the fetched documents into ProjectManager state, migrating
+        # legacy user maps on the way (blocking, runs on the I/O executor)
+        def document(key):
+            return documents.get(CONFIG_DOCUMENTS[key])
+        
+        data = {'projects': {project_name: Project.from_document(summary) for project_name, summary in projects.items()}}
+        # Per-user maps
+        for key, collection in USER_MAPS.items():
+            user_map = {}
+            sharded = False
+            for index in range(USER_SHARD_COUNT):
+                shard = documents.get((collection, f"shard_{index:02d}"))
+                if shard is not None:
+                    sharded = True
+                    user_map.update(shard)
+            legacy = documents.get((collection, LEGACY_USER_DOCUMENTS[key]))
+            if not sharded and key == 'user_tasks':
+                # The task index was never populated before it was sharded
+                data[key] = self._backfill_user_tasks(list(projects))
+                continue
+            if key == 'user_tasks':
+                data[key] = self._decode_user_tasks(user_map)
+                continue
+            if not sharded and legacy is not None:
+                user_map = legacy
+                self._migrate_user_map(key, user_map)
+            data[key] = {user_id: decode_user_value(key, value) for user_id, value in user_map.items()}
+        # Forum channel name
+        forum_channel = document('forum_channel')
+        data['forum_channel_name'] = forum_channel.get('name', "📋・projects") if forum_channel else "📋・projects"
+        data['forum_channel_id'] = forum_channel.get('id') if forum_channel else None
+        # Permissions
+        permissions = document('permissions')
+        data['permissions'] = permissions if permissions is not None else self.permissions
+        # Shop items
+        shop_items = document('shop_items')
+        data['shop_items'] = shop_items if shop_items is not None else {}
+        return data
+    
+    def _migrate_user_map(self, key, user_map):
+        """Splits a legacy single-document user map into shard documents"""
+        collection = USER_MAPS[key]
+        shards = {}
+        for user_id, value in user_map.items():
+            shards.setdefault(user_shard(user_id), {})[user_id] = value
+        # One commit so the legacy document only disappears once every shard exists
+        writes = [(collection, document, shard_data, False) for document, shard_data in shards.items()]
+        writes.append((collection, LEGACY_USER_DOCUMENTS[key], None, False))
+        self.storage.commit(writes)
+        print(f"Migrated {len(user_map)} {key} entries into {len(shards)} shard document(s)")
+    
+    def _decode_user_tasks(self, fields):
+        """Builds the member -> tasks index from its shard fields, migrating per-member entries"""
+        user_tasks = {}
+        legacy = {}
+        for field, value in fields.items():
+            assignment = parse_assignment_field(field)
+            if assignment is not None:
+                if value:
+                    user_tasks.setdefault(assignment[0], set()).add(assignment[1:])
+            elif isinstance(value, list):
+                legacy[field] = decode_user_value('user_tasks', value)
+        if legacy:
+            collection = USER_MAPS['user_tasks']
+            shards = {}
+            for user_id, assignments in legacy.items():
+                shard = shards.setdefault(user_shard(user_id), {})
+                shard[user_id] = None
+                for project_name, task_id in assignments:
+                    shard[assignment_field(user_id, project_name, task_id)] = True
+                user_tasks.setdefault(user_id, set()).update(assignments)
+            self.storage.commit([(collection, document, shard, True) for document, shard in shards.items()])
+            print(f"Migrated the task index entries of {len(legacy)} member(s) to one field per assignment")
+        return user_tasks
+    
+    def _backfill_user_tasks(self, project_names):
+        """Builds the member -> tasks index from the stored projects"""
+        if not project_names:
+            return {}
+        collection = USER_MAPS['user_tasks']
+        documents = self.storage.get_documents([('projects', project_name) for project_name in project_names])
+        user_tasks = {}
+        writes = []
+        for (_, project_name), document in documents.items():
+            if document is None:
+                continue
+            project = Project.from_document(document)
+            for task in project.tasks or ():
+                if not task.completed:
+                    for member in task.assigned_members:
+                        user_tasks.setdefault(str(member), set()).add((project_name, task.id))
+            # Store the task ids the index refers to
+            if any(not isinstance(task, dict) or 'id' not in task for task in document.get('tasks') or ()):
+                writes.append(('projects', project_name, project.to_document(), False))
+        shards = {f"shard_{index:02d}": {} for index in range(USER_SHARD_COUNT)}
+        for user_id, assignments in user_tasks.items():
+            for project_name, task_id in assignments:
+                shards[user_shard(user_id)][assignment_field(user_id, project_name, task_id)] = True
+        # Empty shards are written too so the index is only built once
+        writes.extend((collection, document, shard, False) for document, shard in shards.items())
+        writes.append((collection, LEGACY_USER_DOCUMENTS['user_tasks'], None, False))
+        self.storage.commit(writes)
+        print(f"Indexed assigned tasks of {len(user_tasks)} member(s) across {len(documents)} project(s)")
+        return user_tasks
+    
+    def _apply_data(self, data):
+        for key, value in data.items():
+            setattr(self, key, value)
+        self._hydrated = OrderedDict()
+        self._project_assignments = {}
+        for user_id, assignments in self.user_tasks.items():
+            for project_name, task_id in assignments:
+                self._project_assignments.setdefault(project_name, set()).add((user_id, task_id))
+        self.leaderboard.rebuild(self.user_points)
+        self.project_search.rebuild({project_name: (project_name,) for project_name in self.projects})
+        self.task_search.rebuild({})
+        self.project_fuzzy.rebuild(self.projects)
+    
+    async def load(self):
+        """Loads all data from storage without blocking the event loop.
+
+        Raises if storage can't be read, so defaults are never saved over
+        the stored data.
+        """
+        started = time.perf_counter()
+        timings = {}
         try:
-            # Projects
-            projects_ref = db.collection('projects').stream()
-            self.projects = {doc.id: doc.to_dict() for doc in projects_ref}
-            # User roles
-            user_roles_ref = db.collection('user_roles').document('roles').get()
-            self.user_roles = user_roles_ref.to_dict() if user_roles_ref.exists else {}
-            # User points
-            user_points_ref = db.collection('user_points').document('points').get()
-            self.user_points = user_points_ref.to_dict() if user_points_ref.exists else {}
-            # User tasks
-            user_tasks_ref = db.collection('user_tasks').document('tasks').get()
-            self.user_tasks = user_tasks_ref.to_dict() if user_tasks_ref.exists else {}
-            # Forum channel name
-            forum_channel_ref = db.collection('config').document('forum_channel').get()
-            self.forum_channel_name = forum_channel_ref.to_dict().get('name', "📋・projects") if forum_channel_ref.exists else "📋・projects"
-            # Permissions
-            permissions_ref = db.collection('config').document('permissions').get()
-            self.permissions = permissions_ref.to_dict() if permissions_ref.exists else self.permissions
-            # Shop items
-            shop_items_ref = db.collection('shop').document('items').get()
-            self.shop_items = shop_items_ref.to_dict() if shop_items_ref.exists else {}
+            # The projects stream and the batched document read run concurrently
+            projects, snapshots = await asyncio.gather(
+                self._timed_io(timings, 'projects', self._fetch_projects),
+                self._timed_io(timings, 'documents', self._fetch_documents)
+            )
+            data = await self._timed_io(timings, 'processing', self._build_data, projects, snapshots)
+            self._apply_data(data)
         except Exception as e:
-            print(f"Warning: Could not load data from Firestore: {e}")
+            print(f"Error: Could not load data for guild {self.guild_id} from {self.storage.name} storage: {e}")
+            raise
+        phases = ", ".join(f"{phase} {elapsed:.0f}ms" for phase, elapsed in timings.items())
+        print(f"Loaded {len(self.projects)} project(s) for guild {self.guild_id} in {(time.perf_counter() - started) * 1000:.0f}ms ({phases})")
+    
+    async def _timed_io(self, timings, phase, func, *args):
+        started = time.perf_counter()
+        result = await self._run_io(func, *args)
+        timings[phase] = (time.perf_counter() - started) * 1000
+        return result
+    
+    async def _run_io(self, func, *args):
+        # Storage engines are synchronous, so calls go through a bounded
+        # thread pool; its size caps the number of in-flight operations
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._io_executor, functools.partial(func, *args))
+    
+    @contextlib.asynccontextmanager
+    async def project_lock(self, project_name):
+        """Serializes check-then-change sequences on one project.
+
+        Changes to other projects go ahead in parallel. Callers re-read the
+        project with get_project once they hold the lock.
+        """
+        entry = self._project_locks.get(project_name)
+        if entry is None:
+            entry = self._project_locks[project_name] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        contended = entry[0].locked()
+        started = time.perf_counter()
+        try:
+            async with entry[0]:
+                waited = (time.perf_counter() - started) * 1000
+                self.lock_stats['acquired'] += 1
+                self.lock_stats['contended'] += contended
+                self.lock_stats['wait_ms_total'] += waited
+                self.lock_stats['wait_ms_max'] = max(self.lock_stats['wait_ms_max'], waited)
+                if waited > PROJECT_LOCK_SLOW_WAIT_MS:
+                    print(f"Warning: waited {waited:.0f}ms for the lock of project {project_name} in guild {self.guild_id}")
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._project_locks[project_name]
+    
+    def mark_dirty(self, key):
+        """Records that a top-level document changed since the last save"""
+        self._dirty_documents.add(key)
+    
+    def mark_user_dirty(self, key, user_id):
+        """Records that a user's entry in a per-user map changed since the last save"""
+        self._dirty_users.add((key, user_id))
+    
+    def mark_project_dirty(self, project_name, project):
+        """Records that a project changed since the last save"""
+        # The caller's copy is the one to save, even if the cached one was
+        # evicted while the caller was waiting on user input
+        self.projects[project_name] = project
+        self._hydrated[project_name] = None
+        self._hydrated.move_to_end(project_name)
+        self._deleted_projects.discard(project_name)
+        self._dirty_projects.add(project_name)
+        self._project_changed(project_name)
+    
+    def mark_project_deleted(self, project_name):
+        """Records that a project was removed since the last save"""
+        self._hydrated.pop(project_name, None)
+        self._dirty_projects.discard(project_name)
+        self._deleted_projects.add(project_name)
+        self._reindex_project(project_name)
+        self.project_search.discard(project_name)
+        self.task_search.discard(project_name)
+        self.project_fuzzy.discard(project_name)
+    
+    def member_tasks(self, member_id):
+        """Returns the (project name, task id) pairs of a member's open tasks"""
+        return self.user_tasks.get(str(member_id), set())
+    
+    def _set_assignment(self, user_id, project_name, task_id, assigned):
+        """Adds or removes an entry of the member -> tasks index; returns whether it changed"""
+        assignments = self.user_tasks.get(user_id)
+        if assigned == (assignments is not None and (project_name, task_id) in assignments):
+            return False
+        members = self._project_assignments.get(project_name)
+        if assigned:
+            self.user_tasks.setdefault(user_id, set()).add((project_name, task_id))
+            self._project_assignments.setdefault(project_name, set()).add((user_id, task_id))
+            return True
+        assignments.discard((project_name, task_id))
+        if not assignments:
+            del self.user_tasks[user_id]
+        if members is not None:
+            members.discard((user_id, task_id))
+            if not members:
+                del self._project_assignments[project_name]
+        return True
+    
+    def _reindex_project(self, project_name):
+        """Brings a project's entries of the member -> tasks index in line with its loaded tasks"""
+        project = self.projects.get(project_name)
+        if project_name in self._deleted_projects:
+            project = None
+        elif project is not None and project.tasks is None:
+            # A summary; its entries stay as stored until it is loaded
+            return
+        assigned = set()
+        if project is not None:
+            assigned = {(str(member), task.id) for task in project.tasks if not task.completed for member in task.assigned_members}
+        indexed = self._project_assignments.get(project_name, set())
+        for user_id, task_id in indexed - assigned:
+            self._set_assignment(user_id, project_name, task_id, False)
+            self._dirty_assignments.add((user_id, project_name, task_id))
+        for user_id, task_id in assigned - indexed:
+            self._set_assignment(user_id, project_name, task_id, True)
+            self._dirty_assignments.add((user_id, project_name, task_id))
+    
+    def _document_data(self, key):
+        if key == 'forum_channel':
+            document = {'name': self.forum_channel_name}
+            if self.forum_channel_id is not None:
+                document['id'] = self.forum_channel_id
+            return document
+        return getattr(self, key)
+    
+    def _collect_writes(self):
+        """Builds the pending writes and resets the change tracking"""
+        writes = []
+        for project_name in self._dirty_projects:
+            if project_name in self.projects:
+                document = self.projects[project_name].to_document()
+                # Stored only if nobody else wrote the project since its version
+                document['version'] += 1
+                writes.append(('projects', project_name, document, False))
+        for project_name in self._deleted_projects:
+            writes.append(('projects', project_name, None, False))
+        for key in self._dirty_documents:
+            collection, document = CONFIG_DOCUMENTS[key]
+            writes.append((collection, document, self._document_data(key), False))
+        # Changed users are merged into their shard; None deletes the field
+        shards = {}
+        for key, user_id in self._dirty_users:
+            location = (USER_MAPS[key], user_shard(user_id))
+            shards.setdefault(location, {})[user_id] = getattr(self, key).get(user_id)
+        for user_id, project_name, task_id in self._dirty_assignments:
+            location = (USER_MAPS['user_tasks'], user_shard(user_id))
+            assigned = (project_name, task_id) in self.user_tasks.get(user_id, ())
+            shards.setdefault(location, {})[assignment_field(user_id, project_name, task_id)] = True if assigned else None
+        for (collection, document), fields in shards.items():
+            writes.append((collection, document, fields, True))
+        # Snapshot the data so the loop can keep mutating while it is written
+        writes = copy.deepcopy(writes)
+        
+        self._dirty_projects = set()
+        self._deleted_projects = set()
+        self._dirty_documents = set()
+        self._dirty_users = set()
+        self._dirty_assignments = set()
+        self._evict_projects()
+        return writes
+    
+    def _restore_writes(self, writes):
+        """Marks the documents of a failed save as dirty again"""
+        documents = {location: key for key, location in CONFIG_DOCUMENTS.items()}
+        user_maps = {collection: key for key, collection in USER_MAPS.items()}
+        for collection, document, data, merge in writes:
+            if collection == 'projects':
+                if data is None:
+                    self._deleted_projects.add(document)
+                elif document not in self._deleted_projects:
+                    self._dirty_projects.add(document)
+            elif merge and collection == USER_MAPS['user_tasks']:
+                for field in data:
+                    assignment = parse_assignment_field(field)
+                    if assignment is not None:
+                        self._dirty_assignments.add(assignment)
+            elif merge:
+                for user_id in data:
+                    self._dirty_users.add((user_maps[collection], user_id))
+            else:
+                self._dirty_documents.add(documents[(collection, document)])
+    
+    async def save(self):
+        """Saves changed documents without blocking the event loop"""
+        async with self._save_lock:
+            writes = self._collect_writes()
+            if not writes and (self.write_behind or not self._pending_increments):
+                return
+            if self.write_behind:
+                # Acknowledge once the journal is on disk; the flusher task
+                # writes the coalesced documents to storage later
+                try:
+                    await self._run_journal(self._append_journal, writes)
+                except Exception as e:
+                    self._restore_writes(writes)
+                    print(f"Error writing journal {self.journal_path}: {e}")
+                    return
+                for collection, document, data, merge in writes:
+                    coalesce_write(self._pending_writes, (collection, document), data, merge)
+                return
+            versioned = {document: data for collection, document, data, merge in writes if is_versioned_write(collection, data, merge)}
+            writes = [(collection, document, data, merge) for collection, document, data, merge in writes
+                      if not is_versioned_write(collection, data, merge)]
+            try:
+                if writes:
+                    await self._run_io(self.storage.commit, writes)
+                    writes = []
+                if versioned:
+                    await self._commit_projects(versioned)
+            except Exception as e:
+                self._restore_writes(writes + [('projects', document, data, False) for document, data in versioned.items()])
+                print(f"Error saving data to {self.storage.name} storage: {e}")
+                return
+            if self._pending_increments:
+                # Awards that failed to reach storage when they were made
+                increments = self._pending_increments
+                self._pending_increments = {}
+                try:
+                    await self._run_io(self.storage.increment, increments)
+                except Exception as e:
+                    self._merge_increments(increments)
+                    print(f"Error retrying point awards in {self.storage.name} storage: {e}")
+                    return
+                await self._run_journal(self._rewrite_journal, {}, copy.deepcopy(self._pending_increments))
     
-    def save_data(self):
-        # Save all data to Firestore
+    async def save_project(self, project_name):
+        """Saves, then waits until the project's write has reached storage.
+
+        Returns the ids of the project's tasks whose changes were dropped
+        because they no longer applied to the stored project, e.g. a slot
+        taken or a task completed elsewhere in the meantime.
+        """
+        self._rejected_tasks.pop(project_name, None)
+        await self.save()
+        if self.write_behind:
+            # Taking the flush lock means the write has been attempted
+            await self.flush()
+        return self._rejected_tasks.pop(project_name, set())
+    
+    async def _commit_projects(self, documents):
+        """Writes full project documents, rebasing any that changed in storage meanwhile"""
+        for attempt in range(PROJECT_WRITE_RETRIES + 1):
+            conflicts = await self._run_io(self.storage.commit_versioned, 'projects', documents)
+            for project_name, document in documents.items():
+                if project_name not in conflicts:
+                    self._project_stored(project_name, document)
+            documents = {}
+            for project_name, stored in conflicts.items():
+                document = self._rebase_project(project_name, stored)
+                if document is not None:
+                    documents[project_name] = document
+            if not documents:
+                return
+        print(f"Warning: Gave up saving project(s) {', '.join(documents)} after {PROJECT_WRITE_RETRIES} conflicting write(s)")
+        self._dirty_projects.update(documents)
+    
+    def _project_stored(self, project_name, document):
+        # The in-memory copy now builds on the stored version, unless it was
+        # replaced while the write was in flight
+        project = self.projects.get(project_name)
+        if project is not None and project.tasks is not None and project.version == document['version'] - 1:
+            project.version = document['version']
+            project.base = document
+    
+    def _rebase_project(self, project_name, stored):
+        """Merges local changes onto a project written elsewhere; returns the document to write"""
+        project = self.projects.get(project_name)
+        if stored is None:
+            # Deleted elsewhere; the delete wins over changes made here
+            print(f"Warning: Project {project_name} was deleted in storage; dropping its unsaved changes")
+            self.projects.pop(project_name, None)
+            self._hydrated.pop(project_name, None)
+            self._dirty_projects.discard(project_name)
+            self._project_changed(project_name)
+            return None
+        if project is None or project.tasks is None:
+            return None
+        # Without the version it was read at (e.g. replayed from the journal)
+        # everything that differs is taken as a local change
+        merged, rejected = merge_project_documents(project.base if project.base is not None else stored, project.to_document(), stored)
+        if rejected:
+            self._rejected_tasks.setdefault(project_name, set()).update(rejected)
+        merged['version'] = stored.get('version', 0)
+        rebased = Project.from_document(merged)
+        rebased.update_progress()
+        rebased.base = stored
+        self.projects[project_name] = rebased
+        self._hydrated[project_name] = None
+        self._project_changed(project_name)
+        document = copy.deepcopy(rebased.to_document())
+        document['version'] += 1
+        return document
+    
+    async def award_points(self, awards):
+        """Atomically adds points to members, given as {member_id: points}"""
+        awards = {member_id: points for member_id, points in awards.items() if points}
+        if not awards:
+            return
+        if self.write_behind:
+            # Journal the awards as increments so a flush never overwrites
+            # balances written by another process
+            increments = {}
+            for member_id, points in awards.items():
+                increments.setdefault((USER_MAPS['user_points'], user_shard(member_id)), {})[member_id] = points
+            async with self._save_lock:
+                await self._run_journal(self._append_journal_increments, increments)
+                self._merge_increments(increments)
+                for member_id, points in awards.items():
+                    self.user_points[member_id] = self.user_points.get(member_id, 0) + points
+                    self._points_changed(member_id)
+            return
+        shards = {}
+        for member_id, points in awards.items():
+            shards.setdefault(user_shard(member_id), {})[member_id] = points
         try:
-            # Projects
-            for project_id, project in self.projects.items():
-                db.collection('projects').document(project_id).set(project)
-            # User roles
-            db.collection('user_roles').document('roles').set(self.user_roles)
-            # User points
-            db.collection('user_points').document('points').set(self.user_points)
-            # User tasks
-            db.collection('user_tasks').document('tasks').set(self.user_tasks)
-            # Forum channel name
-            db.collection('config').document('forum_channel').set({'name': self.forum_channel_name})
-            # Permissions
-            db.collection('config').document('permissions').set(self.permissions)
-            # Shop items
-            db.collection('shop').document('items').set(self.shop_items)
+            balances = await self._run_io(self.storage.add_to_fields, USER_MAPS['user_points'], shards)
         except Exception as e:
-            print(f"Error saving data to Firestore: {e}")
+            # Journaled as increments and retried on the next save (or replayed
+            # after a restart), since the task is already stored as completed
+            print(f"Error awarding points in {self.storage.name} storage, retrying on the next save: {e}")
+            increments = {(USER_MAPS['user_points'], shard): fields for shard, fields in shards.items()}
+            async with self._save_lock:
+                await self._run_journal(self._append_journal_increments, increments)
+                self._merge_increments(increments)
+                for member_id, points in awards.items():
+                    self.user_points[member_id] = self.user_points.get(member_id, 0) + points
+                    self._points_changed(member_id)
+            return
+        for member_id, balance in balances.items():
+            # Earlier awards still waiting to be retried are not in storage yet
+            pending = self._pending_increments.get((USER_MAPS['user_points'], user_shard(member_id)), {})
+            self.user_points[member_id] = balance + pending.get(member_id, 0)
+            self._points_changed(member_id)
+    
+    def _points_changed(self, user_id):
+        # Keep the leaderboard in step with a user's balance
+        self.leaderboard.update(user_id, self.user_points.get(user_id, 0))
+    
+    def _project_changed(self, project_name):
+        # Keep the autocomplete indexes in step with a project; task
+        # descriptions of a project stay indexed after its tasks are evicted
+        self._reindex_project(project_name)
+        project = self.projects.get(project_name)
+        if project is None:
+            self.project_search.discard(project_name)
+            self.task_search.discard(project_name)
+            self.project_fuzzy.discard(project_name)
+            return
+        self.project_search.set(project_name, (project_name,))
+        self.project_fuzzy.add(project_name)
+        if project.tasks is not None:
+            self.task_search.set(project_name, [task.description for task in project.tasks])
+    
+    async def _run_journal(self, func, *args):
+        # Journal writes go through a single thread so records stay in order
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._journal_executor, functools.partial(func, *args))
+    
+    def _append_journal(self, writes):
+        with open(self.journal_path, 'a', encoding='utf-8') as f:
+            for collection, document, data, merge in writes:
+                f.write(json.dumps({'c': collection, 'd': document, 'v': data, 'm': merge}, ensure_ascii=False, default=str) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+    
+    def _append_journal_increments(self, increments):
+        with open(self.journal_path, 'a', encoding='utf-8') as f:
+            for (collection, document), fields in increments.items():
+                f.write(json.dumps({'c': collection, 'd': document, 'i': fields}, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+    
+    def _rewrite_journal(self, pending, increments):
+        # Replace the journal with only the writes that are still unflushed
+        temp_path = f"{self.journal_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            for (collection, document), (data, merge) in pending.items():
+                f.write(json.dumps({'c': collection, 'd': document, 'v': data, 'm': merge}, ensure_ascii=False, default=str) + '\n')
+            for (collection, document), fields in increments.items():
+                f.write(json.dumps({'c': collection, 'd': document, 'i': fields}, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.journal_path)
+    
+    def _read_journal(self):
+        """Returns the journaled writes and increments coalesced by document"""
+        pending = {}
+        increments = {}
+        try:
+            with open(self.journal_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A crash mid-append leaves at most one partial record
+                        print(f"Warning: Skipping corrupt journal record in {self.journal_path}")
+                        continue
+                    if 'i' in record:
+                        fields = increments.setdefault((record['c'], record['d']), {})
+                        for field, amount in record['i'].items():
+                            fields[field] = fields.get(field, 0) + amount
+                    else:
+                        coalesce_write(pending, (record['c'], record['d']), record['v'], record.get('m', False))
+        except FileNotFoundError:
+            pass
+        return pending, increments
+    
+    def _apply_write(self, collection, document, data, merge):
+        # Mirror a journaled write into the in-memory state
+        if collection == 'projects':
+            if data is None:
+                self.projects.pop(document, None)
+                self._hydrated.pop(document, None)
+            else:
+                project = Project.from_document(data)
+                # The journaled write is still to be stored on top of the version before it
+                project.version = max(data.get('version', 1) - 1, 0)
+                self.projects[document] = project
+                self._hydrated[document] = None
+            self._project_changed(document)
+            return
+        user_maps = {collection: key for key, collection in USER_MAPS.items()}
+        if collection == USER_MAPS['user_tasks']:
+            for field, value in (data or {}).items():
+                assignment = parse_assignment_field(field)
+                if assignment is not None:
+                    self._set_assignment(*assignment, bool(value))
+                elif isinstance(value, list):
+                    for project_name, task_id in decode_user_value('user_tasks', value):
+                        self._set_assignment(field, project_name, task_id, True)
+            return
+        if collection in user_maps:
+            key = user_maps[collection]
+            user_map = getattr(self, key)
+            for user_id, value in (data or {}).items():
+                if value is None:
+                    user_map.pop(user_id, None)
+                else:
+                    user_map[user_id] = decode_user_value(key, value)
+                if key == 'user_points':
+                    self._points_changed(user_id)
+            return
+        documents = {location: key for key, location in CONFIG_DOCUMENTS.items()}
+        key = documents.get((collection, document))
+        if key == 'forum_channel':
+            self.forum_channel_name = data.get('name', self.forum_channel_name)
+            self.forum_channel_id = data.get('id')
+        elif key:
+            setattr(self, key, data)
+    
+    async def replay_journal(self):
+        """Re-applies writes acknowledged before a crash and flushes them"""
+        pending, increments = await self._run_journal(self._read_journal)
+        if not pending and not increments:
+            return
+        for (collection, document), (data, merge) in pending.items():
+            self._apply_write(collection, document, data, merge)
+        # Unflushed awards are not in the loaded balances yet
+        for fields in increments.values():
+            for member_id, points in fields.items():
+                self.user_points[member_id] = self.user_points.get(member_id, 0) + points
+                self._points_changed(member_id)
+        async with self._save_lock:
+            for location, (data, merge) in self._pending_writes.items():
+                coalesce_write(pending, location, data, merge)
+            self._pending_writes = pending
+            self._merge_increments(increments)
+        print(f"Replayed {len(pending) + len(increments)} journaled write(s) from {self.journal_path}")
+        await self.flush()
+    
+    def _merge_increments(self, increments):
+        for location, fields in increments.items():
+            pending_fields = self._pending_increments.setdefault(location, {})
+            for field, amount in fields.items():
+                pending_fields[field] = pending_fields.get(field, 0) + amount
+    
+    async def flush(self):
+        """Writes the coalesced pending writes to storage"""
+        async with self._flush_lock:
+            async with self._save_lock:
+                if not self._pending_writes and not self._pending_increments:
+                    return
+                pending = self._pending_writes
+                increments = self._pending_increments
+                self._pending_writes = {}
+                self._pending_increments = {}
+            writes = [(collection, document, data, merge) for (collection, document), (data, merge) in pending.items()
+                      if not is_versioned_write(collection, data, merge)]
+            versioned = {document: data for (collection, document), (data, merge) in pending.items()
+                         if is_versioned_write(collection, data, merge)}
+            try:
+                if writes:
+                    await self._run_io(self.storage.commit, writes)
+                    writes = []
+                if versioned:
+                    await self._commit_projects(versioned)
+                    versioned = {}
+                if increments:
+                    await self._run_io(self.storage.increment, increments)
+            except Exception as e:
+                # Keep the older writes unless something newer replaced them
+                async with self._save_lock:
+                    remaining = {(collection, document): (data, merge) for collection, document, data, merge in writes}
+                    remaining.update({('projects', document): (data, False) for document, data in versioned.items()})
+                    if remaining:
+                        for location, (data, merge) in self._pending_writes.items():
+                            coalesce_write(remaining, location, data, merge)
+                        self._pending_writes = remaining
+                    self._merge_increments(increments)
+                print(f"Error flushing writes to {self.storage.name} storage: {e}")
+                return
+            # A crash between the commit and this rewrite would replay the
+            # flushed increments once more on the next start
+            async with self._save_lock:
+                await self._run_journal(self._rewrite_journal, dict(self._pending_writes), copy.deepcopy(self._pending_increments))
+    
+    def start_flusher(self):
+        """Starts the background flusher when write-behind mode is enabled"""
+        if self.write_behind and self._flusher_task is None:
+            self._flusher_task = asyncio.create_task(self.run_flusher())
+    
+    async def run_flusher(self):
+        """Background task that flushes write-behind writes every interval"""
+        while True:
+            await asyncio.sleep(WRITE_BEHIND_INTERVAL_MS / 1000)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Error in write-behind flusher: {e}")
+    
+    def start_listeners(self):
+        """Subscribes to storage snapshots so remote changes reach the cache"""
+        if self._watches:
+            return
+        if not self.storage.supports_listen:
+            print(f"Warning: Live sync is not available with the {self.storage.name} storage engine")
+            return
+        loop = asyncio.get_running_loop()
+        
+        def forward(apply):
+            # Snapshot callbacks run on a storage thread; state is only
+            # touched on the event loop
+            def callback(updates):
+                loop.call_soon_threadsafe(apply, updates)
+            return callback
+        
+        # Summaries only, like the startup load; changed task lists are fetched on next use
+        self._watches.append(self.storage.listen('projects', forward(self._apply_project_changes), PROJECT_SUMMARY_FIELDS + ['version']))
+        watched = {collection for collection, document in CONFIG_DOCUMENTS.values()}
+        watched.update(USER_MAPS.values())
+        for collection in sorted(watched):
+            self._watches.append(self.storage.listen(collection, forward(self._apply_document_changes)))
+    
+    def stop_listeners(self):
+        for watch in self._watches:
+            watch.unsubscribe()
+        self._watches = []
+    
+    def _has_local_change(self, location):
+        return location in self._pending_writes or location in self._pending_increments
+    
+    def _apply_project_changes(self, updates):
+        for change_type, collection, project_name, data in updates:
+            # Local edits that are not saved yet win; their save overwrites the remote copy
+            if project_name in self._dirty_projects or project_name in self._deleted_projects:
+                continue
+            if self._has_local_change((collection, project_name)):
+                continue
+            if change_type == 'REMOVED':
+                self.projects.pop(project_name, None)
+                self._hydrated.pop(project_name, None)
+            elif project_name in self._hydrated:
+                if data.get('version', 0) <= self.projects[project_name].version:
+                    # Our own write coming back, or nothing newer than our copy
+                    continue
+                # Only summaries are listened to, so the task list is dropped
+                # and fetched again by the next get_project
+                del self._hydrated[project_name]
+                self.projects[project_name] = Project.from_document(data).summary()
+            else:
+                self.projects[project_name] = Project.from_document(data).summary()
+            self._project_changed(project_name)
+    
+    def _apply_document_changes(self, updates):
+        documents = {location: key for key, location in CONFIG_DOCUMENTS.items()}
+        user_maps = {collection: key for key, collection in USER_MAPS.items()}
+        for change_type, collection, document, data in updates:
+            data = data if change_type != 'REMOVED' else {}
+            if (collection, document) in documents:
+                key = documents[(collection, document)]
+                if key in self._dirty_documents or self._has_local_change((collection, document)):
+                    continue
+                if key == 'forum_channel':
+                    self.forum_channel_name = data.get('name', "📋・projects")
+                    self.forum_channel_id = data.get('id')
+                elif change_type != 'REMOVED':
+                    setattr(self, key, data)
+            elif collection in user_maps and document.startswith('shard_'):
+                self._apply_user_shard(user_maps[collection], collection, document, data)
+    
+    def _apply_task_shard(self, collection, document, data):
+        pending = self._pending_writes.get((collection, document), (None, True))[0] or {}
+        stored = set()
+        for field, value in data.items():
+            assignment = parse_assignment_field(field)
+            if assignment is not None and value:
+                stored.add(assignment)
+        indexed = {(user_id, project_name, task_id) for user_id, assignments in self.user_tasks.items()
+                   if user_shard(user_id) == document for project_name, task_id in assignments}
+        for assignment in indexed ^ stored:
+            # Entries changed here and not stored yet win
+            if assignment in self._dirty_assignments or assignment_field(*assignment) in pending:
+                continue
+            self._set_assignment(*assignment, assignment in stored)
+    
+    def _apply_user_shard(self, key, collection, document, data):
+        if key == 'user_tasks':
+            self._apply_task_shard(collection, document, data)
+            return
+        user_map = getattr(self, key)
+        pending = self._pending_writes.get((collection, document), (None, True))[0] or {}
+        increments = self._pending_increments.get((collection, document), {})
+        # Users that belong to this shard but are gone remotely were removed elsewhere
+        for user_id in [user_id for user_id in user_map if user_shard(user_id) == document and user_id not in data]:
+            if (key, user_id) not in self._dirty_users and user_id not in pending and user_id not in increments:
+                del user_map[user_id]
+                if key == 'user_points':
+                    self._points_changed(user_id)
+        for user_id, value in data.items():
+            if (key, user_id) in self._dirty_users or user_id in pending:
+                continue
+            # Unflushed awards are on top of whatever storage has
+            user_map[user_id] = value + increments.get(user_id, 0) if user_id in increments else decode_user_value(key, value)
+            if key == 'user_points':
+                self._points_changed(user_id)
     
     def has_permission(self, user_roles, permission_type):
         """Check if user has permission for a specific action"""
         required_roles = self.permissions.get(permission_type, [])
         return any(role in user_roles for role in required_roles)
 
-# Initialize project manager
-pm = ProjectManager()
+class GuildRegistry:
+    """ProjectManagers partitioned by guild, each loaded on first use.
+
+    A guild's data lives under guilds/<guild id>/ in storage, apart from
+    LEGACY_GUILD_ID, which keeps using the root-level collections. Partitions
+    share the storage engine and its I/O threads; each has its own journal.
+    """
+    def __init__(self, storage=None):
+        self.storage = storage or create_storage()
+        self._io_executor = ThreadPoolExecutor(max_workers=STORAGE_MAX_IN_FLIGHT, thread_name_prefix='storage')
+        self._journal_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='journal')
+        self._managers = {}
+        self._loading = {}
+    
+    def loaded(self):
+        """Returns the ProjectManagers of the guilds loaded so far"""
+        return list(self._managers.values())
+    
+    def journal_path(self, guild_id):
+        return JOURNAL_PATH if guild_id == LEGACY_GUILD_ID else f"{JOURNAL_PATH}.{guild_id}"
+    
+    async def run_io(self, func, *args):
+        """Runs a blocking storage call on the shared I/O threads"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._io_executor, functools.partial(func, *args))
+    
+    async def get(self, guild_id):
+        """Returns a guild's ProjectManager, loading it on first use"""
+        manager = self._managers.get(guild_id)
+        if manager is not None:
+            return manager
+        # Concurrent first uses of a guild share one load
+        loading = self._loading.get(guild_id)
+        if loading is None:
+            loading = asyncio.ensure_future(self._load(guild_id))
+            self._loading[guild_id] = loading
+        return await asyncio.shield(loading)
+    
+    async def _load(self, guild_id):
+        try:
+            storage = self.storage if guild_id == LEGACY_GUILD_ID else PartitionStorage(self.storage, f"guilds/{guild_id}/")
+            manager = ProjectManager(
+                storage,
+                guild_id=guild_id,
+                journal_path=self.journal_path(guild_id),
+                io_executor=self._io_executor,
+                journal_executor=self._journal_executor
+            )
+            # Raises if storage can't be read, so a manager holding defaults is never cached
+            await manager.load()
+            # Writes acknowledged before a crash are replayed even if write-behind was turned off since
+            await manager.replay_journal()
+            manager.start_flusher()
+            if LIVE_SYNC:
+                manager.start_listeners()
+            self._managers[guild_id] = manager
+            return manager
+        finally:
+            del self._loading[guild_id]
+    
+    async def recover(self):
+        """Loads the guilds that have journaled writes left over from a crash"""
+        directory = os.path.dirname(os.path.abspath(JOURNAL_PATH))
+        base_name = os.path.basename(JOURNAL_PATH)
+        try:
+            file_names = os.listdir(directory)
+        except OSError:
+            return
+        for file_name in file_names:
+            if file_name == base_name:
+                if LEGACY_GUILD_ID is None:
+                    print(f"Warning: {JOURNAL_PATH} holds root-level writes; set CREWMATE_LEGACY_GUILD_ID to replay them")
+                    continue
+                guild_id = LEGACY_GUILD_ID
+            elif file_name.startswith(f"{base_name}.") and file_name[len(base_name) + 1:].isdigit():
+                guild_id = int(file_name[len(base_name) + 1:])
+            else:
+                continue
+            if os.path.getsize(os.path.join(directory, file_name)):
+                try:
+                    await self.get(guild_id)
+                except Exception:
+                    # Retried on the guild's next use; the journal is kept until then
+                    continue
+
+# Initialize the per-guild project managers
+guilds = GuildRegistry()
+
+async def get_manager(ctx):
+    """Returns the ProjectManager of the guild a command was used in"""
+    guild = ctx.guild
+    if guild is None:
+        # In DMs, use the one server the user shares with the bot
+        mutual_guilds = ctx.author.mutual_guilds
+        if len(mutual_guilds) != 1:
+            await reply(ctx, "❌ Please use this command in a server channel.")
+            return None
+        guild = mutual_guilds[0]
+    try:
+        return await guilds.get(guild.id)
+    except Exception:
+        # Not cached, so the next command tries loading again
+        await reply(ctx, "❌ Could not load this server's project data. Please try again later.")
+        return None
+
+def guilds_of(pm):
+    """Returns the guild a ProjectManager belongs to, as a list for lookups"""
+    guild = bot.get_guild(pm.guild_id)
+    return [guild] if guild else []
+
+outbound = Dispatcher(OUTBOUND_CONCURRENCY, OUTBOUND_BUCKET_CONCURRENCY, OUTBOUND_SLOW_WAIT_MS / 1000)
+
+async def reply(ctx, *args, **kwargs):
+    """Sends a command reply ahead of background traffic"""
+    return await outbound.submit(Priority.INTERACTIVE, ('channel', ctx.channel.id), lambda: ctx.send(*args, **kwargs))
+
+async def dm(user, *args, **kwargs):
+    """Sends a direct message of an interactive flow"""
+    return await outbound.submit(Priority.DM_FLOW, ('dm', user.id), lambda: user.send(*args, **kwargs))
+
+async def forum_request(channel, factory):
+    """Runs a forum post or thread request behind replies and DM flows"""
+    return await outbound.submit(Priority.FORUM_SYNC, ('channel', channel.id), factory)
+
+class ConversationRouter:
+    """Replies awaited by interactive flows, indexed by (channel id, author id).
+
+    Each incoming message is routed with one dict lookup to at most one
+    waiting flow, instead of being run through the check of every pending
+    wait_for. Direct messages use channel id 0, so a flow waiting on a user's
+    DMs gets their reply whichever DM channel object it arrives on.
+    """
+    def __init__(self):
+        self._waiters = {}  # key -> deque of futures, oldest first
+    
+    @staticmethod
+    def key(channel, author):
+        if channel.type == discord.ChannelType.private:
+            return ConversationRouter.dm_key(author)
+        return (channel.id, author.id)
+    
+    @staticmethod
+    def dm_key(user):
+        return (0, user.id)
+    
+    async def wait(self, key, timeout):
+        """Returns the next message for a key; raises asyncio.TimeoutError"""
+        future = asyncio.get_running_loop().create_future()
+        waiters = self._waiters.setdefault(key, deque())
+        waiters.append(future)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            if not future.done():
+                future.cancel()
+            waiters = self._waiters.get(key)
+            if waiters is not None:
+                try:
+                    waiters.remove(future)
+                except ValueError:
+                    pass
+                if not waiters:
+                    del self._waiters[key]
+    
+    def dispatch(self, message):
+        """Hands a message to the oldest flow waiting on its channel and author"""
+        waiters = self._waiters.get(self.key(message.channel, message.author))
+        while waiters:
+            future = waiters.popleft()
+            if not future.done():
+                future.set_result(message)
+                return True
+        return False
+
+conversations = ConversationRouter()
+
+def resolve_project_name(pm, project_name):
+    """Returns the stored name a typed project name refers to, and close names if there is none"""
+    if project_name in pm.projects:
+        return project_name, []
+    matches = pm.project_fuzzy.search(project_name)
+    # A name that only differs in case is taken to be the one meant
+    same_name = [name for name in matches if name.lower() == project_name.strip().lower()]
+    if len(same_name) == 1:
+        return same_name[0], []
+    return project_name, matches
+
+def add_project_suggestions(embed, suggestions):
+    if suggestions:
+        embed.add_field(
+            name="💡 Did you mean?",
+            value="\n".join(f"• `{name}`" for name in suggestions),
+            inline=False
+        )
+
+command_fuzzy = FuzzyIndex()
+
+def command_suggestions(command_name):
+    """Returns the names of commands close to a mistyped one"""
+    if len(command_fuzzy) != len(bot.all_commands):
+        command_fuzzy.rebuild(bot.all_commands)
+    return command_fuzzy.search(command_name)
+
+# Forum threads fetched by id; archived threads are not kept in the client's cache
+resolved_threads = {}
+# (guild id, project name) of projects whose thread was not found, so the
+# forum archive is not scanned again on every update; cleared when a post is created
+missing_threads = set()
+
+def find_forum_channel(pm):
+    """Returns the configured forum channel by its stored id, falling back to its name"""
+    if pm.forum_channel_id:
+        channel = bot.get_channel(pm.forum_channel_id)
+        if channel is not None and channel.type == discord.ChannelType.forum:
+            return channel
+    for guild in guilds_of(pm):
+        channel = discord.utils.get(guild.channels, name=pm.forum_channel_name)
+        if channel and channel.type == discord.ChannelType.forum:
+            # Remember the id so later lookups skip the scan
+            pm.forum_channel_id = channel.id
+            pm.mark_dirty('forum_channel')
+            return channel
+    return None
+
+async def store_project_thread(pm, project_name, thread_id, message_id):
+    """Records a project's forum thread on its latest copy"""
+    # The caller's copy may be stale after the REST calls that found the
+    # thread; saving it would undo changes made in the meantime
+    async with pm.project_lock(project_name):
+        project = await pm.get_project(project_name)
+        if project is None:
+            return
+        project.thread_id = thread_id
+        project.message_id = message_id
+        pm.mark_project_dirty(project_name, project)
+        await pm.save()
+
+async def find_project_thread(pm, project_name, project, store=True):
+    """Returns a project's forum thread by its stored id, falling back to its name.
+
+    A thread found by name is stored on the project unless `store` is False,
+    which callers already holding the project's lock must pass.
+    """
+    if project.thread_id:
+        thread = bot.get_channel(project.thread_id) or resolved_threads.get(project.thread_id)
+        if thread is None:
+            try:
+                thread = await bot.fetch_channel(project.thread_id)
+                resolved_threads[thread.id] = thread
+            except discord.NotFound:
+                thread = None
+            except discord.HTTPException as e:
+                print(f"Error fetching forum thread for project {project_name}: {str(e)}")
+                return None
+        if thread is not None:
+            return thread
+    
+    # Projects created before thread ids were stored are found by name
+    forum_channel = find_forum_channel(pm)
+    if not forum_channel:
+        return None
+    thread = discord.utils.get(forum_channel.threads, name=f"Project: {project_name}")
+    if not thread and (pm.guild_id, project_name) in missing_threads:
+        return None
+    if not thread:
+        async for archived_thread in forum_channel.archived_threads(limit=None):
+            if archived_thread.name == f"Project: {project_name}":
+                thread = archived_thread
+                break
+    if not thread:
+        missing_threads.add((pm.guild_id, project_name))
+        return None
+    resolved_threads[thread.id] = thread
+    if store and project_name in pm.projects:
+        # A forum post's starter message shares the thread's id
+        await store_project_thread(pm, project_name, thread.id, project.message_id or thread.id)
+    return thread
+
+async def log_stats():
+    """Prints the outbound queue and project lock metrics every STATS_LOG_INTERVAL_S seconds"""
+    while True:
+        await asyncio.sleep(STATS_LOG_INTERVAL_S)
+        try:
+            stats = outbound.stats()
+            classes = ", ".join(
+                f"{name} {stats[name]['sent']} sent/{stats[name]['queued']} queued (avg {stats[name]['avg_wait_ms']}ms, max {stats[name]['max_wait_ms']}ms)"
+                for name in Priority.__members__
+            )
+            print(f"Outbound queue: {stats['in_flight']} in flight, {stats['busy_buckets']} busy bucket(s); {classes}")
+            for pm in guilds.loaded():
+                locks = pm.lock_stats
+                if not locks['acquired']:
+                    continue
+                average = locks['wait_ms_total'] / locks['acquired']
+                print(f"Project locks in guild {pm.guild_id}: {locks['acquired']} acquired, {locks['contended']} contended "
+                      f"(avg wait {average:.1f}ms, max {locks['wait_ms_max']:.1f}ms), {len(pm._project_locks)} held")
+        except Exception as e:
+            print(f"Error logging stats: {e}")
+
+stats_task = None
+
+@bot.event
+async def setup_hook():
+    # Guilds load on first use; those with unflushed journaled writes load now
+    await guilds.recover()
+    # Interactive flows in progress when the bot stopped carry on where they were
+    await project_flows.recover()
+    global stats_task
+    if STATS_LOG_INTERVAL_S > 0 and stats_task is None:
+        stats_task = asyncio.create_task(log_stats())
+    if SYNC_COMMANDS:
+        try:
+            await sync_commands()
+        except Exception as e:
+            print(f"Warning: Could not sync slash commands: {e}")
+
+async def sync_commands():
+    """Publishes the slash command tree to Discord"""
+    synced = await bot.tree.sync()
+    print(f"Synced {len(synced)} slash command(s)")
+    return synced
+
+@bot.command(name='synccommands', hidden=True)
+@commands.is_owner()
+async def sync_commands_command(ctx):
+    """Publishes the slash commands after they changed (bot owner only)"""
+    try:
+        synced = await sync_commands()
+    except Exception as e:
+        await reply(ctx, f"❌ Could not sync slash commands: {str(e)}")
+        return
+    await reply(ctx, f"✅ Synced {len(synced)} slash command(s).")
 
 @bot.event
 async def on_ready():
@@ -109,6 +1388,14 @@ async def on_ready():
     else:
         print("Bot is online but user information is not available.")
 
+@bot.listen('on_message')
+async def route_conversation_reply(message):
+    # Commands are still processed as usual by the default handler
+    if conversations.dispatch(message):
+        return
+    if message.channel.type == discord.ChannelType.private:
+        project_flows.dispatch(message.author.id, message.content)
+
 @bot.event
 async def on_member_join(member):
     """Greets new members and assigns them the member role"""
@@ -150,12 +1437,12 @@ async def on_member_join(member):
                     # Try to send to a general channel or the first available text channel
                     general_channel = discord.utils.get(member.guild.text_channels, name="general")
                     if general_channel:
-                        await general_channel.send(embed=embed)
+                        await outbound.submit(Priority.WELCOME, ('channel', general_channel.id), lambda: general_channel.send(embed=embed))
                     else:
                         # Send to the first available text channel
                         for channel in member.guild.text_channels:
                             if channel.permissions_for(member.guild.me).send_messages:
-                                await channel.send(embed=embed)
+                                await outbound.submit(Priority.WELCOME, ('channel', channel.id), lambda: channel.send(embed=embed))
                                 break
                 else:
                     print(f"Warning: Cannot assign Member role to {member.name} - role is higher than bot's role")
@@ -200,7 +1487,7 @@ async def help_command(ctx):
     # Project Participation
     embed.add_field(
         name="🎯 **PROJECT PARTICIPATION**",
-        value="Commands for joining and working on projects:\n• `!project <name> assign` - Assign yourself to tasks (interactive)\n• `!completed project <name>` - Mark tasks as completed (interactive)",
+        value="Commands for joining and working on projects:\n• `!project <name> assign` - Assign yourself to tasks (interactive)\n• `!completed project <name>` - Mark tasks as completed (interactive)\n• `!mytasks` - Shows your assigned tasks across all projects",
         inline=False
     )
     
@@ -214,7 +1501,7 @@ async def help_command(ctx):
     # Rewards & Shop
     embed.add_field(
         name="🏆 **REWARDS & SHOP**",
-        value="Commands for managing points and purchasing items:\n• `!rewards` - Shows your current points and tasks\n• `!shop` - Shows available items (starts empty)\n• `!shop add <item> <price>` - Adds items to shop (Admin only)",
+        value="Commands for managing points and purchasing items:\n• `!rewards` - Shows your current points and tasks\n• `!leaderboard [page]` - Shows the points leaderboard\n• `!rank [@user]` - Shows your leaderboard position\n• `!shop` - Shows available items (starts empty)\n• `!shop add <item> <price>` - Adds items to shop (Admin only)",
         inline=False
     )
     
@@ -227,12 +1514,12 @@ async def help_command(ctx):
     
     embed.add_field(
         name="💡 **Tips**",
-        value="• Project names are case-sensitive\n• Tasks can contain spaces and special characters\n• Nicknames are limited to 32 characters\n• Use `!commands` anytime to see this help message",
+        value="• Project names match regardless of case, and close misspellings get suggestions\n• Tasks can contain spaces and special characters\n• Nicknames are limited to 32 characters\n• Use `!commands` anytime to see this help message",
         inline=False
     )
     
     embed.set_footer(text="Use these commands to manage your projects effectively!")
-    await ctx.send(embed=embed)
+    await reply(ctx, embed=embed)
 
 @bot.command(name='roles')
 async def show_roles(ctx):
@@ -261,19 +1548,22 @@ async def show_roles(ctx):
             inline=False
         )
         
-        await ctx.send(embed=embed)
+        await reply(ctx, embed=embed)
     except Exception as e:
-        await ctx.send(f"❌ Error showing roles: {str(e)}")
+        await reply(ctx, f"❌ Error showing roles: {str(e)}")
 
 @bot.command(name='role')
 async def role_command(ctx, action, *, role_name):
     """Assigns or removes a role from the user"""
+    pm = await get_manager(ctx)
+    if pm is None:
+        return
     if not action or action.lower() not in ['assign', 'remove']:
-        await ctx.send("❌ Invalid action. Use `!role assign <role_name>` or `!role remove <role_name>`")
+        await reply(ctx, "❌ Invalid action. Use `!role assign <role_name>` or `!role remove <role_name>`")
         return
     
     if not role_name or role_name.strip() == "":
-        await ctx.send("❌ Please specify a role name!")
+        await reply(ctx, "❌ Please specify a role name!")
         return
     
     try:
@@ -281,50 +1571,51 @@ async def role_command(ctx, action, *, role_name):
         role = discord.utils.get(ctx.guild.roles, name=role_name.strip())
         
         if not role:
-            await ctx.send(f"❌ Role '{role_name}' not found!")
+            await reply(ctx, f"❌ Role '{role_name}' not found!")
             return
         
         if action.lower() == 'assign':
             # Check if user already has the role
             if role in ctx.author.roles:
-                await ctx.send(f"❌ You already have the role '{role_name}'!")
+                await reply(ctx, f"❌ You already have the role '{role_name}'!")
                 return
             
             # Check if bot has permission to manage roles
             if not ctx.guild.me.guild_permissions.manage_roles:
-                await ctx.send("❌ I don't have permission to manage roles!")
+                await reply(ctx, "❌ I don't have permission to manage roles!")
                 return
             
             # Check if the role is manageable (not higher than bot's role)
             if role >= ctx.guild.me.top_role:
-                await ctx.send("❌ I can't assign that role because it's higher than my highest role!")
+                await reply(ctx, "❌ I can't assign that role because it's higher than my highest role!")
                 return
             
             await ctx.author.add_roles(role)
             pm.user_roles[str(ctx.author.id)] = role_name
-            pm.save_data()
+            pm.mark_user_dirty('user_roles', str(ctx.author.id))
+            await pm.save()
             
             embed = discord.Embed(
                 title="✅ Role Assigned!",
                 description=f"You have been assigned the role: **{role_name}**",
                 color=0x00ff00
             )
-            await ctx.send(embed=embed)
+            await reply(ctx, embed=embed)
             
         elif action.lower() == 'remove':
             # Check if user has the role
             if role not in ctx.author.roles:
-                await ctx.send(f"❌ You don't have the role '{role_name}'!")
+                await reply(ctx, f"❌ You don't have the role '{role_name}'!")
                 return
             
             # Check if bot has permission to manage roles
             if not ctx.guild.me.guild_permissions.manage_roles:
-                await ctx.send("❌ I don't have permission to manage roles!")
+                await reply(ctx, "❌ I don't have permission to manage roles!")
                 return
             
             # Check if the role is manageable (not higher than bot's role)
             if role >= ctx.guild.me.top_role:
-                await ctx.send("❌ I can't remove that role because it's higher than my highest role!")
+                await reply(ctx, "❌ I can't remove that role because it's higher than my highest role!")
                 return
             
             await ctx.author.remove_roles(role)
@@ -333,35 +1624,36 @@ async def role_command(ctx, action, *, role_name):
             user_id = str(ctx.author.id)
             if user_id in pm.user_roles and pm.user_roles[user_id] == role_name:
                 del pm.user_roles[user_id]
-                pm.save_data()
+                pm.mark_user_dirty('user_roles', user_id)
+                await pm.save()
             
             embed = discord.Embed(
                 title="✅ Role Removed!",
                 description=f"The role **{role_name}** has been removed from you",
                 color=0xff6b6b
             )
-            await ctx.send(embed=embed)
+            await reply(ctx, embed=embed)
             
     except discord.Forbidden:
-        await ctx.send("❌ I don't have permission to manage that role!")
+        await reply(ctx, "❌ I don't have permission to manage that role!")
     except Exception as e:
-        await ctx.send(f"❌ Error managing role: {str(e)}")
+        await reply(ctx, f"❌ Error managing role: {str(e)}")
 
 @bot.command(name='nickname')
 async def change_nickname(ctx, name, *, profession):
     """Changes the user's nickname to include their name and profession"""
     if not name or name.strip() == "":
-        await ctx.send("❌ Please provide your name! Usage: `!nickname <name> <profession>`")
+        await reply(ctx, "❌ Please provide your name! Usage: `!nickname <name> <profession>`")
         return
     
     if not profession or profession.strip() == "":
-        await ctx.send("❌ Please provide your profession! Usage: `!nickname <name> <profession>`")
+        await reply(ctx, "❌ Please provide your profession! Usage: `!nickname <name> <profession>`")
         return
     
     try:
         # Check if bot has permission to manage nicknames
         if not ctx.guild.me.guild_permissions.manage_nicknames:
-            await ctx.send("❌ I don't have permission to change nicknames!")
+            await reply(ctx, "❌ I don't have permission to change nicknames!")
             return
         
         # Create the new nickname
@@ -378,7 +1670,7 @@ async def change_nickname(ctx, name, *, profession):
                 # If name is too long, just use the name
                 new_nickname = name.strip()[:32]
         
-        await ctx.author.edit(nick=new_nickname)
+        await outbound.submit(Priority.INTERACTIVE, ('guild', ctx.guild.id), lambda: ctx.author.edit(nick=new_nickname))
         
         embed = discord.Embed(
             title="✅ Nickname Updated!",
@@ -388,16 +1680,19 @@ async def change_nickname(ctx, name, *, profession):
         embed.add_field(name="Name", value=name.strip(), inline=True)
         embed.add_field(name="Profession", value=profession.strip(), inline=True)
         
-        await ctx.send(embed=embed)
+        await reply(ctx, embed=embed)
         
     except discord.Forbidden:
-        await ctx.send("❌ I don't have permission to change your nickname!")
+        await reply(ctx, "❌ I don't have permission to change your nickname!")
     except Exception as e:
-        await ctx.send(f"❌ Error changing nickname: {str(e)}")
+        await reply(ctx, f"❌ Error changing nickname: {str(e)}")
 
 @bot.command(name='projects')
 async def show_projects(ctx):
     """Shows all ongoing projects"""
+    pm = await get_manager(ctx)
+    if pm is None:
+        return
     try:
         if not pm.projects:
             embed = discord.Embed(
@@ -410,7 +1705,7 @@ async def show_projects(ctx):
                 value="Use `!new project` to create a new project with tasks and rewards.",
                 inline=False
             )
-            await ctx.send(embed=embed)
+            await reply(ctx, embed=embed)
             return
         
         embed = discord.Embed(
@@ -419,13 +1714,10 @@ async def show_projects(ctx):
             color=0x0099ff
         )
         
-        for project_name, project_data in pm.projects.items():
-            status = project_data.get('status', 'In Progress')
-            progress = project_data.get('progress', 0)
-            task_count = len(project_data.get('tasks', []))
+        for project_name, project in pm.projects.items():
             embed.add_field(
                 name=f"📁 {project_name}",
-                value=f"Status: {status}\nProgress: {progress}%\nTasks: {task_count}",
+                value=f"Status: {project.status}\nProgress: {project.progress}%\nTasks: {project.task_count}",
                 inline=True
             )
         
@@ -435,21 +1727,21 @@ async def show_projects(ctx):
             inline=False
         )
         
-        await ctx.send(embed=embed)
+        await reply(ctx, embed=embed)
     except Exception as e:
-        await ctx.send(f"❌ Error showing projects: {str(e)}")
+        await reply(ctx, f"❌ Error showing projects: {str(e)}")
 
 @bot.command(name='project')
 async def project_command(ctx, *, args=None):
     """Handles project-related commands"""
     if not args:
-        await ctx.send("❌ Please specify a project name and action! Usage: `!project <name> <action>`")
+        await reply(ctx, "❌ Please specify a project name and action! Usage: `!project <name> <action>`")
         return
     
     # Parse the arguments to handle project names with spaces
     parts = args.split()
     if len(parts) < 2:
-        await ctx.send("❌ Please specify both project name and action! Usage: `!project <name> <action>`")
+        await reply(ctx, "❌ Please specify both project name and action! Usage: `!project <name> <action>`")
         return
     
     # Find the action (last word) and project name (everything before it)
@@ -458,7 +1750,7 @@ async def project_command(ctx, *, args=None):
     
     # Validate project name (basic validation)
     if len(project_name) > 50:
-        await ctx.send("❌ Project name is too long! Please use a shorter name.")
+        await reply(ctx, "❌ Project name is too long! Please use a shorter name.")
         return
     
     try:
@@ -470,102 +1762,117 @@ async def project_command(ctx, *, args=None):
             # Interactive task assignment
             await assign_task_interactive(ctx, project_name)
         else:
-            await ctx.send("❌ Invalid action. Use: dashboard, details, or assign")
+            await reply(ctx, "❌ Invalid action. Use: dashboard, details, or assign")
     except Exception as e:
-        await ctx.send(f"❌ Error processing project command: {str(e)}")
+        await reply(ctx, f"❌ Error processing project command: {str(e)}")
 
 async def show_project_dashboard(ctx, project_name):
     """Shows project dashboard"""
+    pm = await get_manager(ctx)
+    if pm is None:
+        return
+    project_name, suggestions = resolve_project_name(pm, project_name)
     if project_name not in pm.projects:
         embed = discord.Embed(
             title="❌ Project Not Found",
             description=f"Project '{project_name}' not found!",
             color=0xff6b6b
         )
+        add_project_suggestions(embed, suggestions)
         embed.add_field(
             name="Available Projects",
             value="Use `!projects` to see all available projects, or `!new project` to create a new one.",
             inline=False
         )
-        await ctx.send(embed=embed)
+        await reply(ctx, embed=embed)
         return
     
     try:
-        project = pm.projects[project_name]
+        project = await pm.get_project(project_name)
         
         embed = discord.Embed(
             title=f"📊 {project_name} Dashboard",
-            description=project.get('description', 'No description available')[:2000],  # Limit description length
+            description=(project.description or 'No description available')[:2000],  # Limit description length
             color=0x00ff00
         )
         
-        embed.add_field(name="Status", value=project.get('status', 'In Progress'), inline=True)
-        embed.add_field(name="Progress", value=f"{project.get('progress', 0)}%", inline=True)
-        embed.add_field(name="Created", value=project.get('created', 'Unknown'), inline=True)
+        embed.add_field(name="Status", value=project.status, inline=True)
+        embed.add_field(name="Progress", value=f"{project.progress}%", inline=True)
+        embed.add_field(name="Created", value=project.created or 'Unknown', inline=True)
         
-        tasks = project.get('tasks', [])
+        tasks = project.tasks
         if tasks:
-            task_text = "\n".join([f"• {task}" for task in tasks[:5]])
+            task_text = "\n".join([f"• {task.description}" for task in tasks[:5]])
             if len(tasks) > 5:
                 task_text += f"\n... and {len(tasks) - 5} more tasks"
             embed.add_field(name="Recent Tasks", value=task_text[:1024], inline=False)  # Limit field length
         
-        await ctx.send(embed=embed)
+        await reply(ctx, embed=embed)
     except Exception as e:
-        await ctx.send(f"❌ Error showing project dashboard: {str(e)}")
+        await reply(ctx, f"❌ Error showing project dashboard: {str(e)}")
 
 async def show_project_details(ctx, project_name):
     """Shows detailed project information"""
+    pm = await get_manager(ctx)
+    if pm is None:
+        return
+    project_name, suggestions = resolve_project_name(pm, project_name)
     if project_name not in pm.projects:
         embed = discord.Embed(
             title="❌ Project Not Found",
             description=f"Project '{project_name}' not found!",
             color=0xff6b6b
         )
+        add_project_suggestions(embed, suggestions)
         embed.add_field(
             name="Available Projects",
             value="Use `!projects` to see all available projects, or `!new project` to create a new one.",
             inline=False
         )
-        await ctx.send(embed=embed)
+        await reply(ctx, embed=embed)
         return
     
     try:
-        project = pm.projects[project_name]
+        project = await pm.get_project(project_name)
         
         embed = discord.Embed(
             title=f"📋 {project_name} Details",
-            description=project.get('description', 'No description available')[:2000],  # Limit description length
+            description=(project.description or 'No description available')[:2000],  # Limit description length
             color=0x0099ff
         )
         
-        embed.add_field(name="Status", value=project.get('status', 'In Progress'), inline=True)
-        embed.add_field(name="Progress", value=f"{project.get('progress', 0)}%", inline=True)
-        embed.add_field(name="Created", value=project.get('created', 'Unknown'), inline=True)
+        embed.add_field(name="Status", value=project.status, inline=True)
+        embed.add_field(name="Progress", value=f"{project.progress}%", inline=True)
+        embed.add_field(name="Created", value=project.created or 'Unknown', inline=True)
         
-        tasks = project.get('tasks', [])
+        tasks = project.tasks
         if tasks:
-            task_text = "\n".join([f"• {task}" for task in tasks])
+            task_text = "\n".join([f"• {task.description}" for task in tasks])
             embed.add_field(name="All Tasks", value=task_text[:1024], inline=False)
         
-        members = project.get('members', [])
+        members = project.members
         if members:
             member_text = "\n".join([f"• {member}" for member in members])
             embed.add_field(name="Team Members", value=member_text[:1024], inline=False)  # Limit field length
         
-        await ctx.send(embed=embed)
+        await reply(ctx, embed=embed)
     except Exception as e:
-        await ctx.send(f"❌ Error showing project details: {str(e)}")
+        await reply(ctx, f"❌ Error showing project details: {str(e)}")
 
 async def assign_task_interactive(ctx, project_name):
     """Interactive task assignment process"""
+    pm = await get_manager(ctx)
+    if pm is None:
+        return
     try:
+        project_name, suggestions = resolve_project_name(pm, project_name)
         if project_name not in pm.projects:
             embed = discord.Embed(
                 title="❌ Project Not Found",
                 description=f"Project '{project_name}' not found!",
                 color=0xff6b6b
             )
+            add_project_suggestions(embed, suggestions)
             embed.add_field(
                 name="How to create a project",
                 value="Use `!new project` to create a new project with tasks, then use `!project <name> assign` to assign yourself to tasks.",
@@ -576,13 +1883,13 @@ async def assign_task_interactive(ctx, project_name):
                 value="Use `!projects` to see all available projects.",
                 inline=False
             )
-            await ctx.send(embed=embed)
+            await reply(ctx, embed=embed)
             return
         
-        project = pm.projects[project_name]
+        project = await pm.get_project(project_name)
         
         # Check if project has the new task structure
-        if not project.get('tasks') or not isinstance(project['tasks'], list):
+        if not project.tasks:
             embed = discord.Embed(
                 title="❌ Invalid Project Structure",
                 description=f"Project '{project_name}' doesn't have predefined tasks.",
@@ -593,18 +1900,11 @@ async def assign_task_interactive(ctx, project_name):
                 value="Use `!new project` to create a new project with proper task structure.",
                 inline=False
             )
-            await ctx.send(embed=embed)
+            await reply(ctx, embed=embed)
             return
         
         # Find available tasks (not completed and not full)
-        available_tasks = []
-        for i, task in enumerate(project['tasks'], 1):
-            if isinstance(task, dict) and not task.get('completed', False):
-                member_count = len(task.get('assigned_members', []))
-                if member_count < task['max_members']:
-                    available_tasks.append((i, task))
-        
-        if not available_tasks:
+        if not project.has_open_tasks:
             embed = discord.Embed(
                 title="❌ No Available Tasks",
                 description=f"No tasks available for assignment in project '{project_name}'.",
@@ -615,7 +1915,7 @@ async def assign_task_interactive(ctx, project_name):
                 value="All tasks are either completed or have reached their maximum member limit.",
                 inline=False
             )
-            await ctx.send(embed=embed)
+            await reply(ctx, embed=embed)
             return
         
         # Show available tasks
@@ -625,107 +1925,106 @@ async def assign_task_interactive(ctx, project_name):
             color=0x0099ff
         )
         
+        available_tasks = project.open_tasks()
         task_list = []
-        for task_num, task in available_tasks:
-            member_count = len(task.get('assigned_members', []))
-            task_list.append(f"{task_num}. **{task['description']}** (Reward: {task['reward_points']} points, Members: {member_count}/{task['max_members']})")
+        for task_num, task in enumerate(available_tasks, 1):
+            task_list.append(f"{task_num}. **{task.description}** (Reward: {task.reward_points} points, Members: {task.member_count}/{task.max_members})")
         
         embed.add_field(name="Available Tasks", value="\n".join(task_list), inline=False)
         embed.add_field(name="Instructions", value="Type the number of the task you want to work on, or 'exit' to cancel.", inline=False)
         
-        await ctx.send(embed=embed)
+        await reply(ctx, embed=embed)
         
         # Wait for user response
-        def check(m):
-            return m.author == ctx.author and m.channel == ctx.channel
+        reply_key = ConversationRouter.key(ctx.channel, ctx.author)
         
         try:
-            response = await bot.wait_for('message', timeout=60.0, check=check)
+            response = await conversations.wait(reply_key, 60.0)
             choice = response.content.strip().lower()
             
             if choice == 'exit':
-                await ctx.send("❌ Task assignment cancelled.")
+                await reply(ctx, "❌ Task assignment cancelled.")
                 return
             
             try:
                 task_index = int(choice) - 1  # Convert to 0-based index
-                if task_index < 0 or task_index >= len(project['tasks']):
-                    await ctx.send("❌ Invalid task number! Please try again.")
-                    return
-                
-                # Find the selected task
-                selected_task = None
-                for i, task in enumerate(project['tasks']):
-                    if isinstance(task, dict) and not task.get('completed', False):
-                        member_count = len(task.get('assigned_members', []))
-                        if member_count < task['max_members'] and i == task_index:
-                            selected_task = task
-                            break
-                
-                if not selected_task:
-                    await ctx.send("❌ Invalid task selection! Please try again.")
+                if task_index < 0 or task_index >= len(available_tasks):
+                    await reply(ctx, "❌ Invalid task number! Please try again.")
                     return
                 
-                # Check if user is already assigned to this task
-                user_id = str(ctx.author.id)
-                if user_id in selected_task.get('assigned_members', []):
-                    await ctx.send(f"❌ You are already assigned to task '{selected_task['description']}'!")
-                    return
+                user_id = ctx.author.id
+                error = None
+                async with pm.project_lock(project_name):
+                    # Others may have taken the last slot or changed the project while we waited
+                    project = await pm.get_project(project_name)
+                    selected_task = project.get_task(available_tasks[task_index].id) if project is not None and project.tasks is not None else None
+                    
+                    if project is None:
+                        error = f"❌ Project '{project_name}' no longer exists."
+                    elif not selected_task or selected_task.completed:
+                        error = "❌ Invalid task selection! Please try again."
+                    # Check if user is already assigned to this task
+                    elif selected_task.is_assigned(user_id):
+                        error = f"❌ You are already assigned to task '{selected_task.description}'!"
+                    # Check if task has reached maximum members
+                    elif selected_task.member_count >= selected_task.max_members:
+                        error = f"❌ Task '{selected_task.description}' has reached its maximum number of members ({selected_task.max_members})!"
+                    else:
+                        # Assign user to task
+                        project.assign_member(selected_task, user_id)
+                        
+                        # Add member to project if not already there
+                        if ctx.author.name not in project.members:
+                            project.members.append(ctx.author.name)
+                        
+                        pm.mark_project_dirty(project_name, project)
+                        task_id = selected_task.id
+                        rejected = await pm.save_project(project_name)
+                        # The save may have merged in changes made elsewhere
+                        project = pm.projects.get(project_name)
+                        selected_task = project.get_task(task_id) if project is not None and project.tasks is not None else None
+                        if project is None:
+                            error = f"❌ Project '{project_name}' was deleted while you were assigning yourself."
+                        elif task_id in rejected or selected_task is None:
+                            error = "❌ Someone else took the last slot of this task or it was completed meanwhile. Please try again."
                 
-                # Check if task has reached maximum members
-                if len(selected_task.get('assigned_members', [])) >= selected_task['max_members']:
-                    await ctx.send(f"❌ Task '{selected_task['description']}' has reached its maximum number of members ({selected_task['max_members']})!")
+                if error:
+                    await reply(ctx, error)
                     return
                 
-                # Assign user to task
-                if 'assigned_members' not in selected_task:
-                    selected_task['assigned_members'] = []
-                selected_task['assigned_members'].append(user_id)
-                
-                # Add member to project if not already there
-                if 'members' not in project:
-                    project['members'] = []
-                
-                if ctx.author.name not in project['members']:
-                    project['members'].append(ctx.author.name)
-                
-                # Update project progress
-                total_tasks = len(project['tasks'])
-                completed_tasks = sum(1 for task in project['tasks'] if isinstance(task, dict) and task.get('completed', False))
-                project['progress'] = int((completed_tasks / total_tasks) * 100) if total_tasks > 0 else 0
-                
-                pm.save_data()
-                
                 embed = discord.Embed(
                     title="✅ Task Assigned!",
                     description=f"Task assigned to project: **{project_name}**",
                     color=0x00ff00
                 )
-                embed.add_field(name="Task", value=selected_task['description'][:1024], inline=False)
+                embed.add_field(name="Task", value=selected_task.description[:1024], inline=False)
                 embed.add_field(name="Assigned by", value=ctx.author.mention, inline=True)
-                embed.add_field(name="Reward", value=f"{selected_task['reward_points']} points", inline=True)
-                embed.add_field(name="Members", value=f"{len(selected_task['assigned_members'])}/{selected_task['max_members']}", inline=True)
-                embed.add_field(name="Project Progress", value=f"{project['progress']}%", inline=True)
+                embed.add_field(name="Reward", value=f"{selected_task.reward_points} points", inline=True)
+                embed.add_field(name="Members", value=f"{selected_task.member_count}/{selected_task.max_members}", inline=True)
+                embed.add_field(name="Project Progress", value=f"{project.progress}%", inline=True)
                 
-                await ctx.send(embed=embed)
+                await reply(ctx, embed=embed)
                 
                 # Update forum post
-                await update_forum_post(project_name, project)
+                forum_updater.schedule(pm, project_name)
                 
             except ValueError:
-                await ctx.send("❌ Please enter a valid number or 'exit' to cancel.")
+                await reply(ctx, "❌ Please enter a valid number or 'exit' to cancel.")
                 return
                 
         except asyncio.TimeoutError:
-            await ctx.send("⏰ Timeout! Task assignment cancelled.")
+            await reply(ctx, "⏰ Timeout! Task assignment cancelled.")
             return
         
     except Exception as e:
-        await ctx.send(f"❌ Error assigning task: {str(e)}")
+        await reply(ctx, f"❌ Error assigning task: {str(e)}")
 
 @bot.command(name='rewards')
 async def show_rewards(ctx):
     """Shows user's current points and available tasks"""
+    pm = await get_manager(ctx)
+    if pm is None:
+        return
     try:
         user_id = str(ctx.author.id)
         points = pm.user_points.get(user_id, 0)
@@ -751,13 +2050,142 @@ async def show_rewards(ctx):
             inline=False
         )
         
-        await ctx.send(embed=embed)
+        await reply(ctx, embed=embed)
+    except Exception as e:
+        await reply(ctx, f"❌ Error showing rewards: {str(e)}")
+
+@bot.command(name='mytasks')
+async def my_tasks(ctx):
+    """Shows the user's assigned tasks across all projects"""
+    pm = await get_manager(ctx)
+    if pm is None:
+        return
+    try:
+        # Served from the member -> tasks index; only projects with an assignment are loaded
+        assignments = {}
+        for project_name, task_id in pm.member_tasks(ctx.author.id):
+            assignments.setdefault(project_name, []).append(task_id)
+        
+        embed = discord.Embed(
+            title=f"📋 {ctx.author.name}'s Tasks",
+            description="Here are the tasks you are assigned to:",
+            color=0x0099ff
+        )
+        
+        for project_name in sorted(assignments)[:25]:  # Embeds hold at most 25 fields
+            project = await pm.get_project(project_name)
+            if project is None or project.tasks is None:
+                continue
+            task_text = ""
+            # Loading a project re-indexes its tasks, so its entries are read again
+            for task_id in sorted(task_id for assigned_project, task_id in pm.member_tasks(ctx.author.id) if assigned_project == project_name):
+                task = project.get_task(task_id)
+                if task is not None and not task.completed:
+                    task_text += f"• **{task.description}** (Reward: {task.reward_points} points, Members: {task.member_count}/{task.max_members})\n"
+            if task_text:
+                embed.add_field(name=f"📁 {project_name}", value=task_text[:1024], inline=False)
+        
+        if not embed.fields:
+            embed = discord.Embed(
+                title="📋 No Assigned Tasks",
+                description="You are not assigned to any open tasks.",
+                color=0xff9900
+            )
+            embed.add_field(
+                name="How to get tasks",
+                value="Use `!projects` to find a project, then `!project <name> assign` to assign yourself to a task.",
+                inline=False
+            )
+        else:
+            embed.set_footer(text="Use !completed project <name> to mark a task as completed")
+        
+        await reply(ctx, embed=embed)
+    except Exception as e:
+        await reply(ctx, f"❌ Error showing your tasks: {str(e)}")
+
+# Top page of each guild's leaderboard as (leaderboard version, embed); rebuilt only when the top ranks change
+leaderboard_top_cache = {}
+
+def build_leaderboard_embed(pm, page):
+    """Builds the embed for one page of the leaderboard"""
+    entries = pm.leaderboard.page(page)
+    embed = discord.Embed(
+        title="🏆 Leaderboard",
+        description="Top crewmates by points:" if page == 1 else f"Page {page} of {pm.leaderboard.page_count}",
+        color=0xffd700
+    )
+    medals = {1: "🥇", 2: "🥈", 3: "🥉"}
+    lines = [f"{medals.get(rank, f'**{rank}.**')} <@{user_id}> - {points} points" for rank, user_id, points in entries]
+    embed.add_field(name="Rankings", value="\n".join(lines)[:1024], inline=False)
+    embed.set_footer(text="Use !leaderboard <page> to see more and !rank to see your position")
+    return embed
+
+@bot.command(name='leaderboard')
+async def show_leaderboard(ctx, page=None):
+    """Shows the points leaderboard"""
+    pm = await get_manager(ctx)
+    if pm is None:
+        return
+    try:
+        try:
+            page = int(page) if page is not None else 1
+        except ValueError:
+            await reply(ctx, "❌ Please enter a valid page number! Usage: `!leaderboard [page]`")
+            return
+        
+        if not len(pm.leaderboard):
+            await reply(ctx, "🏆 Nobody has earned any points yet. Complete project tasks to get on the leaderboard!")
+            return
+        
+        if page < 1 or page > pm.leaderboard.page_count:
+            await reply(ctx, f"❌ Page {page} doesn't exist! The leaderboard has {pm.leaderboard.page_count} page(s).")
+            return
+        
+        if page == 1:
+            version = pm.leaderboard.top_version
+            cached = leaderboard_top_cache.get(pm.guild_id)
+            if cached is None or cached[0] != version:
+                cached = (version, build_leaderboard_embed(pm, 1))
+                leaderboard_top_cache[pm.guild_id] = cached
+            embed = cached[1]
+        else:
+            embed = build_leaderboard_embed(pm, page)
+        
+        await reply(ctx, embed=embed)
+    except Exception as e:
+        await reply(ctx, f"❌ Error showing leaderboard: {str(e)}")
+
+@bot.command(name='rank')
+async def show_rank(ctx, member: discord.Member = None):
+    """Shows a user's position on the leaderboard"""
+    pm = await get_manager(ctx)
+    if pm is None:
+        return
+    try:
+        member = member or ctx.author
+        user_id = str(member.id)
+        rank = pm.leaderboard.rank(user_id)
+        
+        embed = discord.Embed(
+            title=f"🏅 {member.display_name}'s Rank",
+            color=0xffd700
+        )
+        if rank is None:
+            embed.description = f"{member.mention} hasn't earned any points yet."
+        else:
+            embed.description = f"{member.mention} is ranked **#{rank}** of {len(pm.leaderboard)}"
+            embed.add_field(name="Points", value=str(pm.user_points.get(user_id, 0)), inline=True)
+        
+        await reply(ctx, embed=embed)
     except Exception as e:
-        await ctx.send(f"❌ Error showing rewards: {str(e)}")
+        await reply(ctx, f"❌ Error showing rank: {str(e)}")
 
 @bot.command(name='shop')
 async def shop_command(ctx, action=None, *, item_info=None):
     """Handles shop-related commands"""
+    pm = await get_manager(ctx)
+    if pm is None:
+        return
     if action is None:
         # Show shop items (existing functionality)
         await show_shop(ctx)
@@ -767,11 +2195,11 @@ async def shop_command(ctx, action=None, *, item_info=None):
         # Check if user has required roles
         user_roles = [role.name for role in ctx.author.roles]
         if not pm.has_permission(user_roles, 'shop_management'):
-            await ctx.send("❌ You don't have permission to add shop items. Contact an administrator to configure permissions.")
+            await reply(ctx, "❌ You don't have permission to add shop items. Contact an administrator to configure permissions.")
             return
         
         if not item_info:
-            await ctx.send("❌ Please specify an item and price! Usage: `!shop add <item> <price>`")
+            await reply(ctx, "❌ Please specify an item and price! Usage: `!shop add <item> <price>`")
             return
         
         # Parse item and price
@@ -779,23 +2207,24 @@ async def shop_command(ctx, action=None, *, item_info=None):
             # Split by last space to separate item name and price
             parts = item_info.rsplit(' ', 1)
             if len(parts) != 2:
-                await ctx.send("❌ Invalid format! Use: `!shop add <item name> <price>`")
+                await reply(ctx, "❌ Invalid format! Use: `!shop add <item name> <price>`")
                 return
             
             item_name = parts[0].strip()
             price = int(parts[1])
             
             if price <= 0:
-                await ctx.send("❌ Price must be a positive number!")
+                await reply(ctx, "❌ Price must be a positive number!")
                 return
             
             if len(item_name) > 50:
-                await ctx.send("❌ Item name is too long! Please use a shorter name (max 50 characters).")
+                await reply(ctx, "❌ Item name is too long! Please use a shorter name (max 50 characters).")
                 return
             
             # Add item to shop
             pm.shop_items[item_name] = price
-            pm.save_data()
+            pm.mark_dirty('shop_items')
+            await pm.save()
             
             embed = discord.Embed(
                 title="✅ Shop Item Added!",
@@ -806,18 +2235,21 @@ async def shop_command(ctx, action=None, *, item_info=None):
             embed.add_field(name="Price", value=f"{price} points", inline=True)
             embed.add_field(name="Added by", value=ctx.author.mention, inline=True)
             
-            await ctx.send(embed=embed)
+            await reply(ctx, embed=embed)
             
         except ValueError:
-            await ctx.send("❌ Invalid price! Price must be a number. Usage: `!shop add <item name> <price>`")
+            await reply(ctx, "❌ Invalid price! Price must be a number. Usage: `!shop add <item name> <price>`")
         except Exception as e:
-            await ctx.send(f"❌ Error adding shop item: {str(e)}")
+            await reply(ctx, f"❌ Error adding shop item: {str(e)}")
     
     else:
-        await ctx.send("❌ Invalid shop action. Use `!shop` to view items or `!shop add <item> <price>` to add items.")
+        await reply(ctx, "❌ Invalid shop action. Use `!shop` to view items or `!shop add <item> <price>` to add items.")
 
 async def show_shop(ctx):
     """Shows items available in the shop"""
+    pm = await get_manager(ctx)
+    if pm is None:
+        return
     try:
         user_id = str(ctx.author.id)
         points = pm.user_points.get(user_id, 0)
@@ -860,21 +2292,24 @@ async def show_shop(ctx):
                 inline=False
             )
         
-        await ctx.send(embed=embed)
+        await reply(ctx, embed=embed)
     except Exception as e:
-        await ctx.send(f"❌ Error showing shop: {str(e)}")
+        await reply(ctx, f"❌ Error showing shop: {str(e)}")
 
 @bot.command(name='new')
 async def new_project(ctx, project_type):
     """Creates a new project with role-based permissions"""
+    pm = await get_manager(ctx)
+    if pm is None:
+        return
     if project_type.lower() != 'project':
-        await ctx.send("❌ Invalid command. Use `!new project` to create a new project.")
+        await reply(ctx, "❌ Invalid command. Use `!new project` to create a new project.")
         return
     
     # Check if user has required roles
     user_roles = [role.name for role in ctx.author.roles]
     if not pm.has_permission(user_roles, 'project_management'):
-        await ctx.send("❌ You don't have permission to create projects. Contact an administrator to configure permissions.")
+        await reply(ctx, "❌ You don't have permission to create projects. Contact an administrator to configure permissions.")
         return
     
     # Delete the original command message for privacy
@@ -895,22 +2330,25 @@ async def new_project(ctx, project_type):
         inline=False
     )
     
-    await ctx.author.send(embed=embed)
+    await dm(ctx.author, embed=embed)
     
     # Start the project creation process
-    await create_project_interactive(ctx.author)
+    await create_project_interactive(ctx.author, pm)
 
 @bot.command(name='edit')
 async def edit_project(ctx, project_type, *, project_name):
     """Edits an existing project with role-based permissions"""
+    pm = await get_manager(ctx)
+    if pm is None:
+        return
     if project_type.lower() != 'project':
-        await ctx.send("❌ Invalid command. Use `!edit project <name>` to edit a project.")
+        await reply(ctx, "❌ Invalid command. Use `!edit project <name>` to edit a project.")
         return
     
     # Check if user has required roles
     user_roles = [role.name for role in ctx.author.roles]
     if not pm.has_permission(user_roles, 'project_management'):
-        await ctx.send("❌ You don't have permission to edit projects. Contact an administrator to configure permissions.")
+        await reply(ctx, "❌ You don't have permission to edit projects. Contact an administrator to configure permissions.")
         return
     
     # Check if there are any projects
@@ -925,22 +2363,24 @@ async def edit_project(ctx, project_type, *, project_name):
             value="Use `!new project` to create a new project first.",
             inline=False
         )
-        await ctx.send(embed=embed)
+        await reply(ctx, embed=embed)
         return
     
     # Check if project exists
+    project_name, suggestions = resolve_project_name(pm, project_name)
     if project_name not in pm.projects:
         embed = discord.Embed(
             title="❌ Project Not Found",
             description=f"Project '{project_name}' not found!",
             color=0xff6b6b
         )
+        add_project_suggestions(embed, suggestions)
         embed.add_field(
             name="Available Projects",
             value="Use `!projects` to see all available projects.",
             inline=False
         )
-        await ctx.send(embed=embed)
+        await reply(ctx, embed=embed)
         return
     
     # Delete the original command message for privacy
@@ -961,22 +2401,25 @@ async def edit_project(ctx, project_type, *, project_name):
         inline=False
     )
     
-    await ctx.author.send(embed=embed)
+    await dm(ctx.author, embed=embed)
     
     # Start the project editing process
-    await edit_project_interactive(ctx.author, project_name)
+    await edit_project_interactive(ctx.author, pm, project_name)
 
 @bot.command(name='delete')
 async def delete_project(ctx, project_type, *, project_name):
     """Deletes a project with role-based permissions"""
+    pm = await get_manager(ctx)
+    if pm is None:
+        return
     if project_type.lower() != 'project':
-        await ctx.send("❌ Invalid command. Use `!delete project <name>` to delete a project.")
+        await reply(ctx, "❌ Invalid command. Use `!delete project <name>` to delete a project.")
         return
     
     # Check if user has required roles
     user_roles = [role.name for role in ctx.author.roles]
     if not pm.has_permission(user_roles, 'project_management'):
-        await ctx.send("❌ You don't have permission to delete projects. Contact an administrator to configure permissions.")
+        await reply(ctx, "❌ You don't have permission to delete projects. Contact an administrator to configure permissions.")
         return
     
     # Check if there are any projects
@@ -991,22 +2434,24 @@ async def delete_project(ctx, project_type, *, project_name):
             value="Use `!new project` to create a new project first.",
             inline=False
         )
-        await ctx.send(embed=embed)
+        await reply(ctx, embed=embed)
         return
     
     # Check if project exists
+    project_name, suggestions = resolve_project_name(pm, project_name)
     if project_name not in pm.projects:
         embed = discord.Embed(
             title="❌ Project Not Found",
             description=f"Project '{project_name}' not found!",
             color=0xff6b6b
         )
+        add_project_suggestions(embed, suggestions)
         embed.add_field(
             name="Available Projects",
             value="Use `!projects` to see all available projects.",
             inline=False
         )
-        await ctx.send(embed=embed)
+        await reply(ctx, embed=embed)
         return
     
     # Delete the original command message for privacy
@@ -1032,101 +2477,103 @@ async def delete_project(ctx, project_type, *, project_name):
         inline=False
     )
     
-    await ctx.author.send(embed=embed)
+    await dm(ctx.author, embed=embed)
     
     # Start the project deletion process
-    await delete_project_interactive(ctx.author, project_name)
+    await delete_project_interactive(ctx.author, pm, project_name)
 
-async def create_project_interactive(user):
+async def create_project_interactive(user, pm):
     """Interactive project creation process"""
     try:
         # Check if forum channel is configured and accessible
-        forum_channel = None
+        forum_channel = find_forum_channel(pm)
         configured_channel_name = pm.forum_channel_name
         
-        for guild in bot.guilds:
-            # First try to find the configured channel
-            channel = discord.utils.get(guild.channels, name=configured_channel_name)
-            if channel:
-                # Check if it's actually a forum channel
-                if hasattr(channel, 'type') and channel.type == discord.ChannelType.forum:
-                    forum_channel = channel
-                    break
+        if not forum_channel:
+            # Not found by id or by name; work out why for the error message
+            for guild in guilds_of(pm):
+                # First try to find the configured channel
+                channel = discord.utils.get(guild.channels, name=configured_channel_name)
+                if channel:
+                    # Check if it's actually a forum channel
+                    if hasattr(channel, 'type') and channel.type == discord.ChannelType.forum:
+                        forum_channel = channel
+                        break
+                    else:
+                        # Channel exists but it's not a forum channel
+                        embed = discord.Embed(
+                            title="❌ Invalid Channel Type",
+                            description=f"Channel '{configured_channel_name}' exists but is not a forum channel.",
+                            color=0xff6b6b
+                        )
+                        embed.add_field(
+                            name="Problem",
+                            value=f"The configured channel '{configured_channel_name}' is a {channel.type.name} channel, not a forum channel.",
+                            inline=False
+                        )
+                        embed.add_field(
+                            name="How to fix",
+                            value="1. Create a new forum channel in your server\n2. Use `!project forums <forum_channel_name>` to configure it",
+                            inline=False
+                        )
+                        await dm(user, embed=embed)
+                        return
                 else:
-                    # Channel exists but it's not a forum channel
-                    embed = discord.Embed(
-                        title="❌ Invalid Channel Type",
-                        description=f"Channel '{configured_channel_name}' exists but is not a forum channel.",
-                        color=0xff6b6b
-                    )
-                    embed.add_field(
-                        name="Problem",
-                        value=f"The configured channel '{configured_channel_name}' is a {channel.type.name} channel, not a forum channel.",
-                        inline=False
-                    )
-                    embed.add_field(
-                        name="How to fix",
-                        value="1. Create a new forum channel in your server\n2. Use `!project forums <forum_channel_name>` to configure it",
-                        inline=False
-                    )
-                    await user.send(embed=embed)
-                    return
-            else:
-                # Check if there are any forum channels in the guild
-                forum_channels = [ch for ch in guild.channels if hasattr(ch, 'type') and ch.type == discord.ChannelType.forum]
-                if forum_channels:
-                    embed = discord.Embed(
-                        title="❌ Forum Channel Not Configured",
-                        description=f"Could not find forum channel: '{configured_channel_name}'",
-                        color=0xff6b6b
-                    )
-                    embed.add_field(
-                        name="Available Forum Channels",
-                        value="Here are the forum channels in this server:",
-                        inline=False
-                    )
+                    # Check if there are any forum channels in the guild
+                    forum_channels = [ch for ch in guild.channels if hasattr(ch, 'type') and ch.type == discord.ChannelType.forum]
+                    if forum_channels:
+                        embed = discord.Embed(
+                            title="❌ Forum Channel Not Configured",
+                            description=f"Could not find forum channel: '{configured_channel_name}'",
+                            color=0xff6b6b
+                        )
+                        embed.add_field(
+                            name="Available Forum Channels",
+                            value="Here are the forum channels in this server:",
+                            inline=False
+                        )
                     
-                    channels_text = "\n".join([f"• {forum.name}" for forum in forum_channels[:10]])
-                    if len(forum_channels) > 10:
-                        channels_text += f"\n... and {len(forum_channels) - 10} more"
-                    embed.add_field(name="Forums", value=channels_text, inline=False)
+                        channels_text = "\n".join([f"• {forum.name}" for forum in forum_channels[:10]])
+                        if len(forum_channels) > 10:
+                            channels_text += f"\n... and {len(forum_channels) - 10} more"
+                        embed.add_field(name="Forums", value=channels_text, inline=False)
                     
-                    embed.add_field(
-                        name="How to configure",
-                        value=f"Use `!project forums <channel_name>` to set one of these forum channels for project posts.",
-                        inline=False
-                    )
-                    embed.add_field(
-                        name="Example",
-                        value=f"`!project forums {forum_channels[0].name}`",
-                        inline=False
-                    )
-                    await user.send(embed=embed)
-                    return
-                else:
-                    # No forum channels exist in the guild
-                    embed = discord.Embed(
-                        title="❌ No Forum Channels Found",
-                        description="This server doesn't have any forum channels.",
-                        color=0xff6b6b
-                    )
-                    embed.add_field(
-                        name="How to create a forum channel",
-                        value="1. Go to your server settings\n2. Click on 'Channels' in the left sidebar\n3. Click the '+' button to create a new channel\n4. Select 'Forum' as the channel type\n5. Name it (e.g., '📋・projects')\n6. Set appropriate permissions\n7. Click 'Create Channel'",
-                        inline=False
-                    )
-                    embed.add_field(
-                        name="After creating the forum channel",
-                        value="Use `!project forums <channel_name>` to configure it for project posts.",
-                        inline=False
-                    )
-                    embed.add_field(
-                        name="Note",
-                        value="Forum channels are required for project management. Regular text channels cannot be used for project posts.",
-                        inline=False
-                    )
-                    await user.send(embed=embed)
-                    return
+                        embed.add_field(
+                            name="How to configure",
+                            value=f"Use `!project forums <channel_name>` to set one of these forum channels for project posts.",
+                            inline=False
+                        )
+                        embed.add_field(
+                            name="Example",
+                            value=f"`!project forums {forum_channels[0].name}`",
+                            inline=False
+                        )
+                        await dm(user, embed=embed)
+                        return
+                    else:
+                        # No forum channels exist in the guild
+                        embed = discord.Embed(
+                            title="❌ No Forum Channels Found",
+                            description="This server doesn't have any forum channels.",
+                            color=0xff6b6b
+                        )
+                        embed.add_field(
+                            name="How to create a forum channel",
+                            value="1. Go to your server settings\n2. Click on 'Channels' in the left sidebar\n3. Click the '+' button to create a new channel\n4. Select 'Forum' as the channel type\n5. Name it (e.g., '📋・projects')\n6. Set appropriate permissions\n7. Click 'Create Channel'",
+                            inline=False
+                        )
+                        embed.add_field(
+                            name="After creating the forum channel",
+                            value="Use `!project forums <channel_name>` to configure it for project posts.",
+                            inline=False
+                        )
+                        embed.add_field(
+                            name="Note",
+                            value="Forum channels are required for project management. Regular text channels cannot be used for project posts.",
+                            inline=False
+                        )
+                        await dm(user, embed=embed)
+                        return
         
         if not forum_channel:
             # This should not happen if the above checks are working, but just in case
@@ -1140,7 +2587,7 @@ async def create_project_interactive(user):
                 value="Contact an administrator to configure the forum channel using `!project forums <channel_name>`",
                 inline=False
             )
-            await user.send(embed=embed)
+            await dm(user, embed=embed)
             return
         
         # Check if bot has permission to create threads in the forum
@@ -1151,7 +2598,7 @@ async def create_project_interactive(user):
                 description="The bot is not a member of this server.",
                 color=0xff6b6b
             )
-            await user.send(embed=embed)
+            await dm(user, embed=embed)
             return
         
         permissions = forum_channel.permissions_for(bot_member)
@@ -1190,381 +2637,427 @@ async def create_project_interactive(user):
                 value="1. Right-click the forum channel\n2. Select 'Edit Channel'\n3. Go to 'Permissions' tab\n4. Add the bot role\n5. Grant the required permissions\n6. Save changes",
                 inline=False
             )
-            await user.send(embed=embed)
-            return
-        
-        # Ask for project name
-        await user.send("📝 **Step 1:** What is the name of the project?\n\nType 'cancel' or 'exit' to cancel project creation.")
-        
-        def check(m):
-            return m.author == user and m.channel.type == discord.ChannelType.private
-        
-        try:
-            name_msg = await bot.wait_for('message', timeout=60.0, check=check)
-            project_name = name_msg.content.strip()
-            
-            if project_name.lower() in ['cancel', 'exit']:
-                await user.send("❌ Project creation cancelled.")
-                return
-            
-            if len(project_name) > 50:
-                await user.send("❌ Project name is too long! Please use a shorter name (max 50 characters).")
-                return
-                
-        except asyncio.TimeoutError:
-            await user.send("⏰ Timeout! Project creation cancelled.")
-            return
-        
-        # Ask for project description
-        await user.send("📝 **Step 2:** What is the description of the project?\n\nType 'cancel' or 'exit' to cancel project creation.")
-        
-        try:
-            desc_msg = await bot.wait_for('message', timeout=120.0, check=check)
-            project_description = desc_msg.content.strip()
-            
-            if project_description.lower() in ['cancel', 'exit']:
-                await user.send("❌ Project creation cancelled.")
-                return
-            
-        except asyncio.TimeoutError:
-            await user.send("⏰ Timeout! Project creation cancelled.")
+            await dm(user, embed=embed)
             return
         
-        # Ask for tasks
-        await user.send("📝 **Step 3:** Please provide the tasks in the following format:\n`<task> <reward points> <number of members>`\n\nExample:\n`Fix login bug 50 2`\n`Update documentation 30 1`\n`Design new UI 75 3`\n\nType 'done' when finished, or 'cancel' to cancel project creation:")
-        
-        tasks = []
-        while True:
-            try:
-                task_msg = await bot.wait_for('message', timeout=120.0, check=check)
-                task_input = task_msg.content.strip()
-                
-                if task_input.lower() in ['cancel', 'exit']:
-                    await user.send("❌ Project creation cancelled.")
-                    return
-                
-                if task_input.lower() == 'done':
-                    break
-                
-                # Parse task input
-                parts = task_input.split()
-                if len(parts) >= 3:
-                    try:
-                        reward_points = int(parts[-2])
-                        num_members = int(parts[-1])
-                        task_description = ' '.join(parts[:-2])
-                        
-                        if reward_points > 0 and num_members > 0:
-                            tasks.append({
-                                'description': task_description,
-                                'reward_points': reward_points,
-                                'max_members': num_members,
-                                'assigned_members': [],
-                                'completed': False
-                            })
-                            await user.send(f"✅ Added task: **{task_description}** (Reward: {reward_points} points, Members: {num_members})")
-                        else:
-                            await user.send("❌ Reward points and number of members must be positive numbers!")
-                    except ValueError:
-                        await user.send("❌ Invalid format! Use: `<task> <reward points> <number of members>`")
-                else:
-                    await user.send("❌ Invalid format! Use: `<task> <reward points> <number of members>`")
-                    
-            except asyncio.TimeoutError:
-                await user.send("⏰ Timeout! Project creation cancelled.")
-                return
-        
-        if not tasks:
-            await user.send("❌ No tasks provided! Project creation cancelled.")
-            return
-        
-        # Create the project
-        pm.projects[project_name] = {
-            'description': project_description,
-            'status': 'In Progress',
-            'progress': 0,
-            'created': datetime.now().strftime('%Y-%m-%d %H:%M'),
-            'created_by': user.name,
-            'tasks': tasks,
-            'members': []
-        }
-        
-        pm.save_data()
-        
-        # Create forum post
-        await create_forum_post(project_name, project_description, tasks, user)
-        
-        # Send confirmation
-        embed = discord.Embed(
-            title="✅ Project Created Successfully!",
-            description=f"Project **{project_name}** has been created and posted to the forum.",
-            color=0x00ff00
-        )
-        embed.add_field(name="Description", value=project_description[:1024], inline=False)
-        embed.add_field(name="Tasks", value=f"{len(tasks)} tasks created", inline=True)
-        embed.add_field(name="Created by", value=user.name, inline=True)
-        embed.add_field(name="Forum Channel", value=forum_channel.name, inline=True)
-        
-        await user.send(embed=embed)
+        await project_flows.start(user, pm.guild_id, 'create_project')
         
     except Exception as e:
-        await user.send(f"❌ Error creating project: {str(e)}")
+        await dm(user, f"❌ Error creating project: {str(e)}")
 
-async def edit_project_interactive(user, project_name):
+async def edit_project_interactive(user, pm, project_name):
     """Interactive project editing process"""
     try:
-        project = pm.projects[project_name]
-        
-        await user.send(f"📝 **Editing Project:** {project_name}\n\nWhat would you like to edit?\n1. Project description\n2. Tasks (add/remove/edit)\n3. Project status\n\nType the number (1, 2, or 3):")
-        
-        def check(m):
-            return m.author == user and m.channel.type == discord.ChannelType.private
-        
-        try:
-            choice_msg = await bot.wait_for('message', timeout=60.0, check=check)
-            choice = choice_msg.content.strip()
-            
-            if choice == '1':
-                await user.send("📝 Enter the new project description:")
-                desc_msg = await bot.wait_for('message', timeout=120.0, check=check)
-                project['description'] = desc_msg.content.strip()
-                await user.send("✅ Project description updated!")
-                
-            elif choice == '2':
-                await user.send("📝 **Task Management**\n\nWhat would you like to do?\n1. Add new task\n2. Remove task\n3. Edit task\n4. View current tasks\n\nType the number (1-4):")
-                
-                task_choice_msg = await bot.wait_for('message', timeout=60.0, check=check)
-                task_choice = task_choice_msg.content.strip()
-                
-                if task_choice == '1':
-                    # Add new task
-                    await user.send("📝 **Adding New Task**\n\nPlease provide the task in the following format:\n`<task> <reward points> <number of members>`\n\nExample: `Fix login bug 50 2`")
-                    
-                    task_msg = await bot.wait_for('message', timeout=120.0, check=check)
-                    task_input = task_msg.content.strip()
-                    
-                    # Parse task input
-                    parts = task_input.split()
-                    if len(parts) >= 3:
-                        try:
-                            reward_points = int(parts[-2])
-                            num_members = int(parts[-1])
-                            task_description = ' '.join(parts[:-2])
-                            
-                            if reward_points > 0 and num_members > 0:
-                                new_task = {
-                                    'description': task_description,
-                                    'reward_points': reward_points,
-                                    'max_members': num_members,
-                                    'assigned_members': [],
-                                    'completed': False
-                                }
-                                project['tasks'].append(new_task)
-                                await user.send(f"✅ Added task: **{task_description}** (Reward: {reward_points} points, Members: {num_members})")
-                            else:
-                                await user.send("❌ Reward points and number of members must be positive numbers!")
-                        except ValueError:
-                            await user.send("❌ Invalid format! Use: `<task> <reward points> <number of members>`")
-                    else:
-                        await user.send("❌ Invalid format! Use: `<task> <reward points> <number of members>`")
-                
-                elif task_choice == '2':
-                    # Remove task
-                    await user.send("📝 **Current tasks:**")
-                    for i, task in enumerate(project['tasks'], 1):
-                        if isinstance(task, dict):
-                            await user.send(f"{i}. {task['description']} (Reward: {task['reward_points']} points, Members: {task['max_members']})")
-                    
-                    await user.send("📝 Enter the number of the task to remove:")
-                    remove_msg = await bot.wait_for('message', timeout=60.0, check=check)
-                    try:
-                        task_index = int(remove_msg.content.strip()) - 1
-                        if 0 <= task_index < len(project['tasks']):
-                            removed_task = project['tasks'].pop(task_index)
-                            await user.send(f"✅ Removed task: **{removed_task['description']}**")
-                        else:
-                            await user.send("❌ Invalid task number!")
-                    except ValueError:
-                        await user.send("❌ Please enter a valid number!")
-                
-                elif task_choice == '3':
-                    # Edit task
-                    await user.send("📝 **Current tasks:**")
-                    for i, task in enumerate(project['tasks'], 1):
-                        if isinstance(task, dict):
-                            await user.send(f"{i}. {task['description']} (Reward: {task['reward_points']} points, Members: {task['max_members']})")
-                    
-                    await user.send("📝 Enter the number of the task to edit:")
-                    edit_msg = await bot.wait_for('message', timeout=60.0, check=check)
-                    try:
-                        task_index = int(edit_msg.content.strip()) - 1
-                        if 0 <= task_index < len(project['tasks']):
-                            task = project['tasks'][task_index]
-                            await user.send(f"📝 **Editing task:** {task['description']}\n\nWhat would you like to edit?\n1. Task description\n2. Reward points\n3. Number of members\n\nType the number (1-3):")
-                            
-                            edit_choice_msg = await bot.wait_for('message', timeout=60.0, check=check)
-                            edit_choice = edit_choice_msg.content.strip()
-                            
-                            if edit_choice == '1':
-                                await user.send("📝 Enter the new task description:")
-                                new_desc_msg = await bot.wait_for('message', timeout=120.0, check=check)
-                                task['description'] = new_desc_msg.content.strip()
-                                await user.send("✅ Task description updated!")
-                            
-                            elif edit_choice == '2':
-                                await user.send("📝 Enter the new reward points:")
-                                new_reward_msg = await bot.wait_for('message', timeout=60.0, check=check)
-                                try:
-                                    new_reward = int(new_reward_msg.content.strip())
-                                    if new_reward > 0:
-                                        task['reward_points'] = new_reward
-                                        await user.send("✅ Reward points updated!")
-                                    else:
-                                        await user.send("❌ Reward points must be positive!")
-                                except ValueError:
-                                    await user.send("❌ Please enter a valid number!")
-                            
-                            elif edit_choice == '3':
-                                await user.send("📝 Enter the new number of members:")
-                                new_members_msg = await bot.wait_for('message', timeout=60.0, check=check)
-                                try:
-                                    new_members = int(new_members_msg.content.strip())
-                                    if new_members > 0:
-                                        task['max_members'] = new_members
-                                        await user.send("✅ Number of members updated!")
-                                    else:
-                                        await user.send("❌ Number of members must be positive!")
-                                except ValueError:
-                                    await user.send("❌ Please enter a valid number!")
-                            
-                            else:
-                                await user.send("❌ Invalid choice!")
-                        else:
-                            await user.send("❌ Invalid task number!")
-                    except ValueError:
-                        await user.send("❌ Please enter a valid number!")
-                
-                elif task_choice == '4':
-                    # View current tasks
-                    await user.send("📝 **Current tasks:**")
-                    for i, task in enumerate(project['tasks'], 1):
-                        if isinstance(task, dict):
-                            await user.send(f"{i}. {task['description']} (Reward: {task['reward_points']} points, Members: {task['max_members']})")
-                
-                else:
-                    await user.send("❌ Invalid choice!")
-                
-            elif choice == '3':
-                await user.send("📝 Enter the new status (e.g., 'In Progress', 'Completed', 'On Hold'):")
-                status_msg = await bot.wait_for('message', timeout=60.0, check=check)
-                project['status'] = status_msg.content.strip()
-                await user.send("✅ Project status updated!")
-                
-            else:
-                await user.send("❌ Invalid choice!")
-                return
-                
-        except asyncio.TimeoutError:
-            await user.send("⏰ Timeout! Project editing cancelled.")
-            return
-        
-        pm.save_data()
-        
-        # Update forum post to reflect changes
-        forum_updated = await update_forum_post(project_name, project)
-        
-        # Send confirmation message
-        embed = discord.Embed(
-            title="✅ Project Updated Successfully!",
-            description=f"Project **{project_name}** has been updated.",
-            color=0x00ff00
-        )
-        embed.add_field(name="Project Data", value="✅ Updated in database", inline=True)
-        
-        if forum_updated:
-            embed.add_field(name="Forum Post", value="✅ Updated in forum", inline=True)
-        else:
-            embed.add_field(name="Forum Post", value="⚠️ Could not update (may not exist)", inline=True)
-        
-        embed.add_field(name="Updated by", value=user.name, inline=True)
-        
-        await user.send(embed=embed)
-        
+        await project_flows.start(user, pm.guild_id, 'edit_project', {'project': project_name})
     except Exception as e:
-        await user.send(f"❌ Error editing project: {str(e)}")
+        await dm(user, f"❌ Error editing project: {str(e)}")
 
-async def delete_project_interactive(user, project_name):
+async def delete_project_interactive(user, pm, project_name):
     """Interactive project deletion process"""
     try:
-        await user.send("⚠️ **Final Confirmation:** Type 'DELETE' to confirm project deletion:")
-        
-        def check(m):
-            return m.author == user and m.channel.type == discord.ChannelType.private
-        
-        try:
-            confirm_msg = await bot.wait_for('message', timeout=30.0, check=check)
-            
-            if confirm_msg.content.strip().upper() == 'DELETE':
-                # Delete the project from data
-                del pm.projects[project_name]
-                pm.save_data()
-                
-                # Try to delete the forum thread
-                forum_thread_deleted = await delete_forum_thread(project_name, user)
-                
-                # Send confirmation message
-                embed = discord.Embed(
-                    title="✅ Project Deleted Successfully!",
-                    description=f"Project **{project_name}** has been permanently deleted.",
-                    color=0x00ff00
-                )
-                embed.add_field(name="Project Data", value="✅ Removed from database", inline=True)
-                
-                if forum_thread_deleted:
-                    embed.add_field(name="Forum Thread", value="✅ Deleted from forum", inline=True)
-                else:
-                    embed.add_field(name="Forum Thread", value="⚠️ Could not delete (may not exist)", inline=True)
-                
-                embed.add_field(name="Deleted by", value=user.name, inline=True)
-                
-                await user.send(embed=embed)
-            else:
-                await user.send("❌ Deletion cancelled.")
-                
-        except asyncio.TimeoutError:
-            await user.send("⏰ Timeout! Deletion cancelled.")
-            
+        await project_flows.start(user, pm.guild_id, 'delete_project', {'project': project_name})
     except Exception as e:
-        await user.send(f"❌ Error deleting project: {str(e)}")
+        await dm(user, f"❌ Error deleting project: {str(e)}")
 
-async def delete_forum_thread(project_name, user):
+def parse_task_input(task_input):
+    """Parses `<task> <reward points> <number of members>`; returns (task, error message)"""
+    parts = task_input.split()
+    if len(parts) < 3:
+        return None, "❌ Invalid format! Use: `<task> <reward points> <number of members>`"
+    try:
+        reward_points = int(parts[-2])
+        num_members = int(parts[-1])
+    except ValueError:
+        return None, "❌ Invalid format! Use: `<task> <reward points> <number of members>`"
+    if reward_points <= 0 or num_members <= 0:
+        return None, "❌ Reward points and number of members must be positive numbers!"
+    return Task(' '.join(parts[:-2]), reward_points, num_members), None
+
+async def flow_project(session, user):
+    """Returns the project a flow works on, telling the user if it is gone"""
+    pm = await guilds.get(session.guild_id)
+    project_name = session.data['project']
+    project = await pm.get_project(project_name)
+    if project is None:
+        await dm(user, f"❌ Project '{project_name}' no longer exists.")
+    return pm, project_name, project
+
+async def send_task_list(user, project):
+    await dm(user, "📝 **Current tasks:**")
+    for i, task in enumerate(project.tasks, 1):
+        await dm(user, f"{i}. {task.description} (Reward: {task.reward_points} points, Members: {task.max_members})")
+
+# Project creation: name, description, then tasks until 'done'
+
+def is_cancel(text):
+    return text.lower() in ['cancel', 'exit']
+
+async def create_name_prompt(session, user):
+    await dm(user, "📝 **Step 1:** What is the name of the project?\n\nType 'cancel' or 'exit' to cancel project creation.")
+
+async def create_name_reply(session, user, text):
+    project_name = text.strip()
+    if is_cancel(project_name):
+        await dm(user, "❌ Project creation cancelled.")
+        return None
+    if len(project_name) > 50:
+        await dm(user, "❌ Project name is too long! Please use a shorter name (max 50 characters).")
+        return None
+    session.data['name'] = project_name
+    return 'description'
+
+async def create_description_prompt(session, user):
+    await dm(user, "📝 **Step 2:** What is the description of the project?\n\nType 'cancel' or 'exit' to cancel project creation.")
+
+async def create_description_reply(session, user, text):
+    project_description = text.strip()
+    if is_cancel(project_description):
+        await dm(user, "❌ Project creation cancelled.")
+        return None
+    session.data['description'] = project_description
+    session.data['tasks'] = []
+    return 'tasks'
+
+async def create_tasks_prompt(session, user):
+    await dm(user, "📝 **Step 3:** Please provide the tasks in the following format:\n`<task> <reward points> <number of members>`\n\nExample:\n`Fix login bug 50 2`\n`Update documentation 30 1`\n`Design new UI 75 3`\n\nType 'done' when finished, or 'cancel' to cancel project creation:")
+
+async def create_tasks_reply(session, user, text):
+    task_input = text.strip()
+    if is_cancel(task_input):
+        await dm(user, "❌ Project creation cancelled.")
+        return None
+    if task_input.lower() != 'done':
+        task, error = parse_task_input(task_input)
+        if task is None:
+            await dm(user, error)
+        else:
+            session.data['tasks'].append(task.to_document())
+            await dm(user, f"✅ Added task: **{task.description}** (Reward: {task.reward_points} points, Members: {task.max_members})")
+        return 'tasks'
+    
+    tasks = [Task.from_document(task) for task in session.data['tasks']]
+    if not tasks:
+        await dm(user, "❌ No tasks provided! Project creation cancelled.")
+        return None
+    
+    # Create the project
+    pm = await guilds.get(session.guild_id)
+    project_name = session.data['name']
+    project_description = session.data['description']
+    project = Project(
+        description=project_description,
+        created=datetime.now().strftime('%Y-%m-%d %H:%M'),
+        created_by=user.name,
+        tasks=tasks
+    )
+    
+    pm.mark_project_dirty(project_name, project)
+    await pm.save()
+    
+    # Create forum post
+    await create_forum_post(pm, project_name, project, user)
+    
+    # Send confirmation
+    forum_channel = find_forum_channel(pm)
+    embed = discord.Embed(
+        title="✅ Project Created Successfully!",
+        description=f"Project **{project_name}** has been created and posted to the forum.",
+        color=0x00ff00
+    )
+    embed.add_field(name="Description", value=project_description[:1024], inline=False)
+    embed.add_field(name="Tasks", value=f"{len(tasks)} tasks created", inline=True)
+    embed.add_field(name="Created by", value=user.name, inline=True)
+    embed.add_field(name="Forum Channel", value=forum_channel.name if forum_channel else pm.forum_channel_name, inline=True)
+    
+    await dm(user, embed=embed)
+    return None
+
+# Project editing: menus lead to one change, which is then saved
+
+async def finish_edit(pm, project_name, project, user):
+    """Saves an edited project and confirms the change"""
+    pm.mark_project_dirty(project_name, project)
+    await pm.save()
+    
+    # Update forum post to reflect changes
+    forum_updater.schedule(pm, project_name)
+    
+    # Send confirmation message
+    embed = discord.Embed(
+        title="✅ Project Updated Successfully!",
+        description=f"Project **{project_name}** has been updated.",
+        color=0x00ff00
+    )
+    embed.add_field(name="Project Data", value="✅ Updated in database", inline=True)
+    
+    embed.add_field(name="Forum Post", value="🔄 Update queued", inline=True)
+    
+    embed.add_field(name="Updated by", value=user.name, inline=True)
+    
+    await dm(user, embed=embed)
+    return None
+
+async def edit_menu_prompt(session, user):
+    await dm(user, f"📝 **Editing Project:** {session.data['project']}\n\nWhat would you like to edit?\n1. Project description\n2. Tasks (add/remove/edit)\n3. Project status\n\nType the number (1, 2, or 3):")
+
+async def edit_menu_reply(session, user, text):
+    next_state = {'1': 'description', '2': 'task_menu', '3': 'status'}.get(text.strip())
+    if next_state is None:
+        await dm(user, "❌ Invalid choice!")
+    return next_state
+
+async def edit_description_prompt(session, user):
+    await dm(user, "📝 Enter the new project description:")
+
+async def edit_description_reply(session, user, text):
+    pm, project_name, project = await flow_project(session, user)
+    if project is None:
+        return None
+    project.description = text.strip()
+    await dm(user, "✅ Project description updated!")
+    return await finish_edit(pm, project_name, project, user)
+
+async def edit_status_prompt(session, user):
+    await dm(user, "📝 Enter the new status (e.g., 'In Progress', 'Completed', 'On Hold'):")
+
+async def edit_status_reply(session, user, text):
+    pm, project_name, project = await flow_project(session, user)
+    if project is None:
+        return None
+    project.status = text.strip()
+    await dm(user, "✅ Project status updated!")
+    return await finish_edit(pm, project_name, project, user)
+
+async def edit_task_menu_prompt(session, user):
+    await dm(user, "📝 **Task Management**\n\nWhat would you like to do?\n1. Add new task\n2. Remove task\n3. Edit task\n4. View current tasks\n\nType the number (1-4):")
+
+async def edit_task_menu_reply(session, user, text):
+    task_choice = text.strip()
+    if task_choice == '1':
+        return 'add_task'
+    pm, project_name, project = await flow_project(session, user)
+    if project is None:
+        return None
+    if task_choice == '2':
+        await send_task_list(user, project)
+        return 'remove_task'
+    if task_choice == '3':
+        await send_task_list(user, project)
+        return 'edit_task'
+    if task_choice == '4':
+        await send_task_list(user, project)
+    else:
+        await dm(user, "❌ Invalid choice!")
+    return await finish_edit(pm, project_name, project, user)
+
+async def edit_add_task_prompt(session, user):
+    await dm(user, "📝 **Adding New Task**\n\nPlease provide the task in the following format:\n`<task> <reward points> <number of members>`\n\nExample: `Fix login bug 50 2`")
+
+async def edit_add_task_reply(session, user, text):
+    pm, project_name, project = await flow_project(session, user)
+    if project is None:
+        return None
+    task, error = parse_task_input(text.strip())
+    if task is None:
+        await dm(user, error)
+    else:
+        project.add_task(task)
+        await dm(user, f"✅ Added task: **{task.description}** (Reward: {task.reward_points} points, Members: {task.max_members})")
+    return await finish_edit(pm, project_name, project, user)
+
+async def edit_remove_task_prompt(session, user):
+    await dm(user, "📝 Enter the number of the task to remove:")
+
+async def edit_remove_task_reply(session, user, text):
+    pm, project_name, project = await flow_project(session, user)
+    if project is None:
+        return None
+    try:
+        task_index = int(text.strip()) - 1
+        if 0 <= task_index < len(project.tasks):
+            removed_task = project.remove_task(task_index)
+            await dm(user, f"✅ Removed task: **{removed_task.description}**")
+        else:
+            await dm(user, "❌ Invalid task number!")
+    except ValueError:
+        await dm(user, "❌ Please enter a valid number!")
+    return await finish_edit(pm, project_name, project, user)
+
+async def edit_task_prompt(session, user):
+    await dm(user, "📝 Enter the number of the task to edit:")
+
+async def edit_task_reply(session, user, text):
+    pm, project_name, project = await flow_project(session, user)
+    if project is None:
+        return None
+    try:
+        task_index = int(text.strip()) - 1
+    except ValueError:
+        await dm(user, "❌ Please enter a valid number!")
+        return await finish_edit(pm, project_name, project, user)
+    if not 0 <= task_index < len(project.tasks):
+        await dm(user, "❌ Invalid task number!")
+        return await finish_edit(pm, project_name, project, user)
+    task = project.tasks[task_index]
+    # Kept by id, which stays valid if other tasks are removed meanwhile
+    session.data['task'] = task.id
+    # Asked here, under the project's lock, so the menu is never shown for a removed task
+    await dm(user, f"📝 **Editing task:** {task.description}\n\nWhat would you like to edit?\n1. Task description\n2. Reward points\n3. Number of members\n\nType the number (1-3):")
+    return 'edit_task_field'
+
+async def flow_task(session, user):
+    """Returns the task a flow edits, telling the user if it is gone"""
+    pm, project_name, project = await flow_project(session, user)
+    task = project.get_task(session.data['task']) if project is not None else None
+    if project is not None and task is None:
+        await dm(user, "❌ Invalid task number!")
+    return pm, project_name, project, task
+
+async def edit_task_field_reply(session, user, text):
+    pm, project_name, project, task = await flow_task(session, user)
+    if task is None:
+        return None
+    next_state = {'1': 'task_description', '2': 'task_reward', '3': 'task_members'}.get(text.strip())
+    if next_state is not None:
+        return next_state
+    await dm(user, "❌ Invalid choice!")
+    return await finish_edit(pm, project_name, project, user)
+
+async def edit_task_description_prompt(session, user):
+    await dm(user, "📝 Enter the new task description:")
+
+async def edit_task_description_reply(session, user, text):
+    pm, project_name, project, task = await flow_task(session, user)
+    if task is None:
+        return None
+    task.description = text.strip()
+    await dm(user, "✅ Task description updated!")
+    return await finish_edit(pm, project_name, project, user)
+
+async def edit_task_reward_prompt(session, user):
+    await dm(user, "📝 Enter the new reward points:")
+
+async def edit_task_reward_reply(session, user, text):
+    pm, project_name, project, task = await flow_task(session, user)
+    if task is None:
+        return None
+    try:
+        new_reward = int(text.strip())
+        if new_reward > 0:
+            task.reward_points = new_reward
+            await dm(user, "✅ Reward points updated!")
+        else:
+            await dm(user, "❌ Reward points must be positive!")
+    except ValueError:
+        await dm(user, "❌ Please enter a valid number!")
+    return await finish_edit(pm, project_name, project, user)
+
+async def edit_task_members_prompt(session, user):
+    await dm(user, "📝 Enter the new number of members:")
+
+async def edit_task_members_reply(session, user, text):
+    pm, project_name, project, task = await flow_task(session, user)
+    if task is None:
+        return None
+    try:
+        new_members = int(text.strip())
+        if new_members > 0:
+            project.set_max_members(task, new_members)
+            await dm(user, "✅ Number of members updated!")
+        else:
+            await dm(user, "❌ Number of members must be positive!")
+    except ValueError:
+        await dm(user, "❌ Please enter a valid number!")
+    return await finish_edit(pm, project_name, project, user)
+
+# Project deletion: a single typed confirmation
+
+async def delete_confirm_prompt(session, user):
+    await dm(user, "⚠️ **Final Confirmation:** Type 'DELETE' to confirm project deletion:")
+
+async def delete_confirm_reply(session, user, text):
+    if text.strip().upper() != 'DELETE':
+        await dm(user, "❌ Deletion cancelled.")
+        return None
+    
+    pm, project_name, project = await flow_project(session, user)
+    if project is None:
+        return None
+    # Delete the project from data
+    del pm.projects[project_name]
+    pm.mark_project_deleted(project_name)
+    await pm.save()
+    
+    # Try to delete the forum thread
+    forum_thread_deleted = await delete_forum_thread(pm, project_name, project, user)
+    
+    # Send confirmation message
+    embed = discord.Embed(
+        title="✅ Project Deleted Successfully!",
+        description=f"Project **{project_name}** has been permanently deleted.",
+        color=0x00ff00
+    )
+    embed.add_field(name="Project Data", value="✅ Removed from database", inline=True)
+    
+    if forum_thread_deleted:
+        embed.add_field(name="Forum Thread", value="✅ Deleted from forum", inline=True)
+    else:
+        embed.add_field(name="Forum Thread", value="⚠️ Could not delete (may not exist)", inline=True)
+    
+    embed.add_field(name="Deleted by", value=user.name, inline=True)
+    
+    await dm(user, embed=embed)
+    return None
+
+def project_step(handle):
+    """Runs a flow step holding the lock of the project the flow works on"""
+    async def locked(session, user, text):
+        pm = await guilds.get(session.guild_id)
+        async with pm.project_lock(session.data['project']):
+            return await handle(session, user, text)
+    return locked
+
+async def resolve_flow_user(user_id):
+    return bot.get_user(user_id) or await bot.fetch_user(user_id)
+
+# Sessions are stored at the root, since a user's DMs are not tied to one guild
+project_flows = FlowEngine(guilds.storage, guilds.run_io, resolve_flow_user, dm)
+project_flows.register(Flow('create_project', {
+    'name': Step(create_name_reply, 60.0, create_name_prompt),
+    'description': Step(create_description_reply, 120.0, create_description_prompt),
+    'tasks': Step(create_tasks_reply, 120.0, create_tasks_prompt),
+}, 'name', "⏰ Timeout! Project creation cancelled.", "❌ Error creating project"))
+project_flows.register(Flow('edit_project', {
+    'menu': Step(edit_menu_reply, 60.0, edit_menu_prompt),
+    'description': Step(project_step(edit_description_reply), 120.0, edit_description_prompt),
+    'status': Step(project_step(edit_status_reply), 60.0, edit_status_prompt),
+    'task_menu': Step(project_step(edit_task_menu_reply), 60.0, edit_task_menu_prompt),
+    'add_task': Step(project_step(edit_add_task_reply), 120.0, edit_add_task_prompt),
+    'remove_task': Step(project_step(edit_remove_task_reply), 60.0, edit_remove_task_prompt),
+    'edit_task': Step(project_step(edit_task_reply), 60.0, edit_task_prompt),
+    'edit_task_field': Step(project_step(edit_task_field_reply), 60.0),
+    'task_description': Step(project_step(edit_task_description_reply), 120.0, edit_task_description_prompt),
+    'task_reward': Step(project_step(edit_task_reward_reply), 60.0, edit_task_reward_prompt),
+    'task_members': Step(project_step(edit_task_members_reply), 60.0, edit_task_members_prompt),
+}, 'menu', "⏰ Timeout! Project editing cancelled.", "❌ Error editing project"))
+project_flows.register(Flow('delete_project', {
+    'confirm': Step(project_step(delete_confirm_reply), 30.0, delete_confirm_prompt),
+}, 'confirm', "⏰ Timeout! Deletion cancelled.", "❌ Error deleting project"))
+
+async def delete_forum_thread(pm, project_name, project, user):
     """Deletes the forum thread for a project"""
+    forum_updater.forget(pm, project_name)
+    missing_threads.discard((pm.guild_id, project_name))
     try:
-        # Find the projects forum channel
-        forum_channel = None
-        configured_channel_name = pm.forum_channel_name
-        
-        for guild in bot.guilds:
-            # First try to find the configured channel
-            channel = discord.utils.get(guild.channels, name=configured_channel_name)
-            if channel:
-                # Check if it's actually a forum channel
-                if hasattr(channel, 'type') and channel.type == discord.ChannelType.forum:
-                    forum_channel = channel
-                    break
-        
-        if not forum_channel:
-            print(f"Could not find forum channel '{configured_channel_name}' for project deletion: {project_name}")
-            return False
-        
         # Find the thread for this project
-        thread = discord.utils.get(forum_channel.threads, name=f"Project: {project_name}")
+        # Called under the project's lock, and the project is going away
+        thread = await find_project_thread(pm, project_name, project, store=False)
         if not thread:
             print(f"Could not find forum thread for project deletion: {project_name}")
             return False
         
         # Check if bot has permission to delete the thread
-        bot_member = forum_channel.guild.get_member(bot.user.id) if bot.user else None
+        bot_member = thread.guild.me
         if not bot_member:
             print(f"Bot not found in server for project deletion: {project_name}")
             return False
@@ -1575,7 +3068,8 @@ async def delete_forum_thread(project_name, user):
             return False
         
         # Delete the thread
-        await thread.delete()
+        await forum_request(thread, thread.delete)
+        resolved_threads.pop(thread.id, None)
         print(f"Successfully deleted forum thread for project: {project_name}")
         return True
         
@@ -1583,40 +3077,42 @@ async def delete_forum_thread(project_name, user):
         print(f"Error deleting forum thread for project {project_name}: {str(e)}")
         return False
 
-async def create_forum_post(project_name, description, tasks, user):
+async def create_forum_post(pm, project_name, project, user):
     """Creates a forum post for the new project"""
     try:
         # Find the projects forum channel
-        forum_channel = None
+        forum_channel = find_forum_channel(pm)
         configured_channel_name = pm.forum_channel_name
         
-        for guild in bot.guilds:
-            # First try to find the configured channel
-            channel = discord.utils.get(guild.channels, name=configured_channel_name)
-            if channel:
-                # Check if it's actually a forum channel
-                if hasattr(channel, 'type') and channel.type == discord.ChannelType.forum:
-                    forum_channel = channel
-                    break
-                else:
-                    # Channel exists but it's not a forum channel
-                    embed = discord.Embed(
-                        title="⚠️ Invalid Forum Channel",
-                        description=f"Configured channel '{configured_channel_name}' is not a forum channel.",
-                        color=0xff9900
-                    )
-                    embed.add_field(
-                        name="Problem",
-                        value=f"The configured channel '{configured_channel_name}' is a {channel.type.name} channel, not a forum channel.",
-                        inline=False
-                    )
-                    embed.add_field(
-                        name="How to fix",
-                        value="Use `!project forums <forum_channel_name>` to configure a proper forum channel.",
-                        inline=False
-                    )
-                    await user.send(embed=embed)
-                    return
+        if not forum_channel:
+            # Not found by id or by name; work out why for the error message
+            for guild in guilds_of(pm):
+                # First try to find the configured channel
+                channel = discord.utils.get(guild.channels, name=configured_channel_name)
+                if channel:
+                    # Check if it's actually a forum channel
+                    if hasattr(channel, 'type') and channel.type == discord.ChannelType.forum:
+                        forum_channel = channel
+                        break
+                    else:
+                        # Channel exists but it's not a forum channel
+                        embed = discord.Embed(
+                            title="⚠️ Invalid Forum Channel",
+                            description=f"Configured channel '{configured_channel_name}' is not a forum channel.",
+                            color=0xff9900
+                        )
+                        embed.add_field(
+                            name="Problem",
+                            value=f"The configured channel '{configured_channel_name}' is a {channel.type.name} channel, not a forum channel.",
+                            inline=False
+                        )
+                        embed.add_field(
+                            name="How to fix",
+                            value="Use `!project forums <forum_channel_name>` to configure a proper forum channel.",
+                            inline=False
+                        )
+                        await dm(user, embed=embed)
+                        return
         
         if not forum_channel:
             embed = discord.Embed(
@@ -1637,7 +3133,7 @@ async def create_forum_post(project_name, description, tasks, user):
             
             # List available forum channels
             forum_channels = []
-            for guild in bot.guilds:
+            for guild in guilds_of(pm):
                 for channel in guild.channels:
                     if hasattr(channel, 'type') and channel.type == discord.ChannelType.forum:
                         forum_channels.append(f"• {channel.name}")
@@ -1661,20 +3157,20 @@ async def create_forum_post(project_name, description, tasks, user):
                 inline=False
             )
             
-            await user.send(embed=embed)
+            await dm(user, embed=embed)
             return
         
         # Create the forum post
         embed = discord.Embed(
             title=f"📋 New Project: {project_name}",
-            description=description,
+            description=project.description,
             color=0x00ff00
         )
         
         # Add tasks to embed
         tasks_text = ""
-        for i, task in enumerate(tasks, 1):
-            tasks_text += f"{i}. **{task['description']}**\n   • Reward: {task['reward_points']} points\n   • Members needed: {task['max_members']}\n\n"
+        for i, task in enumerate(project.tasks, 1):
+            tasks_text += f"{i}. **{task.description}**\n   • Reward: {task.reward_points} points\n   • Members needed: {task.max_members}\n\n"
         
         embed.add_field(name="📝 Available Tasks", value=tasks_text[:1024], inline=False)
         embed.add_field(name="👤 Created by", value=user.name, inline=True)
@@ -1686,13 +3182,17 @@ async def create_forum_post(project_name, description, tasks, user):
         )
         
         # Create the forum post
-        thread = await forum_channel.create_thread(
+        created = await forum_request(forum_channel, lambda: forum_channel.create_thread(
             name=f"Project: {project_name}",
             content=embed.description,
             embed=embed
-        )
+        ))
         
-        await user.send(f"✅ Forum post created successfully in the projects forum!")
+        missing_threads.discard((pm.guild_id, project_name))
+        # Store the thread and starter message ids so updates go straight to them
+        await store_project_thread(pm, project_name, created.thread.id, created.message.id)
+        
+        await dm(user, f"✅ Forum post created successfully in the projects forum!")
         
     except Exception as e:
         embed = discord.Embed(
@@ -1706,59 +3206,57 @@ async def create_forum_post(project_name, description, tasks, user):
             value="The project is still functional. You can manually create a forum post or contact an administrator.",
             inline=False
         )
-        await user.send(embed=embed)
+        await dm(user, embed=embed)
 
 @bot.command(name='completed')
 async def complete_task(ctx, *, args=None):
     """Marks a task as completed and rewards users"""
+    pm = await get_manager(ctx)
+    if pm is None:
+        return
     if not args:
-        await ctx.send("❌ Please specify project name! Usage: `!completed project <name>`")
+        await reply(ctx, "❌ Please specify project name! Usage: `!completed project <name>`")
         return
     
     # Parse the arguments to handle project names with spaces
     parts = args.split()
     if len(parts) < 2:
-        await ctx.send("❌ Please specify project name! Usage: `!completed project <name>`")
+        await reply(ctx, "❌ Please specify project name! Usage: `!completed project <name>`")
         return
     
     # Check if first word is "project"
     if parts[0].lower() != 'project':
-        await ctx.send("❌ Invalid command. Use `!completed project <name>` to mark a task as completed.")
-        return
-    
-    # Extract project name from the original message
-    original_message = ctx.message.content
-    project_pos = original_message.lower().find(' project ')
-    if project_pos == -1:
-        await ctx.send("❌ Invalid format! Use: `!completed project <name>`")
+        await reply(ctx, "❌ Invalid command. Use `!completed project <name>` to mark a task as completed.")
         return
     
-    # Extract everything after "project "
-    project_name = original_message[project_pos + 9:].strip()
+    # Everything after "project", with the spacing of the name kept as typed
+    project_name = args.strip()[len(parts[0]):].strip()
     
     if not project_name:
-        await ctx.send("❌ Please specify a project name! Usage: `!completed project <name>`")
+        await reply(ctx, "❌ Please specify a project name! Usage: `!completed project <name>`")
         return
     
     # Check if project exists
+    project_name, suggestions = resolve_project_name(pm, project_name)
     if project_name not in pm.projects:
         embed = discord.Embed(
             title="❌ Project Not Found",
             description=f"Project '{project_name}' not found!",
             color=0xff6b6b
         )
+        add_project_suggestions(embed, suggestions)
         embed.add_field(
             name="Available Projects",
             value="Use `!projects` to see all available projects.",
             inline=False
         )
-        await ctx.send(embed=embed)
+        await reply(ctx, embed=embed)
         return
     
-    project = pm.projects[project_name]
+    project = await pm.get_project(project_name)
     
     # Check if project has the new task structure
-    if not project.get('tasks') or not isinstance(project['tasks'], list):
+    if not project.tasks:
         embed = discord.Embed(
             title="❌ Invalid Project Structure",
             description=f"Project '{project_name}' doesn't have predefined tasks.",
@@ -1769,17 +3267,19 @@ async def complete_task(ctx, *, args=None):
             value="Use `!new project` to create a new project with proper task structure.",
             inline=False
         )
-        await ctx.send(embed=embed)
+        await reply(ctx, embed=embed)
         return
     
     # Find tasks assigned to the user
-    user_id = str(ctx.author.id)
+    user_id = ctx.author.id
     user_tasks = []
     
-    for i, task in enumerate(project['tasks'], 1):
-        if isinstance(task, dict) and not task.get('completed', False):
-            if user_id in task.get('assigned_members', []):
-                user_tasks.append((i, task))
+    for assigned_project, task_id in pm.member_tasks(user_id):
+        if assigned_project == project_name:
+            task = project.get_task(task_id)
+            if task is not None and not task.completed and task.is_assigned(user_id):
+                user_tasks.append(task)
+    user_tasks.sort(key=lambda task: task.id)
     
     if not user_tasks:
         embed = discord.Embed(
@@ -1795,10 +3295,8 @@ async def complete_task(ctx, *, args=None):
         
         # Show available tasks they can assign to
         available_tasks = []
-        for i, task in enumerate(project['tasks'], 1):
-            if isinstance(task, dict) and not task.get('completed', False):
-                member_count = len(task.get('assigned_members', []))
-                available_tasks.append(f"{i}. **{task['description']}** (Reward: {task['reward_points']} points, Members: {member_count}/{task['max_members']})")
+        for task in project.open_tasks():
+            available_tasks.append(f"• **{task.description}** (Reward: {task.reward_points} points, Members: {task.member_count}/{task.max_members})")
         
         if available_tasks:
             embed.add_field(
@@ -1807,7 +3305,7 @@ async def complete_task(ctx, *, args=None):
                 inline=False
             )
         
-        await ctx.send(embed=embed)
+        await reply(ctx, embed=embed)
         return
     
     # Show user's assigned tasks
@@ -1818,76 +3316,76 @@ async def complete_task(ctx, *, args=None):
     )
     
     task_list = []
-    for task_num, task in user_tasks:
-        task_list.append(f"{task_num}. **{task['description']}** (Reward: {task['reward_points']} points)")
+    for task_num, task in enumerate(user_tasks, 1):
+        task_list.append(f"{task_num}. **{task.description}** (Reward: {task.reward_points} points)")
     
     embed.add_field(name="Your Assigned Tasks", value="\n".join(task_list), inline=False)
     embed.add_field(name="Instructions", value="Type the number of the task you want to complete, or 'exit' to cancel.", inline=False)
     
-    await ctx.send(embed=embed)
+    await reply(ctx, embed=embed)
     
     # Wait for user response
-    def check(m):
-        return m.author == ctx.author and m.channel == ctx.channel
+    reply_key = ConversationRouter.key(ctx.channel, ctx.author)
     
     try:
-        response = await bot.wait_for('message', timeout=60.0, check=check)
+        response = await conversations.wait(reply_key, 60.0)
         choice = response.content.strip().lower()
         
         if choice == 'exit':
-            await ctx.send("❌ Task completion cancelled.")
+            await reply(ctx, "❌ Task completion cancelled.")
             return
         
         try:
             task_index = int(choice) - 1  # Convert to 0-based index
-            if task_index < 0 or task_index >= len(project['tasks']):
-                await ctx.send("❌ Invalid task number! Please try again.")
+            if task_index < 0 or task_index >= len(user_tasks):
+                await reply(ctx, "❌ Invalid task number! Please try again.")
                 return
             
-            # Find the selected task
-            selected_task = None
-            for i, task in enumerate(project['tasks']):
-                if isinstance(task, dict) and not task.get('completed', False):
-                    if user_id in task.get('assigned_members', []):
-                        if i == task_index:
-                            selected_task = task
-                            break
+            async with pm.project_lock(project_name):
+                # Another member may have completed the task while we waited
+                project = await pm.get_project(project_name)
+                selected_task = project.get_task(user_tasks[task_index].id) if project is not None and project.tasks is not None else None
+                if selected_task and (selected_task.completed or not selected_task.is_assigned(user_id)):
+                    selected_task = None
+                
+                error = None if selected_task else "❌ Invalid task selection! Please try again."
+                if selected_task:
+                    # Mark task as completed
+                    project.complete_task(selected_task, user_id, datetime.now().strftime('%Y-%m-%d %H:%M'))
+                    
+                    # Check if all tasks are completed
+                    if project.is_complete:
+                        project.status = 'Completed'
+                    
+                    pm.mark_project_dirty(project_name, project)
+                    task_id = selected_task.id
+                    rejected = await pm.save_project(project_name)
+                    # The save may have merged in changes made elsewhere
+                    project = pm.projects.get(project_name)
+                    selected_task = project.get_task(task_id) if project is not None and project.tasks is not None else None
+                    if project is None:
+                        error = f"❌ Project '{project_name}' was deleted while you were completing the task."
+                    elif task_id in rejected or selected_task is None:
+                        error = "❌ This task was already completed by someone else."
+                    else:
+                        # Reward all members who worked on the task
+                        assigned_members = selected_task.assigned_members
+                        reward_per_member = selected_task.reward_points // len(assigned_members) if assigned_members else 0
+                        
+                        awards = {str(member_id): reward_per_member for member_id in assigned_members}
+                        
+                        # Awarded under the lock and only once the completing
+                        # write won, so a task is only ever paid out once
+                        await pm.award_points(awards)
             
-            if not selected_task:
-                await ctx.send("❌ Invalid task selection! Please try again.")
+            if error:
+                await reply(ctx, error)
                 return
             
-            # Mark task as completed
-            selected_task['completed'] = True
-            selected_task['completed_by'] = user_id
-            selected_task['completed_at'] = datetime.now().strftime('%Y-%m-%d %H:%M')
-            
-            # Reward all members who worked on the task
-            assigned_members = selected_task.get('assigned_members', [])
-            reward_per_member = selected_task['reward_points'] // len(assigned_members) if assigned_members else 0
-            
-            rewarded_users = []
-            for member_id in assigned_members:
-                if member_id not in pm.user_points:
-                    pm.user_points[member_id] = 0
-                pm.user_points[member_id] += reward_per_member
-                rewarded_users.append(member_id)
-            
-            # Update project progress
-            total_tasks = len(project['tasks'])
-            completed_tasks = sum(1 for task in project['tasks'] if isinstance(task, dict) and task.get('completed', False))
-            project['progress'] = int((completed_tasks / total_tasks) * 100) if total_tasks > 0 else 0
-            
-            # Check if all tasks are completed
-            if completed_tasks == total_tasks:
-                project['status'] = 'Completed'
-            
-            pm.save_data()
-            
             # Create completion embed
             embed = discord.Embed(
                 title="🎉 Task Completed!",
-                description=f"Task **{selected_task['description']}** has been completed in project **{project_name}**!",
+                description=f"Task **{selected_task.description}** has been completed in project **{project_name}**!",
                 color=0x00ff00
             )
             
@@ -1895,112 +3393,93 @@ async def complete_task(ctx, *, args=None):
             member_mentions = []
             for member_id in assigned_members:
                 try:
-                    member = await bot.fetch_user(int(member_id))
+                    member = await bot.fetch_user(member_id)
                     member_mentions.append(member.mention)
                 except:
                     member_mentions.append(f"<@{member_id}>")
             
-            embed.add_field(name="Task", value=selected_task['description'], inline=False)
+            embed.add_field(name="Task", value=selected_task.description, inline=False)
             embed.add_field(name="Completed by", value=ctx.author.mention, inline=True)
             embed.add_field(name="Team Members", value=", ".join(member_mentions), inline=True)
             embed.add_field(name="Reward per Member", value=f"{reward_per_member} points", inline=True)
-            embed.add_field(name="Total Reward", value=f"{selected_task['reward_points']} points", inline=True)
-            embed.add_field(name="Project Progress", value=f"{project['progress']}%", inline=True)
+            embed.add_field(name="Total Reward", value=f"{selected_task.reward_points} points", inline=True)
+            embed.add_field(name="Project Progress", value=f"{project.progress}%", inline=True)
             
-            if project['status'] == 'Completed':
+            if project.status == 'Completed':
                 embed.add_field(name="🎊 Project Status", value="**COMPLETED!** All tasks finished!", inline=False)
             
-            await ctx.send(embed=embed)
+            await reply(ctx, embed=embed)
             
             # Update forum post
-            await update_forum_post(project_name, project)
+            forum_updater.schedule(pm, project_name)
             
         except ValueError:
-            await ctx.send("❌ Please enter a valid number or 'exit' to cancel.")
+            await reply(ctx, "❌ Please enter a valid number or 'exit' to cancel.")
             return
             
     except asyncio.TimeoutError:
-        await ctx.send("⏰ Timeout! Task completion cancelled.")
+        await reply(ctx, "⏰ Timeout! Task completion cancelled.")
         return
 
-async def update_forum_post(project_name, project):
+def build_forum_embed(project_name, project):
+    """Builds the forum post embed for a project"""
+    embed = discord.Embed(
+        title=f"📋 Project: {project_name}",
+        description=project.description or 'No description available',
+        color=0x00ff00 if project.status == 'Completed' else 0x0099ff
+    )
+    
+    # Add project info
+    embed.add_field(name="Status", value=project.status, inline=True)
+    embed.add_field(name="Progress", value=f"{project.progress}%", inline=True)
+    embed.add_field(name="Created by", value=project.created_by or 'Unknown', inline=True)
+    
+    # Add tasks with completion status
+    tasks_text = ""
+    for i, task in enumerate(project.tasks, 1):
+        status_emoji = "✅" if task.completed else "⏳"
+        tasks_text += f"{i}. {status_emoji} **{task.description}**\n   • Reward: {task.reward_points} points\n   • Members: {task.member_count}/{task.max_members}\n\n"
+    
+    if tasks_text:
+        embed.add_field(name="📝 Tasks", value=tasks_text[:1024], inline=False)
+    
+    # Add project members
+    if project.members:
+        members_text = ", ".join(project.members)
+        embed.add_field(name="👥 Team Members", value=members_text[:1024], inline=False)
+    
+    # Add the "How to Join" tip
+    embed.add_field(
+        name="🎯 How to Join",
+        value=f"Use `!project {project_name} assign` to assign yourself to tasks in this project!",
+        inline=False
+    )
+    return embed
+
+async def update_forum_post(pm, project_name, project, embed=None):
     """Updates the forum post for a project"""
     try:
-        # Find the projects forum channel
-        forum_channel = None
-        configured_channel_name = pm.forum_channel_name
-        
-        for guild in bot.guilds:
-            # First try to find the configured channel
-            channel = discord.utils.get(guild.channels, name=configured_channel_name)
-            if channel:
-                # Check if it's actually a forum channel
-                if hasattr(channel, 'type') and channel.type == discord.ChannelType.forum:
-                    forum_channel = channel
-                    break
-        
-        if not forum_channel:
-            print(f"Could not find forum channel '{configured_channel_name}' for project: {project_name}")
-            return False
-        
         # Find the thread for this project
-        thread = discord.utils.get(forum_channel.threads, name=f"Project: {project_name}")
+        thread = await find_project_thread(pm, project_name, project)
         if not thread:
             print(f"Could not find forum thread for project: {project_name}")
             return False
         
-        # Create updated embed
-        embed = discord.Embed(
-            title=f"📋 Project: {project_name}",
-            description=project.get('description', 'No description available'),
-            color=0x00ff00 if project['status'] == 'Completed' else 0x0099ff
-        )
-        
-        # Add project info
-        embed.add_field(name="Status", value=project['status'], inline=True)
-        embed.add_field(name="Progress", value=f"{project['progress']}%", inline=True)
-        embed.add_field(name="Created by", value=project.get('created_by', 'Unknown'), inline=True)
-        
-        # Add tasks with completion status
-        tasks_text = ""
-        for i, task in enumerate(project['tasks'], 1):
-            if isinstance(task, dict):
-                status_emoji = "✅" if task.get('completed', False) else "⏳"
-                member_count = len(task.get('assigned_members', []))
-                tasks_text += f"{i}. {status_emoji} **{task['description']}**\n   • Reward: {task['reward_points']} points\n   • Members: {member_count}/{task['max_members']}\n\n"
-        
-        if tasks_text:
-            embed.add_field(name="📝 Tasks", value=tasks_text[:1024], inline=False)
-        
-        # Add project members
-        if project.get('members'):
-            members_text = ", ".join(project['members'])
-            embed.add_field(name="👥 Team Members", value=members_text[:1024], inline=False)
+        embed = embed or build_forum_embed(project_name, project)
         
-        # Add the "How to Join" tip
-        embed.add_field(
-            name="🎯 How to Join",
-            value=f"Use `!project {project_name} assign` to assign yourself to tasks in this project!",
-            inline=False
-        )
-        
-        # Try to find and edit the original post (first message in thread)
+        # Edit the original post (the thread's starter message) by id, without fetching it
         try:
-            # Get the first message in the thread (the original post)
-            async for message in thread.history(limit=1, oldest_first=True):
-                if message.author == bot.user:  # Make sure it's our bot's message
-                    await message.edit(embed=embed)
-                    print(f"Successfully updated original forum post for project: {project_name}")
-                    return True
-                else:
-                    # If the first message isn't from our bot, send a new update
-                    await thread.send(embed=embed)
-                    print(f"Sent new update message for project: {project_name}")
-                    return True
+            # Messages in archived threads can't be edited
+            if thread.archived:
+                await forum_request(thread, lambda: thread.edit(archived=False))
+            message = thread.get_partial_message(project.message_id or thread.id)
+            await forum_request(thread, lambda: message.edit(embed=embed))
+            print(f"Successfully updated original forum post for project: {project_name}")
+            return True
         except Exception as e:
             print(f"Error editing original post for project {project_name}: {str(e)}")
             # Fallback: send a new message if editing fails
-            await thread.send(embed=embed)
+            await forum_request(thread, lambda: thread.send(embed=embed))
             print(f"Sent fallback update message for project: {project_name}")
             return True
         
@@ -2008,6 +3487,68 @@ async def update_forum_post(project_name, project):
         print(f"Error updating forum post for project {project_name}: {str(e)}")
         return False
 
+class ForumUpdater:
+    """Coalesces forum post updates per project.
+
+    Handlers call schedule() and return right away. The post is rendered
+    from the project's latest state once the debounce window has passed, so
+    a burst of changes costs one edit, and the edit is skipped when the
+    embed is unchanged since the last one sent. A project never has two
+    edits in flight, which keeps each thread's rate-limit bucket to one
+    request at a time, and a semaphore caps edits across threads.
+    """
+    def __init__(self, delay, concurrency):
+        self.delay = delay
+        self.concurrency = concurrency
+        self._semaphore = None
+        self._pending = {}  # (guild id, project name) -> update task
+        self._rerun = set()  # projects changed while their edit was running
+        self._rendered = {}  # (guild id, project name) -> hash of the embed last sent
+    
+    def schedule(self, pm, project_name):
+        """Queues an update of a project's forum post"""
+        key = (pm.guild_id, project_name)
+        if key in self._pending:
+            self._rerun.add(key)
+            return
+        self._pending[key] = asyncio.create_task(self._run(pm, project_name, key))
+    
+    def forget(self, pm, project_name):
+        """Drops the last rendered state of a project whose post is going away"""
+        self._rendered.pop((pm.guild_id, project_name), None)
+    
+    async def _run(self, pm, project_name, key):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        try:
+            while True:
+                await asyncio.sleep(self.delay)
+                # Changes made up to now are covered by this render
+                self._rerun.discard(key)
+                async with self._semaphore:
+                    await self._update(pm, project_name, key)
+                if key not in self._rerun:
+                    break
+        except Exception as e:
+            print(f"Error in forum updater for project {project_name}: {str(e)}")
+        finally:
+            del self._pending[key]
+            self._rerun.discard(key)
+    
+    async def _update(self, pm, project_name, key):
+        project = await pm.get_project(project_name)
+        if project is None or project.tasks is None:
+            self._rendered.pop(key, None)
+            return
+        embed = build_forum_embed(project_name, project)
+        digest = hash(json.dumps(embed.to_dict(), sort_keys=True, default=str))
+        if self._rendered.get(key) == digest:
+            return
+        if await update_forum_post(pm, project_name, project, embed):
+            self._rendered[key] = digest
+
+forum_updater = ForumUpdater(FORUM_UPDATE_DELAY_MS / 1000, FORUM_UPDATE_CONCURRENCY)
+
 @bot.command(name='forums')
 async def forums_command(ctx, *, channel_name=None):
     """Configures the forum channel for project posts"""
@@ -2015,10 +3556,13 @@ async def forums_command(ctx, *, channel_name=None):
 
 async def configure_forum_channel(ctx, channel_name):
     """Configures the forum channel for project posts"""
+    pm = await get_manager(ctx)
+    if pm is None:
+        return
     # Check if user has required roles
     user_roles = [role.name for role in ctx.author.roles]
     if not pm.has_permission(user_roles, 'forum_config'):
-        await ctx.send("❌ You don't have permission to configure forum channels. Contact an administrator to configure permissions.")
+        await reply(ctx, "❌ You don't have permission to configure forum channels. Contact an administrator to configure permissions.")
         return
     
     if not channel_name:
@@ -2034,7 +3578,7 @@ async def configure_forum_channel(ctx, channel_name):
         # Check if channel exists and is a forum channel
         channel_exists = False
         is_forum_channel = False
-        for guild in bot.guilds:
+        for guild in guilds_of(pm):
             channel = discord.utils.get(guild.channels, name=pm.forum_channel_name)
             if channel:
                 channel_exists = True
@@ -2060,12 +3604,12 @@ async def configure_forum_channel(ctx, channel_name):
             inline=False
         )
         
-        await ctx.send(embed=embed)
+        await reply(ctx, embed=embed)
         return
     
     # Validate channel name length
     if len(channel_name) > 100:
-        await ctx.send("❌ Channel name is too long! Please use a shorter name (max 100 characters).")
+        await reply(ctx, "❌ Channel name is too long! Please use a shorter name (max 100 characters).")
         return
     
     # Check if the channel exists and is a forum channel
@@ -2073,7 +3617,7 @@ async def configure_forum_channel(ctx, channel_name):
     is_forum_channel = False
     found_channel = None
     
-    for guild in bot.guilds:
+    for guild in guilds_of(pm):
         channel = discord.utils.get(guild.channels, name=channel_name)
         if channel:
             channel_exists = True
@@ -2096,7 +3640,7 @@ async def configure_forum_channel(ctx, channel_name):
         
         # List available forum channels
         forum_channels = []
-        for guild in bot.guilds:
+        for guild in guilds_of(pm):
             for channel in guild.channels:
                 if hasattr(channel, 'type') and channel.type == discord.ChannelType.forum:
                     forum_channels.append(f"• {channel.name}")
@@ -2120,7 +3664,7 @@ async def configure_forum_channel(ctx, channel_name):
             inline=False
         )
         
-        await ctx.send(embed=embed)
+        await reply(ctx, embed=embed)
         return
     
     if not is_forum_channel:
@@ -2150,7 +3694,7 @@ async def configure_forum_channel(ctx, channel_name):
             inline=False
         )
         
-        await ctx.send(embed=embed)
+        await reply(ctx, embed=embed)
         return
     
     # Check if bot has required permissions in the forum channel
@@ -2160,7 +3704,7 @@ async def configure_forum_channel(ctx, channel_name):
             description="Channel was found but is not accessible.",
             color=0xff6b6b
         )
-        await ctx.send(embed=embed)
+        await reply(ctx, embed=embed)
         return
     
     bot_member = found_channel.guild.get_member(bot.user.id) if bot.user else None
@@ -2170,7 +3714,7 @@ async def configure_forum_channel(ctx, channel_name):
             description="The bot is not a member of this server.",
             color=0xff6b6b
         )
-        await ctx.send(embed=embed)
+        await reply(ctx, embed=embed)
         return
     
     permissions = found_channel.permissions_for(bot_member)
@@ -2209,13 +3753,18 @@ async def configure_forum_channel(ctx, channel_name):
             value="1. Right-click the forum channel\n2. Select 'Edit Channel'\n3. Go to 'Permissions' tab\n4. Add the bot role\n5. Grant the required permissions\n6. Save changes",
             inline=False
         )
-        await ctx.send(embed=embed)
+        await reply(ctx, embed=embed)
         return
     
     # Update the forum channel name
     old_channel = pm.forum_channel_name
     pm.forum_channel_name = channel_name
-    pm.save_data()
+    pm.forum_channel_id = found_channel.id
+    # Threads missing from the old forum may be in the new one
+    for location in [location for location in missing_threads if location[0] == pm.guild_id]:
+        missing_threads.discard(location)
+    pm.mark_dirty('forum_channel')
+    await pm.save()
     
     embed = discord.Embed(
         title="✅ Forum Channel Updated!",
@@ -2232,22 +3781,25 @@ async def configure_forum_channel(ctx, channel_name):
         inline=False
     )
     
-    await ctx.send(embed=embed)
+    await reply(ctx, embed=embed)
 
 @bot.command(name='perm')
 async def configure_permissions(ctx, action=None, *, role_name=None):
     """Configures role permissions for restricted commands"""
+    pm = await get_manager(ctx)
+    if pm is None:
+        return
     # Check if user is server owner
     if ctx.author.id != ctx.guild.owner_id:
-        await ctx.send("❌ Only the server owner can configure permissions!")
+        await reply(ctx, "❌ Only the server owner can configure permissions!")
         return
     
     if not action:
-        await ctx.send("❌ Please specify an action! Usage: `!perm <action> <role>`\nActions: `add`, `remove`, `view`")
+        await reply(ctx, "❌ Please specify an action! Usage: `!perm <action> <role>`\nActions: `add`, `remove`, `view`")
         return
     
     if not role_name or role_name.strip() == "":
-        await ctx.send("❌ Please specify a role name! Usage: `!perm <action> <role_name>`")
+        await reply(ctx, "❌ Please specify a role name! Usage: `!perm <action> <role_name>`")
         return
     
     action = action.lower().strip()
@@ -2256,7 +3808,7 @@ async def configure_permissions(ctx, action=None, *, role_name=None):
     # Check if the role exists
     role = discord.utils.get(ctx.guild.roles, name=role_name)
     if not role:
-        await ctx.send(f"❌ Role '{role_name}' not found!")
+        await reply(ctx, f"❌ Role '{role_name}' not found!")
         return
     
     if action == 'view':
@@ -2286,7 +3838,7 @@ async def configure_permissions(ctx, action=None, *, role_name=None):
             inline=False
         )
         
-        await ctx.send(embed=embed)
+        await reply(ctx, embed=embed)
         return
     
     elif action == 'add':
@@ -2306,7 +3858,8 @@ async def configure_permissions(ctx, action=None, *, role_name=None):
                 color=0x0099ff
             )
         else:
-            pm.save_data()
+            pm.mark_dirty('permissions')
+            await pm.save()
             embed = discord.Embed(
                 title="✅ Permissions Granted!",
                 description=f"All permissions granted to role: **{role_name}**",
@@ -2316,7 +3869,7 @@ async def configure_permissions(ctx, action=None, *, role_name=None):
                 embed.add_field(name="Permission", value=change, inline=True)
         
         embed.add_field(name="Updated by", value=ctx.author.mention, inline=True)
-        await ctx.send(embed=embed)
+        await reply(ctx, embed=embed)
         return
     
     elif action == 'remove':
@@ -2336,7 +3889,8 @@ async def configure_permissions(ctx, action=None, *, role_name=None):
                 color=0x0099ff
             )
         else:
-            pm.save_data()
+            pm.mark_dirty('permissions')
+            await pm.save()
             embed = discord.Embed(
                 title="✅ Permissions Removed!",
                 description=f"All permissions removed from role: **{role_name}**",
@@ -2346,23 +3900,140 @@ async def configure_permissions(ctx, action=None, *, role_name=None):
                 embed.add_field(name="Permission", value=change, inline=True)
         
         embed.add_field(name="Updated by", value=ctx.author.mention, inline=True)
-        await ctx.send(embed=embed)
+        await reply(ctx, embed=embed)
         return
     
     else:
-        await ctx.send("❌ Invalid action! Available actions: `add`, `remove`, `view`")
+        await reply(ctx, "❌ Invalid action! Available actions: `add`, `remove`, `view`")
+
+# Slash commands; each runs the prefix command of the same name
+
+role_search = {}  # guild id -> CompletionIndex of assignable role names by role id
+
+def guild_role_search(guild):
+    """Returns the role name index of a guild, building it on first use"""
+    index = role_search.get(guild.id)
+    if index is None:
+        index = CompletionIndex()
+        index.rebuild({role.id: (role.name,) for role in guild.roles if not role.is_default() and not role.managed})
+        role_search[guild.id] = index
+    return index
+
+def update_role_search(role, deleted=False):
+    index = role_search.get(role.guild.id)
+    if index is None:
+        return
+    if deleted or role.managed or role.is_default():
+        index.discard(role.id)
+    else:
+        index.set(role.id, (role.name,))
+
+@bot.event
+async def on_guild_role_create(role):
+    update_role_search(role)
+
+@bot.event
+async def on_guild_role_update(before, after):
+    update_role_search(after)
+
+@bot.event
+async def on_guild_role_delete(role):
+    update_role_search(role, deleted=True)
+
+async def project_autocomplete(interaction: discord.Interaction, current: str) -> list[app_commands.Choice[str]]:
+    """Autocomplete for project names, also found by their task descriptions"""
+    if interaction.guild is None:
+        return []
+    pm = await guilds.get(interaction.guild.id)
+    choices = [app_commands.Choice(name=project_name, value=project_name) for project_name, _ in pm.project_search.search(current)]
+    listed = {choice.value for choice in choices}
+    for description, project_name in pm.task_search.search(current):
+        if len(choices) >= MAX_CHOICES:
+            break
+        if project_name in listed:
+            continue
+        listed.add(project_name)
+        choices.append(app_commands.Choice(name=f"{project_name} — {description}"[:100], value=project_name))
+    return choices
+
+async def role_autocomplete(interaction: discord.Interaction, current: str) -> list[app_commands.Choice[str]]:
+    """Autocomplete for role names"""
+    if interaction.guild is None:
+        return []
+    role_names = dict.fromkeys(role_name for role_name, _ in guild_role_search(interaction.guild).search(current))
+    return [app_commands.Choice(name=role_name, value=role_name) for role_name in role_names]
+
+async def slash_context(interaction):
+    """Acknowledges a slash command and returns a context to run it with"""
+    # Replies go through the outbound queue and can take longer than the 3 seconds Discord allows
+    await interaction.response.defer()
+    return await commands.Context.from_interaction(interaction)
+
+@bot.tree.command(name='project', description="Shows a project or assigns you to one of its tasks")
+@app_commands.describe(name="Project name", action="What to do with the project")
+@app_commands.choices(action=[app_commands.Choice(name=action, value=action) for action in ['dashboard', 'details', 'assign']])
+@app_commands.autocomplete(name=project_autocomplete)
+async def project_slash(interaction: discord.Interaction, name: str, action: str):
+    ctx = await slash_context(interaction)
+    await ctx.invoke(project_command, args=f"{name} {action}")
+
+@bot.tree.command(name='completed', description="Marks a task of a project as completed")
+@app_commands.describe(project="Project name")
+@app_commands.autocomplete(project=project_autocomplete)
+async def completed_slash(interaction: discord.Interaction, project: str):
+    ctx = await slash_context(interaction)
+    await ctx.invoke(complete_task, args=f"project {project}")
+
+@bot.tree.command(name='role', description="Assigns or removes one of your roles")
+@app_commands.describe(action="Assign or remove", role="Role name")
+@app_commands.choices(action=[app_commands.Choice(name=action, value=action) for action in ['assign', 'remove']])
+@app_commands.autocomplete(role=role_autocomplete)
+async def role_slash(interaction: discord.Interaction, action: str, role: str):
+    ctx = await slash_context(interaction)
+    await ctx.invoke(role_command, action, role_name=role)
+
+@bot.tree.command(name='shop', description="Shows the shop or adds an item to it")
+@app_commands.describe(action="Leave empty to show the shop", item="Name of the item to add", price="Price in points")
+@app_commands.choices(action=[app_commands.Choice(name='add', value='add')])
+async def shop_slash(interaction: discord.Interaction, action: str = None, item: str = None, price: int = None):
+    ctx = await slash_context(interaction)
+    item_info = f"{item} {price}" if item and price is not None else item
+    await ctx.invoke(shop_command, action, item_info=item_info)
+
+@bot.tree.command(name='perm', description="Configures role permissions for restricted commands")
+@app_commands.describe(action="What to do", role="Role name")
+@app_commands.choices(action=[app_commands.Choice(name=action, value=action) for action in ['add', 'remove', 'view']])
+@app_commands.autocomplete(role=role_autocomplete)
+async def perm_slash(interaction: discord.Interaction, action: str, role: str):
+    ctx = await slash_context(interaction)
+    await ctx.invoke(configure_permissions, action, role_name=role)
 
 # Error handling
 @bot.event
 async def on_command_error(ctx, error):
     if isinstance(error, commands.MissingRequiredArgument):
-        await ctx.send("❌ Missing required argument. Use `!commands` to see command usage.")
+        await reply(ctx, "❌ Missing required argument. Use `!commands` to see command usage.")
     elif isinstance(error, commands.CommandNotFound):
-        await ctx.send("❌ Command not found. Use `!commands` to see available commands.")
+        suggestions = command_suggestions(ctx.invoked_with or '')
+        if suggestions:
+            embed = discord.Embed(
+                title="❌ Command Not Found",
+                description=f"Command `{ctx.prefix}{ctx.invoked_with}` not found.",
+                color=0xff6b6b
+            )
+            embed.add_field(
+                name="💡 Did you mean?",
+                value="\n".join(f"• `{ctx.prefix}{suggestion}`" for suggestion in suggestions),
+                inline=False
+            )
+            embed.add_field(name="📚 Help", value="Use `!commands` to see all available commands.", inline=False)
+            await reply(ctx, embed=embed)
+        else:
+            await reply(ctx, "❌ Command not found. Use `!commands` to see available commands.")
     elif isinstance(error, commands.BadArgument):
-        await ctx.send("❌ Invalid argument provided. Use `!commands` to see command usage.")
+        await reply(ctx, "❌ Invalid argument provided. Use `!commands` to see command usage.")
     else:
-        await ctx.send(f"❌ An error occurred: {str(error)}")
+        await reply(ctx, f"❌ An error occurred: {str(error)}")
 
 # Run the bot
 if __name__ == "__main__":
@@ -0,0 +1,389 @@
+import json
+import zlib
+from enum import IntEnum
+
+# Project fields with a slot of their own; anything else a document carries
+# (e.g. fields written by the dashboard) is kept in `extra` and saved back
+PROJECT_FIELDS = ('description', 'status', 'progress', 'created', 'created_by', 'tasks', 'members', 'task_count', 'next_task_id',
+                  'thread_id', 'message_id', 'version')
+# Fields derived from the task list, recomputed after a merge
+DERIVED_PROJECT_FIELDS = ('progress', 'task_count', 'next_task_id', 'version')
+TASK_FIELDS = ('id', 'description', 'reward_points', 'max_members', 'assigned_members', 'completed', 'completed_by', 'completed_at')
+
+
+def pack_document(document):
+    """Compresses a document into bytes, for copies that are rarely read"""
+    return zlib.compress(json.dumps(document, separators=(',', ':'), default=str).encode(), 1)
+
+
+def unpack_document(packed):
+    return json.loads(zlib.decompress(packed))
+
+
+class TaskStatus(IntEnum):
+    OPEN = 0
+    COMPLETED = 1
+
+
+def member_id(value):
+    """Converts a stored member id to the int used in memory"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return value
+
+
+def _extra(document, fields):
+    extra = {field: value for field, value in document.items() if field not in fields}
+    return extra or None
+
+
+class Task:
+    """A task of a project; assigned members are kept as a tuple of int ids"""
+    __slots__ = ('id', 'description', 'reward_points', 'max_members', 'assigned_members',
+                 'status', 'completed_by', 'completed_at', 'extra')
+
+    def __init__(self, description, reward_points, max_members, assigned_members=(),
+                 status=TaskStatus.OPEN, completed_by=None, completed_at=None, extra=None, id=None):
+        # Stable within its project, unlike the task's position in the list
+        self.id = id
+        self.description = description
+        self.reward_points = reward_points
+        self.max_members = max_members
+        self.assigned_members = tuple(assigned_members)
+        self.status = status
+        self.completed_by = completed_by
+        self.completed_at = completed_at
+        self.extra = extra
+
+    @property
+    def completed(self):
+        return self.status == TaskStatus.COMPLETED
+
+    @property
+    def member_count(self):
+        return len(self.assigned_members)
+
+    @property
+    def is_open(self):
+        """Whether the task is not completed and still has a free slot"""
+        return self.status == TaskStatus.OPEN and len(self.assigned_members) < self.max_members
+
+    def is_assigned(self, member):
+        return member in self.assigned_members
+
+    def assign(self, member):
+        self.assigned_members += (member,)
+
+    def complete(self, member, completed_at):
+        self.status = TaskStatus.COMPLETED
+        self.completed_by = member
+        self.completed_at = completed_at
+
+    @classmethod
+    def from_document(cls, document):
+        """Builds a task from its stored form"""
+        if not isinstance(document, dict):
+            # Projects from before structured tasks stored bare descriptions;
+            # they can be shown but never assigned
+            return cls(str(document), 0, 0)
+        completed_by = document.get('completed_by')
+        return cls(
+            document.get('description', ''),
+            document.get('reward_points', 0),
+            document.get('max_members', 0),
+            (member_id(member) for member in document.get('assigned_members') or ()),
+            TaskStatus.COMPLETED if document.get('completed', False) else TaskStatus.OPEN,
+            member_id(completed_by) if completed_by is not None else None,
+            document.get('completed_at'),
+            _extra(document, TASK_FIELDS),
+            document.get('id')
+        )
+
+    def to_document(self):
+        """Returns the task in its stored form, with member ids as strings"""
+        document = dict(self.extra) if self.extra else {}
+        document.update({
+            'id': self.id,
+            'description': self.description,
+            'reward_points': self.reward_points,
+            'max_members': self.max_members,
+            'assigned_members': [str(member) for member in self.assigned_members],
+            'completed': self.completed
+        })
+        if self.completed_by is not None:
+            document['completed_by'] = str(self.completed_by)
+        if self.completed_at is not None:
+            document['completed_at'] = self.completed_at
+        return document
+
+
+class Project:
+    """A project; `tasks` is None for a summary whose task list is not loaded"""
+    __slots__ = ('description', 'status', 'progress', 'created', 'created_by',
+                 'tasks', 'members', '_task_count', 'next_task_id', '_tasks_by_id',
+                 '_completed_count', '_open_task_ids', 'thread_id', 'message_id', 'version', '_base', 'extra')
+
+    def __init__(self, description='', status='In Progress', progress=0, created=None,
+                 created_by=None, tasks=None, members=None, task_count=0, extra=None, next_task_id=1,
+                 thread_id=None, message_id=None, version=0):
+        self.description = description
+        self.status = status
+        self.progress = progress
+        self.created = created
+        self.created_by = created_by
+        self.tasks = tasks
+        self.members = members if members is not None else []
+        self._task_count = task_count
+        self.next_task_id = next_task_id
+        self._tasks_by_id = None
+        # Maintained on every task mutation so progress and the open-task
+        # menu never scan the task list
+        self._completed_count = 0
+        self._open_task_ids = None
+        # Forum thread of the project and its starter message
+        self.thread_id = thread_id
+        self.message_id = message_id
+        # Stored version this copy is based on; every write stores version + 1
+        self.version = version
+        # Stored document this copy was read at, the base for merging its
+        # changes onto a concurrent write; None if unknown
+        self._base = None
+        self.extra = extra
+        if tasks is not None:
+            self._index_tasks()
+
+    @property
+    def base(self):
+        return unpack_document(self._base) if self._base is not None else None
+
+    @base.setter
+    def base(self, document):
+        # Kept compressed, as it is only read when a write has to be merged
+        self._base = pack_document(document) if document is not None else None
+
+    def _index_tasks(self):
+        # Tasks stored before ids existed are numbered in list order
+        next_task_id = max([self.next_task_id] + [task.id + 1 for task in self.tasks if task.id is not None])
+        for task in self.tasks:
+            if task.id is None:
+                task.id = next_task_id
+                next_task_id += 1
+        self.next_task_id = next_task_id
+        self._tasks_by_id = {task.id: task for task in self.tasks}
+        self._completed_count = sum(1 for task in self.tasks if task.completed)
+        self._open_task_ids = {task.id for task in self.tasks if task.is_open}
+
+    @property
+    def is_loaded(self):
+        return self.tasks is not None
+
+    @property
+    def task_count(self):
+        return len(self.tasks) if self.tasks is not None else self._task_count
+
+    @property
+    def completed_count(self):
+        return self._completed_count
+
+    @property
+    def is_complete(self):
+        """Whether every task of the project is completed"""
+        return self._completed_count == len(self.tasks)
+
+    @property
+    def has_open_tasks(self):
+        return bool(self._open_task_ids)
+
+    def open_tasks(self):
+        """Returns the tasks that can still be assigned, in list order"""
+        return [self._tasks_by_id[task_id] for task_id in sorted(self._open_task_ids)]
+
+    def get_task(self, task_id):
+        """Returns the task with the given id, or None"""
+        return self._tasks_by_id.get(task_id)
+
+    def add_task(self, task):
+        """Appends a task, giving it the next free id"""
+        task.id = self.next_task_id
+        self.next_task_id += 1
+        self.tasks.append(task)
+        self._tasks_by_id[task.id] = task
+        if task.completed:
+            self._completed_count += 1
+        self._update_open(task)
+        self.update_progress()
+        return task
+
+    def remove_task(self, index):
+        """Removes and returns the task at a list position"""
+        task = self.tasks.pop(index)
+        del self._tasks_by_id[task.id]
+        if task.completed:
+            self._completed_count -= 1
+        self._open_task_ids.discard(task.id)
+        self.update_progress()
+        return task
+
+    def assign_member(self, task, member):
+        """Assigns a member to one of the project's tasks"""
+        task.assign(member)
+        self._update_open(task)
+
+    def complete_task(self, task, member, completed_at):
+        """Marks one of the project's tasks as completed"""
+        if not task.completed:
+            self._completed_count += 1
+        task.complete(member, completed_at)
+        self._update_open(task)
+        self.update_progress()
+
+    def set_max_members(self, task, max_members):
+        """Changes how many members one of the project's tasks takes"""
+        task.max_members = max_members
+        self._update_open(task)
+
+    def _update_open(self, task):
+        if task.is_open:
+            self._open_task_ids.add(task.id)
+        else:
+            self._open_task_ids.discard(task.id)
+
+    def update_progress(self):
+        """Sets the progress percentage from the completed-task count"""
+        total_tasks = len(self.tasks)
+        self.progress = int((self._completed_count / total_tasks) * 100) if total_tasks > 0 else 0
+        return self._completed_count
+
+    def summary(self):
+        """Returns a copy without the task list, as kept for unloaded projects"""
+        return Project(status=self.status, progress=self.progress, task_count=self.task_count)
+
+    @classmethod
+    def from_document(cls, document):
+        """Builds a project from its stored form or from a summary of it"""
+        tasks = document.get('tasks')
+        return cls(
+            document.get('description', ''),
+            document.get('status', 'In Progress'),
+            document.get('progress', 0),
+            document.get('created'),
+            document.get('created_by'),
+            [Task.from_document(task) for task in tasks] if isinstance(tasks, list) else None,
+            list(document.get('members') or ()),
+            document.get('task_count', 0),
+            _extra(document, PROJECT_FIELDS),
+            document.get('next_task_id', 1),
+            document.get('thread_id'),
+            document.get('message_id'),
+            document.get('version', 0)
+        )
+
+    def to_document(self):
+        """Returns the full project in its stored form"""
+        tasks = self.tasks or []
+        document = dict(self.extra) if self.extra else {}
+        document.update({
+            'description': self.description,
+            'status': self.status,
+            'progress': self.progress,
+            'tasks': [task.to_document() for task in tasks],
+            'members': list(self.members),
+            'task_count': len(tasks),
+            'next_task_id': self.next_task_id,
+            'version': self.version
+        })
+        if self.created is not None:
+            document['created'] = self.created
+        if self.created_by is not None:
+            document['created_by'] = self.created_by
+        if self.thread_id is not None:
+            document['thread_id'] = self.thread_id
+        if self.message_id is not None:
+            document['message_id'] = self.message_id
+        return document
+
+
+def _merge_list(base, ours, theirs):
+    """Their list, less the items we removed since base, plus the items we added"""
+    base = base or []
+    ours = ours or []
+    merged = [item for item in theirs or [] if item in ours or item not in base]
+    merged += [item for item in ours if item not in base and item not in merged]
+    return merged
+
+
+def _merge_fields(base, ours, theirs, list_fields, skip=()):
+    merged = dict(theirs)
+    for field in (set(base) | set(ours)) - set(skip):
+        if field in list_fields:
+            merged[field] = _merge_list(base.get(field), ours.get(field), theirs.get(field))
+        elif ours.get(field) != base.get(field):
+            if field in ours:
+                merged[field] = ours[field]
+            else:
+                merged.pop(field, None)
+    return merged
+
+
+def _task_conflicts(base, ours, theirs, merged):
+    """Whether our changes to a task are invalid against their version of it"""
+    if ours.get('completed') and not base.get('completed') and theirs.get('completed'):
+        return True
+    added = set(ours.get('assigned_members') or ()) - set(base.get('assigned_members') or ())
+    return bool(added) and (theirs.get('completed', False) or
+                            len(merged.get('assigned_members') or ()) > merged.get('max_members', 0))
+
+
+def merge_project_documents(base, ours, theirs):
+    """Applies our changes to a project since `base` onto the stored `theirs`.
+
+    Fields we changed take our value and the others keep theirs. Member
+    lists keep both sides' additions and removals. Tasks are matched by id
+    and merged field by field the same way. A task one side removed stays
+    removed. Tasks we added keep their id unless the other side used it.
+    Task lists from before task ids can't be matched, so ours is kept.
+
+    Returns (merged, rejected), where rejected holds the ids of tasks whose
+    changes no longer apply: a task completed on both sides, members added
+    to a task completed or filled up meanwhile, or a task removed by them.
+    Those tasks keep their stored state.
+    """
+    base = base or {}
+    if any(not isinstance(task, dict) or task.get('id') is None
+           for task in (base.get('tasks') or []) + (theirs.get('tasks') or [])):
+        return dict(ours), set()
+    merged = _merge_fields(base, ours, theirs, ('members',), ('tasks',) + DERIVED_PROJECT_FIELDS)
+    base_tasks = {task['id']: task for task in base.get('tasks') or () if isinstance(task, dict)}
+    our_tasks = {task['id']: task for task in ours.get('tasks') or () if isinstance(task, dict)}
+    tasks = []
+    rejected = set()
+    for task in theirs.get('tasks') or ():
+        task_id = task['id']
+        if task_id in base_tasks:
+            if task_id not in our_tasks:
+                continue
+            if our_tasks[task_id] != base_tasks[task_id]:
+                merged_task = _merge_fields(base_tasks[task_id], our_tasks[task_id], task, ('assigned_members',))
+                if _task_conflicts(base_tasks[task_id], our_tasks[task_id], task, merged_task):
+                    rejected.add(task_id)
+                else:
+                    task = merged_task
+        tasks.append(task)
+    their_ids = {task['id'] for task in theirs.get('tasks') or ()}
+    rejected.update(task_id for task_id, task in our_tasks.items()
+                    if task_id in base_tasks and task_id not in their_ids and task != base_tasks[task_id])
+    used_ids = {task['id'] for task in tasks}
+    next_task_id = max([theirs.get('next_task_id', 1), ours.get('next_task_id', 1)] + [task_id + 1 for task_id in used_ids])
+    for task_id, task in our_tasks.items():
+        if task_id in base_tasks:
+            continue
+        if task_id in used_ids:
+            if task in tasks:
+                continue
+            task = dict(task, id=next_task_id)
+            next_task_id += 1
+        tasks.append(task)
+    merged['tasks'] = tasks
+    merged['next_task_id'] = next_task_id
+    return merged, rejected
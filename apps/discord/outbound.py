@@ -0,0 +1,120 @@
+import asyncio
+import heapq
+import itertools
+import time
+from enum import IntEnum
+
+
+class Priority(IntEnum):
+    """Outbound request classes; lower values are sent first"""
+    INTERACTIVE = 0
+    DM_FLOW = 1
+    FORUM_SYNC = 2
+    WELCOME = 3
+
+
+class Dispatcher:
+    """Queue for outbound Discord REST calls, served by priority.
+
+    Requests are started highest priority first, up to `concurrency` at a
+    time overall and `bucket_concurrency` at a time per bucket (a channel,
+    thread or DM), so bulk traffic such as welcomes and forum edits can't
+    hold up replies to commands; one slot is kept free of background traffic
+    for them. A request whose bucket is busy waits in that
+    bucket's own queue and doesn't block requests for other buckets.
+    """
+
+    def __init__(self, concurrency, bucket_concurrency, slow_wait=None):
+        self.concurrency = concurrency
+        self.bucket_concurrency = bucket_concurrency
+        self.slow_wait = slow_wait
+        # Forum sync and welcomes leave a slot free for replies and DM flows
+        self._background_limit = max(1, concurrency - 1)
+        self._queue = []  # (priority, seq, bucket, factory, future, queued at)
+        self._waiting = {}  # bucket -> heap of requests held back by a busy bucket
+        self._bucket_in_flight = {}
+        self._in_flight = 0
+        self._seq = itertools.count()
+        self._depth = {priority: 0 for priority in Priority}
+        self._sent = {priority: 0 for priority in Priority}
+        self._wait_total = {priority: 0.0 for priority in Priority}
+        self._wait_max = {priority: 0.0 for priority in Priority}
+
+    async def submit(self, priority, bucket, factory):
+        """Queues factory() and returns its result once it has been sent"""
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._seq), bucket, factory, future, time.monotonic()))
+        self._depth[priority] += 1
+        self._dispatch()
+        return await future
+
+    def _dispatch(self):
+        while self._queue and self._in_flight < self.concurrency:
+            if self._queue[0][0] >= Priority.FORUM_SYNC and self._in_flight >= self._background_limit:
+                break
+            request = heapq.heappop(self._queue)
+            bucket = request[2]
+            if self._bucket_in_flight.get(bucket, 0) >= self.bucket_concurrency:
+                heapq.heappush(self._waiting.setdefault(bucket, []), request)
+                continue
+            self._start(request)
+
+    def _start(self, request):
+        priority, _, bucket, factory, future, queued_at = request
+        self._depth[priority] -= 1
+        if future.cancelled():
+            # No send will finish to release the bucket's next request
+            self._promote(bucket)
+            return
+        waited = time.monotonic() - queued_at
+        self._sent[priority] += 1
+        self._wait_total[priority] += waited
+        self._wait_max[priority] = max(self._wait_max[priority], waited)
+        if self.slow_wait is not None and waited > self.slow_wait:
+            print(f"Warning: {priority.name} message waited {waited * 1000:.0f}ms in the outbound queue ({self.queue_depth()} queued)")
+        self._in_flight += 1
+        self._bucket_in_flight[bucket] = self._bucket_in_flight.get(bucket, 0) + 1
+        asyncio.create_task(self._send(bucket, factory, future))
+
+    async def _send(self, bucket, factory, future):
+        try:
+            result = await factory()
+        except Exception as e:
+            if not future.cancelled():
+                future.set_exception(e)
+        else:
+            if not future.cancelled():
+                future.set_result(result)
+        finally:
+            self._in_flight -= 1
+            self._bucket_in_flight[bucket] -= 1
+            if not self._bucket_in_flight[bucket]:
+                del self._bucket_in_flight[bucket]
+            self._promote(bucket)
+            self._dispatch()
+
+    def _promote(self, bucket):
+        # The bucket's next held-back request competes by priority again
+        waiting = self._waiting.get(bucket)
+        if waiting:
+            heapq.heappush(self._queue, heapq.heappop(waiting))
+            if not waiting:
+                del self._waiting[bucket]
+
+    def queue_depth(self):
+        return sum(self._depth.values())
+
+    def stats(self):
+        """Returns queue depth, sent count and wait times per priority class"""
+        stats = {
+            priority.name: {
+                'queued': self._depth[priority],
+                'sent': self._sent[priority],
+                'avg_wait_ms': round(self._wait_total[priority] / self._sent[priority] * 1000, 1) if self._sent[priority] else 0.0,
+                'max_wait_ms': round(self._wait_max[priority] * 1000, 1)
+            }
+            for priority in Priority
+        }
+        stats['in_flight'] = self._in_flight
+        stats['busy_buckets'] = len(self._bucket_in_flight)
+        return stats
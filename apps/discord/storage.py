@@ -0,0 +1,525 @@
+import os
+import json
+import copy
+import sqlite3
+import threading
+
+# Engine used when CREWMATE_STORAGE is not set
+DEFAULT_ENGINE = 'firestore'
+FIRESTORE_BATCH_LIMIT = 500
+
+
+def is_stale(current, data):
+    """Whether a versioned write of data was not based on the stored current"""
+    expected = data['version'] - 1
+    if current is None:
+        # Deleted since it was read, unless it is new
+        return expected > 0
+    return current.get('version', 0) != expected
+
+
+class Storage:
+    """Document store behind ProjectManager.
+
+    Data is addressed as (collection, document) locations holding dicts.
+    Every method is blocking; ProjectManager calls them from its I/O executor.
+    Writes are (collection, document, data, merge) tuples: data None deletes
+    the document, and with merge a None field value deletes that field.
+    """
+    name = 'storage'
+    supports_listen = False
+
+    def stream_projects(self, fields=None, collection='projects'):
+        """Returns {name: project}, limited to the given fields if any"""
+        raise NotImplementedError
+
+    def stream_collection(self, collection):
+        """Returns {document: data} for every document of a collection"""
+        raise NotImplementedError
+
+    def get_document(self, collection, document):
+        """Returns the document's data, or None if it does not exist"""
+        raise NotImplementedError
+
+    def get_documents(self, locations):
+        """Returns {location: data or None} for several documents at once"""
+        return {location: self.get_document(*location) for location in locations}
+
+    def commit(self, writes):
+        """Applies a list of writes"""
+        raise NotImplementedError
+
+    def commit_versioned(self, collection, documents):
+        """Stores {document: data} where each document is still at data['version'] - 1.
+
+        A missing document or version field counts as version 0. Documents
+        that moved on are left alone and returned as {document: data or None}.
+        """
+        raise NotImplementedError
+
+    def increment(self, increments):
+        """Adds {location: {field: amount}} to numeric fields"""
+        raise NotImplementedError
+
+    def add_to_fields(self, collection, amounts):
+        """Atomically adds {document: {field: amount}} and returns the new values by field"""
+        raise NotImplementedError
+
+    def listen(self, collection, callback, fields=None):
+        """Calls callback([(change_type, collection, document, data)]) on remote changes.
+
+        With fields, only those fields are downloaded and passed as data.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class FirestoreStorage(Storage):
+    """Firestore documents, shared with the dashboard"""
+    name = 'firestore'
+    supports_listen = True
+
+    def __init__(self):
+        self._db = None
+        self.firestore = None
+
+    @property
+    def db(self):
+        # Firebase is imported and initialized on first use, so creating the
+        # engine is free and the other engines run without credentials
+        if self._db is None:
+            from firebase_admin import firestore
+            from firebase_client import get_db
+            self.firestore = firestore
+            self._db = get_db()
+        return self._db
+
+    def _ref(self, collection, document):
+        return self.db.collection(collection).document(document)
+
+    def stream_projects(self, fields=None, collection='projects'):
+        query = self.db.collection(collection)
+        if fields is not None:
+            query = query.select(fields)
+        return {doc.id: doc.to_dict() for doc in query.stream()}
+
+    def stream_collection(self, collection):
+        return {doc.id: doc.to_dict() for doc in self.db.collection(collection).stream()}
+
+    def get_document(self, collection, document):
+        snapshot = self._ref(collection, document).get()
+        return snapshot.to_dict() if snapshot.exists else None
+
+    def get_documents(self, locations):
+        # One batched round trip instead of a get per document
+        documents = {location: None for location in locations}
+        refs = [self._ref(*location) for location in locations]
+        # Keyed by full path; a subcollection's parent id is only its last segment
+        paths = {ref.path: location for ref, location in zip(refs, locations)}
+        for start in range(0, len(refs), FIRESTORE_BATCH_LIMIT):
+            for snapshot in self.db.get_all(refs[start:start + FIRESTORE_BATCH_LIMIT]):
+                if snapshot.exists:
+                    documents[paths[snapshot.reference.path]] = snapshot.to_dict()
+        return documents
+
+    def commit(self, writes):
+        # Firestore batches are limited to 500 operations
+        for start in range(0, len(writes), FIRESTORE_BATCH_LIMIT):
+            batch = self.db.batch()
+            for collection, document, data, merge in writes[start:start + FIRESTORE_BATCH_LIMIT]:
+                ref = self._ref(collection, document)
+                if data is None:
+                    batch.delete(ref)
+                elif merge:
+                    fields = {field: self.firestore.DELETE_FIELD if value is None else value for field, value in data.items()}
+                    batch.set(ref, fields, merge=True)
+                else:
+                    batch.set(ref, data)
+            batch.commit()
+
+    def commit_versioned(self, collection, documents):
+        conflicts = {}
+        names = list(documents)
+        for start in range(0, len(names), FIRESTORE_BATCH_LIMIT):
+            chunk = names[start:start + FIRESTORE_BATCH_LIMIT]
+
+            @self.firestore.transactional
+            def apply(transaction):
+                refs = [self._ref(collection, document) for document in chunk]
+                current = {document: None for document in chunk}
+                paths = {ref.path: document for ref, document in zip(refs, chunk)}
+                for snapshot in transaction.get_all(refs):
+                    if snapshot.exists:
+                        current[paths[snapshot.reference.path]] = snapshot.to_dict()
+                stale = {}
+                for ref, document in zip(refs, chunk):
+                    if is_stale(current[document], documents[document]):
+                        stale[document] = current[document]
+                    else:
+                        transaction.set(ref, documents[document])
+                return stale
+
+            conflicts.update(apply(self.db.transaction()))
+        return conflicts
+
+    def increment(self, increments):
+        locations = list(increments)
+        for start in range(0, len(locations), FIRESTORE_BATCH_LIMIT):
+            batch = self.db.batch()
+            for location in locations[start:start + FIRESTORE_BATCH_LIMIT]:
+                fields = {field: self.firestore.Increment(amount) for field, amount in increments[location].items()}
+                batch.set(self._ref(*location), fields, merge=True)
+            batch.commit()
+
+    def add_to_fields(self, collection, amounts):
+        db = self.db
+
+        @self.firestore.transactional
+        def apply(transaction):
+            # Transactions must do all reads before any write
+            snapshots = {}
+            for document in amounts:
+                snapshots[document] = self._ref(collection, document).get(transaction=transaction)
+            values = {}
+            for document, fields in amounts.items():
+                current = snapshots[document].to_dict() if snapshots[document].exists else {}
+                updated = {field: current.get(field, 0) + amount for field, amount in fields.items()}
+                # Only the given fields are written, so other fields changed
+                # by another process are left alone
+                transaction.set(self._ref(collection, document), updated, merge=True)
+                values.update(updated)
+            return values
+
+        return apply(db.transaction())
+
+    def listen(self, collection, callback, fields=None):
+        def on_snapshot(snapshots, changes, read_time):
+            callback([(change.type.name, collection, change.document.id, change.document.to_dict()) for change in changes])
+        query = self.db.collection(collection)
+        if fields is not None:
+            query = query.select(fields)
+        return query.on_snapshot(on_snapshot)
+
+
+class LocalStorage(Storage):
+    """Shared logic for engines that keep documents in this process.
+
+    Subclasses implement _read, _scan and _apply; a lock serializes access
+    since the I/O executor runs several threads.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+
+    def _read(self, collection, document):
+        raise NotImplementedError
+
+    def _scan(self, collection):
+        raise NotImplementedError
+
+    def _apply(self, documents):
+        """Stores {location: data or None} as one atomic change"""
+        raise NotImplementedError
+
+    def stream_projects(self, fields=None, collection='projects'):
+        with self._lock:
+            projects = self._scan(collection)
+        if fields is not None:
+            projects = {name: {field: project[field] for field in fields if field in project} for name, project in projects.items()}
+        return projects
+
+    def stream_collection(self, collection):
+        with self._lock:
+            return self._scan(collection)
+
+    def get_document(self, collection, document):
+        with self._lock:
+            return self._read(collection, document)
+
+    def _merged(self, documents, collection, document, data, merge):
+        location = (collection, document)
+        if data is None or not merge:
+            return copy.deepcopy(data)
+        current = documents[location] if location in documents else self._read(collection, document)
+        current = dict(current or {})
+        for field, value in data.items():
+            if value is None:
+                current.pop(field, None)
+            else:
+                current[field] = copy.deepcopy(value)
+        return current
+
+    def commit(self, writes):
+        with self._lock:
+            documents = {}
+            for collection, document, data, merge in writes:
+                documents[(collection, document)] = self._merged(documents, collection, document, data, merge)
+            self._apply(documents)
+
+    def commit_versioned(self, collection, documents):
+        with self._lock:
+            conflicts = {}
+            accepted = {}
+            for document, data in documents.items():
+                current = self._read(collection, document)
+                if is_stale(current, data):
+                    conflicts[document] = current
+                else:
+                    accepted[(collection, document)] = copy.deepcopy(data)
+            if accepted:
+                self._apply(accepted)
+            return conflicts
+
+    def increment(self, increments):
+        with self._lock:
+            self.commit([(collection, document, self._added(collection, document, fields), True)
+                         for (collection, document), fields in increments.items()])
+
+    def _added(self, collection, document, fields):
+        current = self._read(collection, document) or {}
+        return {field: current.get(field, 0) + amount for field, amount in fields.items()}
+
+    def add_to_fields(self, collection, amounts):
+        with self._lock:
+            values = {}
+            writes = []
+            for document, fields in amounts.items():
+                updated = self._added(collection, document, fields)
+                writes.append((collection, document, updated, True))
+                values.update(updated)
+            self.commit(writes)
+            return values
+
+
+class MemoryStorage(LocalStorage):
+    """Non-persistent engine for tests and local development"""
+    name = 'memory'
+
+    def __init__(self):
+        super().__init__()
+        self.documents = {}
+
+    def _read(self, collection, document):
+        return copy.deepcopy(self.documents.get((collection, document)))
+
+    def _scan(self, collection):
+        return {document: copy.deepcopy(data) for (name, document), data in self.documents.items() if name == collection}
+
+    def _apply(self, documents):
+        for location, data in documents.items():
+            if data is None:
+                self.documents.pop(location, None)
+            else:
+                self.documents[location] = data
+
+
+class JsonFileStorage(MemoryStorage):
+    """JSON snapshot plus an append-only log of changed documents.
+
+    Each commit appends one fsync'd line to the log, so a write costs
+    O(changed documents) rather than O(total state). Once the log reaches
+    compact_every records it is folded into a new snapshot, written to a
+    temp file, fsync'd and renamed over the old one. Loading reads the
+    snapshot and replays the log; log lines hold whole documents, so
+    replaying a line twice is harmless and a torn last line is skipped.
+    """
+    name = 'json'
+
+    def __init__(self, path, compact_every=1000):
+        super().__init__()
+        self.path = path
+        self.log_path = f"{path}.log"
+        self.compact_every = compact_every
+        self._log_records = 0
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            for collection, documents in data.items():
+                for document, fields in documents.items():
+                    self.documents[(collection, document)] = fields
+        except FileNotFoundError:
+            pass
+        self._replay_log()
+        self._log = open(self.log_path, 'a', encoding='utf-8')
+        if self._log_records >= self.compact_every:
+            self.compact()
+
+    def _replay_log(self):
+        valid_length = 0
+        try:
+            with open(self.log_path, 'rb') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line.decode('utf-8'))
+                    except (UnicodeDecodeError, json.JSONDecodeError):
+                        # Only the last line can be torn by a crash mid-append
+                        print(f"Warning: Dropping corrupt tail of {self.log_path}")
+                        break
+                    if not line.endswith(b'\n'):
+                        break
+                    for collection, document, data in record:
+                        super()._apply({(collection, document): data})
+                    self._log_records += 1
+                    valid_length += len(line)
+        except FileNotFoundError:
+            return
+        # Cut off a torn tail so the next append starts on a fresh line
+        if os.path.getsize(self.log_path) != valid_length:
+            with open(self.log_path, 'r+b') as f:
+                f.truncate(valid_length)
+
+    def _apply(self, documents):
+        super()._apply(documents)
+        record = [[collection, document, data] for (collection, document), data in documents.items()]
+        self._log.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+        self._log.flush()
+        os.fsync(self._log.fileno())
+        self._log_records += 1
+        if self._log_records >= self.compact_every:
+            self.compact()
+
+    def compact(self):
+        """Writes the current state as a new snapshot and empties the log"""
+        with self._lock:
+            data = {}
+            for (collection, document), fields in self.documents.items():
+                data.setdefault(collection, {})[document] = fields
+            # Write to a temp file and rename so a crash never leaves a torn snapshot
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, default=str)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.path)
+            self._fsync_directory()
+            # The log is only emptied once the snapshot that covers it is durable
+            self._log.close()
+            self._log = open(self.log_path, 'w', encoding='utf-8')
+            os.fsync(self._log.fileno())
+            self._log_records = 0
+
+    def _fsync_directory(self):
+        # Persist the rename itself; not supported on every platform
+        try:
+            fd = os.open(os.path.dirname(os.path.abspath(self.path)), os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+    def close(self):
+        with self._lock:
+            self.compact()
+            self._log.close()
+
+
+class SQLiteStorage(LocalStorage):
+    """SQLite database with one row per document"""
+    name = 'sqlite'
+
+    def __init__(self, path):
+        super().__init__()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS documents ('
+            'collection TEXT NOT NULL, document TEXT NOT NULL, data TEXT NOT NULL, '
+            'PRIMARY KEY (collection, document))'
+        )
+        self.connection.commit()
+
+    def _read(self, collection, document):
+        row = self.connection.execute(
+            'SELECT data FROM documents WHERE collection = ? AND document = ?', (collection, document)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _scan(self, collection):
+        rows = self.connection.execute('SELECT document, data FROM documents WHERE collection = ?', (collection,))
+        return {document: json.loads(data) for document, data in rows}
+
+    def _apply(self, documents):
+        with self.connection:
+            for (collection, document), data in documents.items():
+                if data is None:
+                    self.connection.execute('DELETE FROM documents WHERE collection = ? AND document = ?', (collection, document))
+                else:
+                    self.connection.execute(
+                        'INSERT OR REPLACE INTO documents (collection, document, data) VALUES (?, ?, ?)',
+                        (collection, document, json.dumps(data, ensure_ascii=False, default=str))
+                    )
+
+    def close(self):
+        self.connection.close()
+
+
+class PartitionStorage(Storage):
+    """View of another engine with every collection under a path prefix.
+
+    Each guild's ProjectManager works on its own guilds/<guild id>/ subtree
+    (Firestore subcollections) through one of these, addressing collections
+    exactly as it would at the root. Partitions share the underlying engine.
+    """
+
+    def __init__(self, storage, prefix):
+        self.storage = storage
+        self.prefix = prefix
+        self.name = storage.name
+        self.supports_listen = storage.supports_listen
+
+    def _collection(self, collection):
+        return self.prefix + collection
+
+    def stream_projects(self, fields=None, collection='projects'):
+        return self.storage.stream_projects(fields, self._collection(collection))
+
+    def stream_collection(self, collection):
+        return self.storage.stream_collection(self._collection(collection))
+
+    def get_document(self, collection, document):
+        return self.storage.get_document(self._collection(collection), document)
+
+    def get_documents(self, locations):
+        documents = self.storage.get_documents([(self._collection(collection), document) for collection, document in locations])
+        return {(collection[len(self.prefix):], document): data for (collection, document), data in documents.items()}
+
+    def commit(self, writes):
+        self.storage.commit([(self._collection(collection), document, data, merge) for collection, document, data, merge in writes])
+
+    def commit_versioned(self, collection, documents):
+        return self.storage.commit_versioned(self._collection(collection), documents)
+
+    def increment(self, increments):
+        self.storage.increment({(self._collection(collection), document): fields for (collection, document), fields in increments.items()})
+
+    def add_to_fields(self, collection, amounts):
+        return self.storage.add_to_fields(self._collection(collection), amounts)
+
+    def listen(self, collection, callback, fields=None):
+        def forward(updates):
+            callback([(change_type, collection, document, data) for change_type, _, document, data in updates])
+        return self.storage.listen(self._collection(collection), forward, fields)
+
+
+def create_storage(engine=None):
+    """Builds the storage engine named by CREWMATE_STORAGE"""
+    engine = (engine or os.getenv('CREWMATE_STORAGE', DEFAULT_ENGINE)).lower()
+    if engine == 'firestore':
+        return FirestoreStorage()
+    if engine == 'json':
+        return JsonFileStorage(
+            os.getenv('CREWMATE_JSON_PATH', 'crewmate_data.json'),
+            compact_every=int(os.getenv('CREWMATE_JSON_COMPACT_EVERY', '1000'))
+        )
+    if engine == 'sqlite':
+        return SQLiteStorage(os.getenv('CREWMATE_SQLITE_PATH', 'crewmate.db'))
+    if engine == 'memory':
+        return MemoryStorage()
+    raise ValueError(f"Unknown storage engine '{engine}' (expected firestore, json, sqlite or memory)")
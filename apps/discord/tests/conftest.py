@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The bot's modules live next to this directory rather than in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# main builds its storage at import time; never reach Firestore from tests
+os.environ['CREWMATE_STORAGE'] = 'memory'
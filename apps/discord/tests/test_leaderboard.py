@@ -0,0 +1,43 @@
+from leaderboard import PAGE_SIZE, Leaderboard
+
+
+def test_ranks_by_points_then_user_id():
+    board = Leaderboard()
+    board.rebuild({'b': 5, 'a': 5, 'c': 9, 'd': 0})
+    assert board.page(1) == [(1, 'c', 9), (2, 'a', 5), (3, 'b', 5)]
+    assert [board.rank(user_id) for user_id in 'abcd'] == [2, 3, 1, None]
+    assert len(board) == 3
+
+
+def test_update_moves_and_removes_users():
+    board = Leaderboard()
+    board.rebuild({'a': 5, 'b': 3})
+    board.update('b', 8)
+    board.update('c', 1)
+    assert board.page(1) == [(1, 'b', 8), (2, 'a', 5), (3, 'c', 1)]
+    board.update('a', 0)
+    assert board.rank('a') is None
+    assert board.page(1) == [(1, 'b', 8), (2, 'c', 1)]
+    board.update('x', 0)
+    assert len(board) == 2
+
+
+def test_pages():
+    board = Leaderboard()
+    board.rebuild({str(user_id): 100 - user_id for user_id in range(PAGE_SIZE + 3)})
+    assert board.page_count == 2
+    assert [rank for rank, _, _ in board.page(2)] == [PAGE_SIZE + 1, PAGE_SIZE + 2, PAGE_SIZE + 3]
+    assert board.page(3) == []
+    assert Leaderboard().page_count == 1
+
+
+def test_top_version_changes_only_for_the_first_page():
+    board = Leaderboard()
+    board.rebuild({str(user_id): 1000 - user_id for user_id in range(PAGE_SIZE * 2)})
+    version = board.top_version
+    board.update(str(PAGE_SIZE * 2 - 1), 1)
+    assert board.top_version == version
+    board.update(str(PAGE_SIZE * 2 - 1), 5000)
+    assert board.top_version == version + 1
+    board.update(str(PAGE_SIZE * 2 - 1), 5000)
+    assert board.top_version == version + 1
@@ -0,0 +1,91 @@
+import asyncio
+
+import main
+from models import Project, Task
+from storage import MemoryStorage
+
+
+def manager(storage, tmp_path, name):
+    return main.ProjectManager(storage, journal_path=str(tmp_path / f'{name}.journal'))
+
+
+def test_concurrent_assignments_of_one_member_merge(tmp_path):
+    async def run():
+        storage = MemoryStorage()
+        a, b = manager(storage, tmp_path, 'a'), manager(storage, tmp_path, 'b')
+        a.mark_project_dirty('P', Project(tasks=[Task('p', 10, 2)]))
+        a.mark_project_dirty('Q', Project(tasks=[Task('q', 10, 2)]))
+        await a.save()
+        await b.load()
+        p, q = await a.get_project('P'), await b.get_project('Q')
+        p.assign_member(p.get_task(1), 7)
+        a.mark_project_dirty('P', p)
+        q.assign_member(q.get_task(1), 7)
+        b.mark_project_dirty('Q', q)
+        await a.save()
+        await b.save()
+
+        reloaded = manager(storage, tmp_path, 'c')
+        await reloaded.load()
+        assert reloaded.member_tasks(7) == {('P', 1), ('Q', 1)}
+
+    asyncio.run(run())
+
+
+def test_loading_a_project_reindexes_its_tasks(tmp_path):
+    async def run():
+        storage = MemoryStorage()
+        a, b = manager(storage, tmp_path, 'a'), manager(storage, tmp_path, 'b')
+        a.mark_project_dirty('P', Project(tasks=[Task('t1', 10, 2), Task('t2', 10, 2)]))
+        await a.save()
+        await b.load()
+        # An assignment b's index hasn't seen, e.g. missed by live sync
+        project = await a.get_project('P')
+        project.assign_member(project.get_task(2), 7)
+        a.mark_project_dirty('P', project)
+        await a.save()
+        b.user_tasks.clear()
+        b._project_assignments.clear()
+
+        await b.get_project('P')
+        assert b.member_tasks(7) == {('P', 2)}
+
+    asyncio.run(run())
+
+
+def test_completed_and_deleted_tasks_leave_the_index(tmp_path):
+    async def run():
+        storage = MemoryStorage()
+        pm = manager(storage, tmp_path, 'a')
+        pm.mark_project_dirty('P', Project(tasks=[Task('t1', 10, 2, [7]), Task('t2', 10, 2, [7])]))
+        pm.mark_project_dirty('Q', Project(tasks=[Task('q', 10, 2, [7])]))
+        await pm.save()
+        assert pm.member_tasks(7) == {('P', 1), ('P', 2), ('Q', 1)}
+
+        project = await pm.get_project('P')
+        project.complete_task(project.get_task(1), 7, 'now')
+        pm.mark_project_dirty('P', project)
+        del pm.projects['Q']
+        pm.mark_project_deleted('Q')
+        await pm.save()
+        assert pm.member_tasks(7) == {('P', 2)}
+
+        reloaded = manager(storage, tmp_path, 'b')
+        await reloaded.load()
+        assert reloaded.member_tasks(7) == {('P', 2)}
+
+    asyncio.run(run())
+
+
+def test_per_member_entries_are_migrated(tmp_path):
+    async def run():
+        storage = MemoryStorage()
+        shard = main.user_shard('5')
+        storage.commit([('projects', 'P', Project(tasks=[Task('t', 1, 1, [5])]).to_document(), False),
+                        ('user_tasks', shard, {'5': [{'project': 'P', 'task': 1}]}, True)])
+        pm = manager(storage, tmp_path, 'a')
+        await pm.load()
+        assert pm.member_tasks(5) == {('P', 1)}
+        assert storage.get_document('user_tasks', shard) == {main.assignment_field('5', 'P', 1): True}
+
+    asyncio.run(run())
@@ -0,0 +1,177 @@
+import asyncio
+
+import main
+from models import Project, Task, merge_project_documents
+from storage import MemoryStorage
+
+
+def task(task_id, description='t', max_members=2, members=(), completed=False):
+    return {'id': task_id, 'description': description, 'reward_points': 10, 'max_members': max_members,
+            'assigned_members': list(members), 'completed': completed}
+
+
+def project(*tasks, **fields):
+    return dict({'description': 'd', 'members': [], 'tasks': list(tasks), 'next_task_id': len(tasks) + 1, 'version': 1}, **fields)
+
+
+def test_fields_changed_on_each_side_are_kept():
+    base = project(task(1))
+    ours = dict(base, description='ours')
+    theirs = dict(base, status='Archived')
+    merged, rejected = merge_project_documents(base, ours, theirs)
+    assert (merged['description'], merged['status']) == ('ours', 'Archived')
+    assert rejected == set()
+
+
+def test_concurrent_task_adds_keep_both():
+    base = project(task(1))
+    ours = project(task(1), task(2, 'ours'))
+    theirs = project(task(1), task(2, 'theirs'))
+    merged, rejected = merge_project_documents(base, ours, theirs)
+    assert [(t['id'], t['description']) for t in merged['tasks']] == [(1, 't'), (2, 'theirs'), (3, 'ours')]
+    assert merged['next_task_id'] == 4
+    assert rejected == set()
+
+
+def test_identical_adds_are_not_duplicated():
+    base = project(task(1))
+    ours = project(task(1), task(2, 'same'))
+    merged, _ = merge_project_documents(base, ours, project(task(1), task(2, 'same')))
+    assert [t['id'] for t in merged['tasks']] == [1, 2]
+
+
+def test_removed_task_stays_removed():
+    base = project(task(1), task(2))
+    ours = project(task(1), task(2, 'renamed'))
+    theirs = project(task(2))
+    merged, rejected = merge_project_documents(base, project(task(1), task(2)), theirs)
+    assert [t['id'] for t in merged['tasks']] == [2]
+    merged, rejected = merge_project_documents(base, project(task(2)), project(task(1), task(2)))
+    assert [t['id'] for t in merged['tasks']] == [2]
+    assert rejected == set()
+    # Our edit of a task they removed can't be applied
+    merged, rejected = merge_project_documents(base, ours, project(task(1)))
+    assert [t['id'] for t in merged['tasks']] == [1]
+    assert rejected == {2}
+
+
+def test_concurrent_assignments_merge_members():
+    base = project(task(1, max_members=3, members=['1']))
+    ours = project(task(1, max_members=3, members=['1', '2']))
+    theirs = project(task(1, max_members=3, members=['1', '3']))
+    merged, rejected = merge_project_documents(base, ours, theirs)
+    assert merged['tasks'][0]['assigned_members'] == ['1', '3', '2']
+    assert rejected == set()
+
+
+def test_assignment_past_max_members_is_rejected():
+    base = project(task(1, max_members=1))
+    ours = project(task(1, max_members=1, members=['2']))
+    theirs = project(task(1, max_members=1, members=['3']))
+    merged, rejected = merge_project_documents(base, ours, theirs)
+    assert merged['tasks'][0] == theirs['tasks'][0]
+    assert rejected == {1}
+
+
+def test_assignment_to_completed_task_is_rejected():
+    base = project(task(1, members=['1']))
+    ours = project(task(1, members=['1', '2']))
+    theirs = project(task(1, members=['1'], completed=True))
+    merged, rejected = merge_project_documents(base, ours, theirs)
+    assert merged['tasks'][0]['completed'] and merged['tasks'][0]['assigned_members'] == ['1']
+    assert rejected == {1}
+
+
+def test_double_completion_is_rejected():
+    base = project(task(1, members=['1']))
+    ours = project(dict(task(1, members=['1'], completed=True), completed_by='1', completed_at='ours'))
+    theirs = project(dict(task(1, members=['1'], completed=True), completed_by='1', completed_at='theirs'))
+    merged, rejected = merge_project_documents(base, ours, theirs)
+    assert merged['tasks'][0]['completed_at'] == 'theirs'
+    assert rejected == {1}
+
+
+def test_completion_keeps_a_concurrent_assignment():
+    base = project(task(1, max_members=3, members=['1']))
+    ours = project(task(1, max_members=3, members=['1'], completed=True))
+    theirs = project(task(1, max_members=3, members=['1', '2']))
+    merged, rejected = merge_project_documents(base, ours, theirs)
+    assert merged['tasks'][0]['completed'] and merged['tasks'][0]['assigned_members'] == ['1', '2']
+    assert rejected == set()
+
+
+def managers(tmp_path, count=2):
+    storage = MemoryStorage()
+    return storage, [main.ProjectManager(storage, journal_path=str(tmp_path / f'{index}.journal')) for index in range(count)]
+
+
+def test_concurrent_saves_rebase_instead_of_overwriting(tmp_path):
+    async def run():
+        storage, (a, b) = managers(tmp_path)
+        a.mark_project_dirty('P', Project(tasks=[Task('t1', 10, 3)]))
+        await a.save()
+        await b.load()
+        ours, theirs = await a.get_project('P'), await b.get_project('P')
+
+        ours.add_task(Task('added by a', 5, 1))
+        ours.assign_member(ours.get_task(1), 1)
+        a.mark_project_dirty('P', ours)
+        theirs.add_task(Task('added by b', 5, 1))
+        theirs.assign_member(theirs.get_task(1), 2)
+        b.mark_project_dirty('P', theirs)
+        assert await a.save_project('P') == set()
+        assert await b.save_project('P') == set()
+
+        stored = storage.get_document('projects', 'P')
+        assert stored['version'] == 3
+        assert sorted(t['description'] for t in stored['tasks']) == ['added by a', 'added by b', 't1']
+        assert sorted(stored['tasks'][0]['assigned_members']) == ['1', '2']
+        assert len({t['id'] for t in stored['tasks']}) == 3
+        assert b.projects['P'].to_document() == stored
+
+    asyncio.run(run())
+
+
+def test_losing_write_reports_rejected_tasks(tmp_path):
+    async def run():
+        storage, (a, b) = managers(tmp_path)
+        a.mark_project_dirty('P', Project(tasks=[Task('t1', 10, 1, [5]), Task('t2', 10, 1)]))
+        await a.save()
+        await b.load()
+        ours, theirs = await a.get_project('P'), await b.get_project('P')
+
+        ours.complete_task(ours.get_task(1), 5, 'a')
+        ours.assign_member(ours.get_task(2), 1)
+        a.mark_project_dirty('P', ours)
+        theirs.complete_task(theirs.get_task(1), 5, 'b')
+        theirs.assign_member(theirs.get_task(2), 2)
+        b.mark_project_dirty('P', theirs)
+        assert await a.save_project('P') == set()
+        assert await b.save_project('P') == {1, 2}
+
+        stored = storage.get_document('projects', 'P')
+        assert stored['tasks'][0]['completed_at'] == 'a'
+        assert stored['tasks'][1]['assigned_members'] == ['1']
+        assert b.member_tasks(2) == set()
+
+    asyncio.run(run())
+
+
+def test_remote_delete_wins_over_local_changes(tmp_path):
+    async def run():
+        storage, (a, b) = managers(tmp_path)
+        a.mark_project_dirty('P', Project(tasks=[Task('t1', 10, 1)]))
+        await a.save()
+        await b.load()
+        theirs = await b.get_project('P')
+        del a.projects['P']
+        a.mark_project_deleted('P')
+        await a.save()
+
+        theirs.assign_member(theirs.get_task(1), 2)
+        b.mark_project_dirty('P', theirs)
+        await b.save_project('P')
+        assert storage.get_document('projects', 'P') is None
+        assert 'P' not in b.projects
+
+    asyncio.run(run())
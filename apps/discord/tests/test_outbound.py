@@ -0,0 +1,111 @@
+import asyncio
+
+import pytest
+
+from outbound import Dispatcher, Priority
+
+
+class Recorder:
+    """Request factories that log their start and wait to be released"""
+
+    def __init__(self):
+        self.started = []
+        self.gates = {}
+
+    def request(self, name, hold=False):
+        gate = self.gates.setdefault(name, asyncio.Event())
+        if not hold:
+            gate.set()
+
+        async def send():
+            self.started.append(name)
+            await gate.wait()
+            return name
+        return send
+
+
+async def settle():
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+def test_requests_start_by_priority_then_arrival():
+    async def run():
+        dispatcher = Dispatcher(concurrency=1, bucket_concurrency=1)
+        recorder = Recorder()
+        sends = [asyncio.create_task(dispatcher.submit(Priority.INTERACTIVE, 'x', recorder.request('blocker', hold=True)))]
+        await settle()
+        for name, priority in (('welcome', Priority.WELCOME), ('forum', Priority.FORUM_SYNC), ('dm', Priority.DM_FLOW),
+                               ('reply 1', Priority.INTERACTIVE), ('reply 2', Priority.INTERACTIVE)):
+            sends.append(asyncio.create_task(dispatcher.submit(priority, name, recorder.request(name))))
+        await settle()
+        assert dispatcher.queue_depth() == 5
+        recorder.gates['blocker'].set()
+        assert await asyncio.gather(*sends) == ['blocker', 'welcome', 'forum', 'dm', 'reply 1', 'reply 2']
+        assert recorder.started == ['blocker', 'reply 1', 'reply 2', 'dm', 'forum', 'welcome']
+        assert dispatcher.stats()['INTERACTIVE']['sent'] == 3
+
+    asyncio.run(run())
+
+
+def test_busy_bucket_does_not_hold_up_others():
+    async def run():
+        dispatcher = Dispatcher(concurrency=4, bucket_concurrency=1)
+        recorder = Recorder()
+        first = asyncio.create_task(dispatcher.submit(Priority.INTERACTIVE, 'a', recorder.request('a1', hold=True)))
+        second = asyncio.create_task(dispatcher.submit(Priority.INTERACTIVE, 'a', recorder.request('a2')))
+        other = asyncio.create_task(dispatcher.submit(Priority.WELCOME, 'b', recorder.request('b1')))
+        assert await other == 'b1'
+        assert recorder.started == ['a1', 'b1']
+        recorder.gates['a1'].set()
+        assert await asyncio.gather(first, second) == ['a1', 'a2']
+
+    asyncio.run(run())
+
+
+def test_background_traffic_leaves_a_slot_for_replies():
+    async def run():
+        dispatcher = Dispatcher(concurrency=2, bucket_concurrency=1)
+        recorder = Recorder()
+        forum = asyncio.create_task(dispatcher.submit(Priority.FORUM_SYNC, 'f1', recorder.request('f1', hold=True)))
+        welcome = asyncio.create_task(dispatcher.submit(Priority.WELCOME, 'w1', recorder.request('w1')))
+        await settle()
+        assert recorder.started == ['f1']
+        assert await dispatcher.submit(Priority.INTERACTIVE, 'r1', recorder.request('r1')) == 'r1'
+        recorder.gates['f1'].set()
+        await asyncio.gather(forum, welcome)
+        assert recorder.started == ['f1', 'r1', 'w1']
+
+    asyncio.run(run())
+
+
+def test_cancelled_request_releases_its_bucket_queue():
+    async def run():
+        dispatcher = Dispatcher(concurrency=2, bucket_concurrency=1)
+        recorder = Recorder()
+        first = asyncio.create_task(dispatcher.submit(Priority.DM_FLOW, 'dm', recorder.request('first', hold=True)))
+        cancelled = asyncio.create_task(dispatcher.submit(Priority.DM_FLOW, 'dm', recorder.request('cancelled')))
+        last = asyncio.create_task(dispatcher.submit(Priority.DM_FLOW, 'dm', recorder.request('last')))
+        await settle()
+        cancelled.cancel()
+        recorder.gates['first'].set()
+        assert await asyncio.wait_for(last, 1) == 'last'
+        assert await first == 'first'
+        assert recorder.started == ['first', 'last']
+        assert dispatcher.queue_depth() == 0
+        assert dispatcher.stats()['in_flight'] == 0
+
+    asyncio.run(run())
+
+
+def test_errors_reach_the_caller():
+    async def run():
+        dispatcher = Dispatcher(concurrency=1, bucket_concurrency=1)
+
+        async def fail():
+            raise RuntimeError('rate limited')
+        with pytest.raises(RuntimeError):
+            await dispatcher.submit(Priority.INTERACTIVE, 'x', fail)
+        assert await dispatcher.submit(Priority.INTERACTIVE, 'x', Recorder().request('next')) == 'next'
+
+    asyncio.run(run())
@@ -0,0 +1,103 @@
+import os
+
+from storage import JsonFileStorage
+
+
+def open_storage(tmp_path, compact_every=1000):
+    return JsonFileStorage(str(tmp_path / 'data.json'), compact_every=compact_every)
+
+
+def log_lines(storage):
+    with open(storage.log_path, 'rb') as f:
+        return f.read().splitlines(keepends=True)
+
+
+def test_log_replay_restores_commits(tmp_path):
+    storage = open_storage(tmp_path)
+    storage.commit([('projects', 'A', {'description': 'a', 'version': 1}, False)])
+    storage.commit([('projects', 'B', {'description': 'b'}, False)])
+    storage.commit([('projects', 'A', {'status': 'Completed'}, True)])
+    storage.commit([('projects', 'B', None, False)])
+    assert not os.path.exists(storage.path)
+    assert len(log_lines(storage)) == 4
+
+    reopened = open_storage(tmp_path)
+    assert reopened.get_document('projects', 'A') == {'description': 'a', 'version': 1, 'status': 'Completed'}
+    assert reopened.get_document('projects', 'B') is None
+
+
+def test_log_replayed_over_its_own_snapshot(tmp_path):
+    # A crash after the snapshot rename but before the log is emptied
+    storage = open_storage(tmp_path)
+    storage.commit([('points', 'shard_00', {'1': 5}, True)])
+    storage.commit([('points', 'shard_00', {'2': 3}, True)])
+    lines = log_lines(storage)
+    storage.compact()
+    with open(storage.log_path, 'wb') as f:
+        f.writelines(lines)
+
+    reopened = open_storage(tmp_path)
+    assert reopened.get_document('points', 'shard_00') == {'1': 5, '2': 3}
+
+
+def test_torn_tail_is_dropped_and_truncated(tmp_path):
+    storage = open_storage(tmp_path)
+    storage.commit([('projects', 'A', {'description': 'a'}, False)])
+    valid_size = os.path.getsize(storage.log_path)
+    with open(storage.log_path, 'ab') as f:
+        f.write(b'[["projects", "B", {"descr')
+
+    reopened = open_storage(tmp_path)
+    assert reopened.get_document('projects', 'A') == {'description': 'a'}
+    assert reopened.get_document('projects', 'B') is None
+    assert os.path.getsize(reopened.log_path) == valid_size
+
+    # Appends resume on a fresh line and survive the next load
+    reopened.commit([('projects', 'C', {'description': 'c'}, False)])
+    assert open_storage(tmp_path).get_document('projects', 'C') == {'description': 'c'}
+
+
+def test_record_without_newline_counts_as_torn(tmp_path):
+    storage = open_storage(tmp_path)
+    storage.commit([('projects', 'A', {'description': 'a'}, False)])
+    with open(storage.log_path, 'ab') as f:
+        f.write(b'[["projects", "B", {"description": "b"}]]')
+
+    reopened = open_storage(tmp_path)
+    assert reopened.get_document('projects', 'B') is None
+    assert log_lines(reopened)[-1].endswith(b'\n')
+
+
+def test_compaction_folds_log_into_snapshot(tmp_path):
+    storage = open_storage(tmp_path, compact_every=3)
+    for index in range(3):
+        storage.commit([('projects', f'P{index}', {'index': index}, False)])
+    assert os.path.exists(storage.path)
+    assert log_lines(storage) == []
+    assert not os.path.exists(f"{storage.path}.tmp")
+
+    storage.commit([('projects', 'P0', None, False)])
+    assert len(log_lines(storage)) == 1
+
+    reopened = open_storage(tmp_path, compact_every=3)
+    assert reopened.get_document('projects', 'P0') is None
+    assert reopened.get_document('projects', 'P2') == {'index': 2}
+
+
+def test_load_compacts_a_long_log(tmp_path):
+    storage = open_storage(tmp_path)
+    for index in range(5):
+        storage.commit([('projects', 'P', {'index': index}, False)])
+
+    reopened = open_storage(tmp_path, compact_every=5)
+    assert log_lines(reopened) == []
+    assert reopened.get_document('projects', 'P') == {'index': 4}
+
+
+def test_close_writes_a_snapshot(tmp_path):
+    storage = open_storage(tmp_path)
+    storage.commit([('projects', 'A', {'description': 'a'}, False)])
+    storage.close()
+    assert os.path.getsize(storage.log_path) == 0
+
+    assert open_storage(tmp_path).get_document('projects', 'A') == {'description': 'a'}